@@ -2,7 +2,7 @@
 Configuration de l'interface d'administration pour l'app authentication
 """
 from django.contrib import admin
-from .models import OTPCode
+from .models import OTPCode, OTPEvent
 
 
 @admin.register(OTPCode)
@@ -66,4 +66,21 @@ class OTPCodeAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         """Empêche la modification d'OTP"""
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(OTPEvent)
+class OTPEventAdmin(admin.ModelAdmin):
+    """Journal des OTP gérés en cache, en lecture seule"""
+    
+    list_display = ['user', 'otp_type', 'event', 'created_at']
+    list_filter = ['otp_type', 'event', 'created_at']
+    search_fields = ['user__username', 'user__email']
+    list_select_related = ['user']
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
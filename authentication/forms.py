@@ -5,6 +5,7 @@ from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.core.exceptions import ValidationError
+from core.phone import normalize_phone_number
 
 User = get_user_model()
 
@@ -59,8 +60,10 @@ class SignupForm(UserCreationForm):
         return email
     
     def clean_phone_number(self):
-        phone_number = self.cleaned_data.get('phone_number')
-        if User.objects.filter(phone_number=phone_number).exists():
+        phone_number = normalize_phone_number(self.cleaned_data.get('phone_number'))
+        if phone_number is None:
+            raise ValidationError('Numéro de téléphone invalide.')
+        if User.objects.filter(phone_e164=phone_number).exists():
             raise ValidationError('Ce numéro de téléphone est déjà utilisé.')
         return phone_number
 
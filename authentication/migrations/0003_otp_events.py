@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OTPEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('otp_type', models.CharField(choices=[('signup', 'Activation de compte'), ('withdrawal', "Retrait d'argent")], max_length=20, verbose_name="Type d'OTP")),
+                ('event', models.CharField(choices=[('issued', 'Émis'), ('verified', 'Vérifié'), ('locked', "Bloqué (trop d'essais)")], max_length=10, verbose_name='Événement')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date')),
+            ],
+            options={
+                'verbose_name': 'Événement OTP',
+                'verbose_name_plural': 'Événements OTP',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='otpcode',
+            index=models.Index(fields=['user', 'otp_type', '-created_at'], name='otp_user_type_idx'),
+        ),
+        migrations.AddField(
+            model_name='otpevent',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='otp_events', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur'),
+        ),
+        migrations.AddIndex(
+            model_name='otpevent',
+            index=models.Index(fields=['user', '-created_at'], name='authenticat_user_id_6528c3_idx'),
+        ),
+    ]
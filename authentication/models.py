@@ -65,6 +65,8 @@ class OTPCode(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['code', 'otp_type']),
+            # Invalidation et vérification : codes d'un utilisateur pour un type
+            models.Index(fields=['user', 'otp_type', '-created_at'], name='otp_user_type_idx'),
         ]
     
     def __str__(self):
@@ -136,25 +138,78 @@ class OTPCode(models.Model):
         Returns:
             Tuple (bool, str): (succès, message)
         """
-        try:
-            otp = cls.objects.get(
-                user=user,
-                code=code,
-                otp_type=otp_type
-            )
-            
-            if otp.is_used:
-                logger.warning(f"Tentative d'utilisation d'un OTP déjà utilisé: {user.username}")
-                return False, "Ce code a déjà été utilisé."
-            
-            if not otp.is_valid():
-                logger.warning(f"Tentative d'utilisation d'un OTP expiré: {user.username}")
-                return False, "Ce code a expiré."
-            
-            otp.mark_as_used()
-            logger.info(f"OTP vérifié avec succès: {otp_type} pour {user.username}")
-            return True, "Code vérifié avec succès."
-            
-        except cls.DoesNotExist:
+        # Le même code a pu être tiré plusieurs fois : le plus récent fait foi
+        otp = cls.objects.filter(
+            user=user,
+            code=code,
+            otp_type=otp_type
+        ).order_by('-created_at', '-id').first()
+        
+        if otp is None:
             logger.warning(f"Tentative avec un code OTP invalide: {user.username}")
-            return False, "Code invalide."
\ No newline at end of file
+            return False, "Code invalide."
+        
+        if otp.is_used:
+            logger.warning(f"Tentative d'utilisation d'un OTP déjà utilisé: {user.username}")
+            return False, "Ce code a déjà été utilisé."
+        
+        if not otp.is_valid():
+            logger.warning(f"Tentative d'utilisation d'un OTP expiré: {user.username}")
+            return False, "Ce code a expiré."
+        
+        otp.mark_as_used()
+        logger.info(f"OTP vérifié avec succès: {otp_type} pour {user.username}")
+        return True, "Code vérifié avec succès."
+
+
+class OTPEvent(models.Model):
+    """
+    Journal compact des OTP gérés en cache (OTP_BACKEND = 'cache').
+    Les codes eux-mêmes ne sont jamais écrits en base : seuls l'émission
+    et l'issue de la vérification sont enregistrées.
+    """
+    
+    ISSUED = 'issued'
+    VERIFIED = 'verified'
+    LOCKED = 'locked'
+    
+    EVENTS = [
+        (ISSUED, 'Émis'),
+        (VERIFIED, 'Vérifié'),
+        (LOCKED, 'Bloqué (trop d\'essais)'),
+    ]
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='otp_events',
+        verbose_name="Utilisateur"
+    )
+    
+    otp_type = models.CharField(
+        max_length=20,
+        choices=OTPCode.OTP_TYPES,
+        verbose_name="Type d'OTP"
+    )
+    
+    event = models.CharField(
+        max_length=10,
+        choices=EVENTS,
+        verbose_name="Événement"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date"
+    )
+    
+    class Meta:
+        verbose_name = "Événement OTP"
+        verbose_name_plural = "Événements OTP"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"OTP {self.get_otp_type_display()} {self.get_event_display()} pour {self.user.username}"
@@ -0,0 +1,136 @@
+"""
+Stockage des codes OTP
+
+Deux backends, choisis par settings.OTP_BACKEND :
+
+- 'database' : une ligne OTPCode par code émis (comportement historique) ;
+- 'cache' : le code haché est gardé dans le cache Django (OTP_CACHE_ALIAS)
+  avec l'expiration native du cache. Émettre un code remplace le précédent,
+  les essais sont comptés par un incr atomique et un code n'est accepté
+  qu'une fois (delete renvoie False au second appel). La base ne reçoit
+  qu'un événement OTPEvent par émission et par issue, jamais le code.
+
+Le cache doit être partagé entre les processus : avec un cache local
+(LocMemCache), un code émis par un processus serait inconnu des autres et
+les essais seraient comptés par processus. Le backend 'database' est alors
+utilisé à la place.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, get_random_string, salted_hmac
+from types import SimpleNamespace
+from .models import OTPCode, OTPEvent
+import logging
+
+logger = logging.getLogger('authentication')
+
+CODE_KEY = 'otp:{otp_type}:{user_id}'
+ATTEMPTS_KEY = 'otp:{otp_type}:{user_id}:attempts'
+
+
+class DatabaseOTPStore:
+    """Codes OTP en base (modèle OTPCode)"""
+    
+    @staticmethod
+    def issue(user, otp_type, expiration_minutes):
+        return OTPCode.create_otp(user, otp_type, expiration_minutes)
+    
+    @staticmethod
+    def verify(user, code, otp_type):
+        return OTPCode.verify_otp(user, code, otp_type)
+
+
+class CacheOTPStore:
+    """Codes OTP hachés dans le cache, avec journal compact en base"""
+    
+    @staticmethod
+    def cache():
+        return caches[settings.OTP_CACHE_ALIAS]
+    
+    @staticmethod
+    def hash_code(user, code, otp_type):
+        """Empreinte du code, liée à l'utilisateur et au type (clé : SECRET_KEY)"""
+        return salted_hmac('authentication.otp', f'{user.pk}:{otp_type}:{code}').hexdigest()
+    
+    @classmethod
+    def issue(cls, user, otp_type, expiration_minutes):
+        """
+        Émet un code : remplace le code en attente et remet les essais à zéro
+        
+        Returns:
+            SimpleNamespace: code, otp_type, expires_at (comme OTPCode)
+        """
+        keys = {'otp_type': otp_type, 'user_id': user.pk}
+        timeout = expiration_minutes * 60
+        code = get_random_string(6, '0123456789')
+        expires_at = timezone.now() + timezone.timedelta(minutes=expiration_minutes)
+        
+        cache = cls.cache()
+        cache.set(CODE_KEY.format(**keys), cls.hash_code(user, code, otp_type), timeout)
+        cache.set(ATTEMPTS_KEY.format(**keys), 0, timeout)
+        
+        OTPEvent.objects.create(user=user, otp_type=otp_type, event=OTPEvent.ISSUED)
+        logger.info(f"Nouvel OTP émis: {otp_type} pour {user.username} | Expire dans {expiration_minutes} min")
+        
+        return SimpleNamespace(user=user, code=code, otp_type=otp_type, expires_at=expires_at)
+    
+    @classmethod
+    def verify(cls, user, code, otp_type):
+        """
+        Vérifie un code ; au-delà de OTP_MAX_ATTEMPTS essais le code est détruit
+        
+        Returns:
+            Tuple (bool, str): (succès, message)
+        """
+        keys = {'otp_type': otp_type, 'user_id': user.pk}
+        code_key = CODE_KEY.format(**keys)
+        cache = cls.cache()
+        
+        expected = cache.get(code_key)
+        if expected is None:
+            logger.warning(f"Vérification OTP sans code en attente: {user.username}")
+            return False, "Ce code a expiré ou a déjà été utilisé."
+        
+        try:
+            attempts = cache.incr(ATTEMPTS_KEY.format(**keys))
+        except ValueError:
+            # Compteur expiré entre les deux lectures
+            attempts = settings.OTP_MAX_ATTEMPTS + 1
+        
+        if attempts > settings.OTP_MAX_ATTEMPTS:
+            if cache.delete(code_key):
+                OTPEvent.objects.create(user=user, otp_type=otp_type, event=OTPEvent.LOCKED)
+            logger.warning(f"OTP bloqué après {settings.OTP_MAX_ATTEMPTS} essais: {user.username}")
+            return False, "Trop d'essais. Demandez un nouveau code."
+        
+        if not constant_time_compare(expected, cls.hash_code(user, code, otp_type)):
+            logger.warning(f"Tentative avec un code OTP invalide: {user.username}")
+            return False, "Code invalide."
+        
+        # Un seul appel concurrent peut supprimer le code : il est le seul à réussir
+        if not cache.delete(code_key):
+            logger.warning(f"Tentative d'utilisation d'un OTP déjà utilisé: {user.username}")
+            return False, "Ce code a déjà été utilisé."
+        
+        OTPEvent.objects.create(user=user, otp_type=otp_type, event=OTPEvent.VERIFIED)
+        logger.info(f"OTP vérifié avec succès: {otp_type} pour {user.username}")
+        return True, "Code vérifié avec succès."
+
+
+STORES = {
+    'database': DatabaseOTPStore,
+    'cache': CacheOTPStore,
+}
+
+
+def get_store():
+    """
+    Backend de stockage des OTP configuré (la base si le cache OTP est local
+    au processus)
+    """
+    if settings.OTP_BACKEND == 'cache' and isinstance(CacheOTPStore.cache(), LocMemCache):
+        logger.warning(f"Cache OTP '{settings.OTP_CACHE_ALIAS}' local au processus : codes OTP stockés en base")
+        return DatabaseOTPStore
+    return STORES[settings.OTP_BACKEND]
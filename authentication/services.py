@@ -4,6 +4,7 @@ Services pour la gestion des OTP
 from django.core.mail import send_mail
 from django.conf import settings
 from .models import OTPCode
+from .otp import get_store
 import logging
 
 logger = logging.getLogger('authentication')
@@ -24,7 +25,7 @@ class OTPService:
             otp_type: Type d'OTP (SIGNUP ou WITHDRAWAL)
         
         Returns:
-            tuple: (success: bool, message: str, otp: OTPCode or None)
+            tuple: (success: bool, message: str, otp: OTPCode (ou équivalent en cache) or None)
         """
         try:
             # Déterminer la durée d'expiration selon le type
@@ -39,8 +40,8 @@ class OTPService:
             else:
                 return False, "Type d'OTP invalide", None
             
-            # Créer l'OTP
-            otp = OTPCode.create_otp(user, otp_type, expiration_minutes)
+            # Créer l'OTP (en base ou en cache selon OTP_BACKEND)
+            otp = get_store().issue(user, otp_type, expiration_minutes)
             
             # Préparer le message email
             message = f"""
@@ -85,7 +86,7 @@ L'équipe {settings.PLATFORM_NAME}
         Returns:
             tuple: (success: bool, message: str)
         """
-        return OTPCode.verify_otp(user, code, otp_type)
+        return get_store().verify(user, code, otp_type)
     
     @staticmethod
     def resend_otp(user, otp_type):
@@ -2,7 +2,8 @@
 Vues pour l'authentification
 """
 from django.shortcuts import render, redirect
-from django.contrib.auth import login, logout, authenticate
+from django.db import IntegrityError, transaction
+from django.contrib.auth import login, logout, authenticate, get_user_model
 from django.contrib import messages
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -14,6 +15,8 @@ import logging
 
 logger = logging.getLogger('authentication')
 
+User = get_user_model()
+
 
 class SignupView(View):
     """
@@ -33,7 +36,15 @@ class SignupView(View):
             # Créer l'utilisateur (non activé)
             user = form.save(commit=False)
             user.is_active = False
-            user.save()
+            try:
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError:
+                # Même numéro enregistré entre la validation et l'écriture
+                if not User.objects.filter(phone_e164=user.phone_e164).exists():
+                    raise
+                form.add_error('phone_number', 'Ce numéro de téléphone est déjà utilisé.')
+                return render(request, self.template_name, {'form': form})
             
             # Générer et envoyer l'OTP
             success, message, otp = OTPService.generate_and_send_otp(user, OTPCode.SIGNUP)
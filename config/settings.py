@@ -127,6 +127,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
 
+# Authentication Backends
+AUTHENTICATION_BACKENDS = [
+    'core.backends.AccountModelBackend',  # utilisateur et compte virtuel en une requête
+    # Sessions ouvertes avant AccountModelBackend (à retirer après SESSION_COOKIE_AGE)
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # Login URLs
 LOGIN_URL = 'authentication:login'
 LOGIN_REDIRECT_URL = 'dashboard:user_dashboard'
@@ -146,6 +153,74 @@ PLATFORM_NAME = os.getenv('PLATFORM_NAME', 'MoneyTransfer Platform')
 WITHDRAWAL_FEE_PERCENTAGE = float(os.getenv('WITHDRAWAL_FEE_PERCENTAGE', 2.0))
 OTP_EXPIRATION_MINUTES_SIGNUP = int(os.getenv('OTP_EXPIRATION_MINUTES_SIGNUP', 2))
 OTP_EXPIRATION_MINUTES_WITHDRAWAL = int(os.getenv('OTP_EXPIRATION_MINUTES_WITHDRAWAL', 3))
+OTP_BACKEND = os.getenv('OTP_BACKEND', 'database')  # 'database' ou 'cache'
+OTP_CACHE_ALIAS = os.getenv('OTP_CACHE_ALIAS', 'default')  # cache partagé entre processus (ex. Redis), sinon OTP en base
+OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', 5))  # essais par code (backend cache)
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv('PHONE_DEFAULT_COUNTRY_CODE', '228')  # Togo
+PHONE_NATIONAL_NUMBER_LENGTH = int(os.getenv('PHONE_NATIONAL_NUMBER_LENGTH', 8))
+PLATFORM_ACCOUNT_STRIPES = int(os.getenv('PLATFORM_ACCOUNT_STRIPES', 16))  # 0 = pas de sous-soldes
+PLATFORM_ACCOUNT_CACHE_TTL = int(os.getenv('PLATFORM_ACCOUNT_CACHE_TTL', 60))  # secondes, borne l'écart entre processus
+
+# Transaction Execution Settings
+TRANSACTION_ISOLATION_LEVEL = os.getenv('TRANSACTION_ISOLATION_LEVEL', '')  # '', 'repeatable read' ou 'serializable'
+TRANSACTION_MAX_ATTEMPTS = int(os.getenv('TRANSACTION_MAX_ATTEMPTS', 5))
+TRANSACTION_RETRY_BASE_DELAY = float(os.getenv('TRANSACTION_RETRY_BASE_DELAY', 0.02))  # secondes
+TRANSACTION_RETRY_MAX_DELAY = float(os.getenv('TRANSACTION_RETRY_MAX_DELAY', 0.5))  # secondes
+RECIPIENT_CACHE_SIZE = int(os.getenv('RECIPIENT_CACHE_SIZE', 10000))  # entrées par processus
+RECIPIENT_CACHE_TTL = int(os.getenv('RECIPIENT_CACHE_TTL', 30))  # secondes, borne l'écart entre processus
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', 10000))  # entrées par processus
+IDEMPOTENCY_KEY_RETENTION_DAYS = int(os.getenv('IDEMPOTENCY_KEY_RETENTION_DAYS', 7))
+
+# Transaction History Settings
+TRANSACTION_HISTORY_PAGE_SIZE = int(os.getenv('TRANSACTION_HISTORY_PAGE_SIZE', 20))
+TRANSACTION_RECENT_WINDOW_DAYS = int(os.getenv('TRANSACTION_RECENT_WINDOW_DAYS', 31))  # fenêtre lue en premier (partitions récentes)
+STATEMENT_EXPORT_CHUNK_SIZE = int(os.getenv('STATEMENT_EXPORT_CHUNK_SIZE', 2000))  # lignes lues par aller-retour du curseur
+
+# Regulator Export Settings
+REGULATOR_EXPORT_CHUNK_SIZE = int(os.getenv('REGULATOR_EXPORT_CHUNK_SIZE', 5000))
+REGULATOR_EXPORT_WORKERS = int(os.getenv('REGULATOR_EXPORT_WORKERS', 4))  # processus, un jour par tâche
+REGULATOR_EXPORT_DIR = os.getenv('REGULATOR_EXPORT_DIR', str(BASE_DIR / 'exports'))
+
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Admin Dashboard Settings
+ADMIN_DASHBOARD_STATS_SOURCE = os.getenv('ADMIN_DASHBOARD_STATS_SOURCE', 'live')  # 'live' ou 'rollup'
+MANAGE_USERS_PAGE_SIZE = int(os.getenv('MANAGE_USERS_PAGE_SIZE', 50))
+ADMIN_REVENUE_DAYS = int(os.getenv('ADMIN_REVENUE_DAYS', 30))  # période par défaut de la vue des revenus
+ADMIN_DASHBOARD_STATS_TTL = int(os.getenv('ADMIN_DASHBOARD_STATS_TTL', 30))  # secondes de fraîcheur
+ADMIN_DASHBOARD_STATS_STALE_FACTOR = 10  # la valeur périmée reste servie jusqu'à TTL x 10
+ADMIN_DASHBOARD_STATS_LOCK_TIMEOUT = int(os.getenv('ADMIN_DASHBOARD_STATS_LOCK_TIMEOUT', 60))  # secondes
+
+# Account Suspension Settings
+SUSPENSION_CACHE_ALIAS = os.getenv('SUSPENSION_CACHE_ALIAS', 'default')  # cache partagé (ex. Redis), ignoré s'il est local au processus
+SUSPENSION_CACHE_TTL = int(os.getenv('SUSPENSION_CACHE_TTL', 300))  # secondes, filet si une invalidation est manquée
+
+# Transaction Partitioning Settings
+TRANSACTION_PARTITION_MONTHS_AHEAD = int(os.getenv('TRANSACTION_PARTITION_MONTHS_AHEAD', 3))  # partitions créées à l'avance
+
+# Transaction Archive Settings
+TRANSACTION_ARCHIVE_HORIZON_DAYS = int(os.getenv('TRANSACTION_ARCHIVE_HORIZON_DAYS', 730))  # les mois plus anciens sont archivés
+TRANSACTION_ARCHIVE_DIR = os.getenv('TRANSACTION_ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+TRANSACTION_ARCHIVE_BLOCK_SIZE = int(os.getenv('TRANSACTION_ARCHIVE_BLOCK_SIZE', 1000))  # transactions par bloc compressé
+
+# Daily Stats Settings
+DAILY_STATS_LATE_DAYS = int(os.getenv('DAILY_STATS_LATE_DAYS', 2))  # jours recalculés avant le dernier agrégat
+
+# Ledger Settings
+LEDGER_CHECKPOINT_LAG = int(os.getenv('LEDGER_CHECKPOINT_LAG', 60))  # secondes, marge pour les transactions en cours
+
+# Account Stats Settings
+ACCOUNT_STATS_CONSOLIDATION_LAG = int(os.getenv('ACCOUNT_STATS_CONSOLIDATION_LAG', 60))  # secondes, marge pour les transactions en cours
+
+# Disbursement Import Settings
+DISBURSEMENT_CHUNK_SIZE = int(os.getenv('DISBURSEMENT_CHUNK_SIZE', 500))
+DISBURSEMENT_LEASE_SECONDS = int(os.getenv('DISBURSEMENT_LEASE_SECONDS', 600))  # bail d'un lot en cours, renouvelé à chaque bloc
 
 # Logging Configuration
 LOGGING = {
@@ -3,11 +3,20 @@ Configuration globale pour pytest
 """
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from core.models import VirtualAccount
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Le cache n'est pas annulé avec la base : chaque test part d'un cache vide"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def user_factory(db):
     """Factory pour créer des utilisateurs de test"""
@@ -3,16 +3,41 @@ Configuration de l'interface d'administration pour l'app core
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, VirtualAccount
+from django.contrib.auth.forms import AdminUserCreationForm, UserChangeForm
+from django.core.exceptions import ValidationError
+from .models import User, VirtualAccount, AccountStripe, AccountStatusChange
+from .phone import normalize_phone_number
+from .suspension import suspend_accounts, reactivate_accounts
+
+
+class PhoneNumberAdminFormMixin:
+    """Refuse un numéro qui, normalisé, désigne déjà un autre compte"""
+    
+    def clean_phone_number(self):
+        phone_number = self.cleaned_data.get('phone_number')
+        phone_e164 = normalize_phone_number(phone_number)
+        if phone_e164 and User.objects.filter(phone_e164=phone_e164).exclude(pk=self.instance.pk).exists():
+            raise ValidationError('Ce numéro de téléphone est déjà utilisé par un autre compte.')
+        return phone_number
+
+
+class UserAdminChangeForm(PhoneNumberAdminFormMixin, UserChangeForm):
+    pass
+
+
+class UserAdminCreationForm(PhoneNumberAdminFormMixin, AdminUserCreationForm):
+    pass
 
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     """Configuration de l'admin pour le modèle User"""
     
+    form = UserAdminChangeForm
+    add_form = UserAdminCreationForm
     list_display = ['username', 'email', 'phone_number', 'is_active', 'is_staff', 'created_at']
     list_filter = ['is_active', 'is_staff', 'is_superuser', 'created_at']
-    search_fields = ['username', 'email', 'phone_number', 'first_name', 'last_name']
+    search_fields = ['username', 'email', 'first_name', 'last_name']
     ordering = ['-created_at']
     
     fieldsets = BaseUserAdmin.fieldsets + (
@@ -28,21 +53,42 @@ class UserAdmin(BaseUserAdmin):
             'fields': ('phone_number', 'email')
         }),
     )
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Recherche exacte et indexée sur le numéro canonique plutôt qu'un ILIKE
+        # (unique : au plus un compte par numéro)
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        phone_e164 = normalize_phone_number(search_term)
+        if phone_e164:
+            results |= queryset.filter(phone_e164=phone_e164)
+        return results, may_have_duplicates
+
+
+class AccountStripeInline(admin.TabularInline):
+    """Sous-soldes affichés en lecture seule sur la fiche du compte"""
+    model = AccountStripe
+    fields = ['index', 'balance', 'updated_at']
+    readonly_fields = ['index', 'balance', 'updated_at']
+    extra = 0
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(VirtualAccount)
 class VirtualAccountAdmin(admin.ModelAdmin):
     """Configuration de l'admin pour le modèle VirtualAccount"""
     
-    list_display = ['user', 'balance', 'is_suspended', 'is_platform_account', 'created_at']
+    list_display = ['user', 'balance', 'logical_balance_display', 'is_suspended', 'is_platform_account', 'created_at']
     list_filter = ['is_suspended', 'is_platform_account', 'created_at']
-    search_fields = ['user__username', 'user__email', 'user__phone_number']
+    search_fields = ['user__username', 'user__email']
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
     
     fieldsets = (
         ('Informations du compte', {
-            'fields': ('user', 'balance', 'is_platform_account')
+            'fields': ('user', 'balance', 'is_platform_account', 'stripe_count')
         }),
         ('Statut', {
             'fields': ('is_suspended',)
@@ -52,8 +98,63 @@ class VirtualAccountAdmin(admin.ModelAdmin):
         }),
     )
     
+    inlines = [AccountStripeInline]
+    actions = ['suspend_selected', 'reactivate_selected']
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Recherche exacte et indexée sur le numéro canonique plutôt qu'un ILIKE
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        phone_e164 = normalize_phone_number(search_term)
+        if phone_e164:
+            results |= queryset.filter(user__phone_e164=phone_e164)
+        return results, may_have_duplicates
+    
+    def logical_balance_display(self, obj):
+        """Affiche le solde incluant les sous-soldes"""
+        return obj.logical_balance
+    
+    logical_balance_display.short_description = 'Solde total'
+    
+    @admin.action(description='Suspendre les comptes sélectionnés')
+    def suspend_selected(self, request, queryset):
+        """Suspend en une fois et ferme les sessions des utilisateurs"""
+        suspended, revoked = suspend_accounts(
+            queryset.values_list('user_id', flat=True), performed_by=request.user
+        )
+        self.message_user(request, f'{len(suspended)} compte(s) suspendu(s), {revoked} session(s) fermée(s).')
+    
+    @admin.action(description='Réactiver les comptes sélectionnés')
+    def reactivate_selected(self, request, queryset):
+        """Réactive en une fois les comptes suspendus"""
+        reactivated = reactivate_accounts(queryset.values_list('user_id', flat=True), performed_by=request.user)
+        self.message_user(request, f'{len(reactivated)} compte(s) réactivé(s).')
+    
+    def save_model(self, request, obj, form, change):
+        """Crée les sous-soldes lorsque le compte est découpé"""
+        super().save_model(request, obj, form, change)
+        if obj.stripe_count:
+            obj.ensure_stripes()
+    
     def has_delete_permission(self, request, obj=None):
         """Empêche la suppression du compte plateforme"""
         if obj and obj.is_platform_account:
             return False
-        return super().has_delete_permission(request, obj)
\ No newline at end of file
+        return super().has_delete_permission(request, obj)
+
+
+@admin.register(AccountStatusChange)
+class AccountStatusChangeAdmin(admin.ModelAdmin):
+    """Journal des suspensions, en lecture seule"""
+    
+    list_display = ['account', 'action', 'performed_by', 'reason', 'created_at']
+    list_filter = ['action', 'created_at']
+    search_fields = ['account__user__username', 'reason']
+    list_select_related = ['account__user', 'performed_by']
+    raw_id_fields = ['account', 'performed_by']
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,26 @@
+"""
+Backend d'authentification de l'application
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+User = get_user_model()
+
+
+class AccountModelBackend(ModelBackend):
+    """
+    ModelBackend qui charge l'utilisateur de la session avec son compte
+    virtuel, en une seule requête (jointure).
+    
+    AuthenticationMiddleware garde l'utilisateur pour toute la requête :
+    le middleware de suspension, les vues et les templates
+    ({{ user.virtual_account.balance }}) lisent ensuite le compte sans
+    nouvelle requête.
+    """
+    
+    def get_user(self, user_id):
+        try:
+            user = User._default_manager.select_related('virtual_account').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
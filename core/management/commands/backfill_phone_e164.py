@@ -0,0 +1,36 @@
+"""
+Commande pour renseigner la forme E.164 des numéros de téléphone existants
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from core.phone import backfill_phone_e164, PhoneNumberCollision
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Renseigne la colonne phone_e164 des utilisateurs existants, par blocs'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Nombre d\'utilisateurs traités par bloc'
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Normalisation des numéros de téléphone...'))
+        
+        def progress(last_pk, updated):
+            self.stdout.write(f'  → Jusqu\'à l\'utilisateur #{last_pk}: {updated} mis à jour')
+        
+        try:
+            updated = backfill_phone_e164(User, chunk_size=options['chunk_size'], progress=progress)
+        except PhoneNumberCollision as e:
+            raise CommandError(str(e))
+        
+        invalid = User.objects.filter(phone_e164__isnull=True).count()
+        if invalid:
+            self.stdout.write(self.style.WARNING(f'→ {invalid} numéro(s) non normalisable(s)'))
+        self.stdout.write(self.style.SUCCESS(f'✓ {updated} utilisateur(s) mis à jour'))
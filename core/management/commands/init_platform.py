@@ -3,6 +3,7 @@ Commande pour initialiser la plateforme avec le compte administrateur
 """
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.conf import settings
 from core.models import VirtualAccount
 
 User = get_user_model()
@@ -52,6 +53,15 @@ class Command(BaseCommand):
             else:
                 self.stdout.write(self.style.WARNING('→ Compte virtuel de la plateforme existe déjà'))
         
+        # Répartir les commissions sur plusieurs sous-soldes
+        if platform_account.stripe_count != settings.PLATFORM_ACCOUNT_STRIPES:
+            platform_account.stripe_count = settings.PLATFORM_ACCOUNT_STRIPES
+            platform_account.save()
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ Compte plateforme réparti sur {platform_account.stripe_count} sous-soldes'
+            ))
+        platform_account.ensure_stripes()
+        
         # Créer un superuser admin si nécessaire
         admin_exists = User.objects.filter(is_superuser=True).exclude(username='platform').exists()
         
@@ -75,5 +85,5 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('PLATEFORME INITIALISÉE AVEC SUCCÈS'))
         self.stdout.write(self.style.SUCCESS('='*50))
         self.stdout.write(f'\nCompte plateforme: {platform_account}')
-        self.stdout.write(f'Solde: {platform_account.balance} FCFA')
+        self.stdout.write(f'Solde: {platform_account.logical_balance} FCFA')
         self.stdout.write(self.style.SUCCESS('\nVous pouvez maintenant utiliser la plateforme!'))
\ No newline at end of file
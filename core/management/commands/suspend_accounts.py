@@ -0,0 +1,63 @@
+"""
+Commande pour suspendre (ou réactiver) des comptes en masse
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from core.phone import normalize_phone_number
+from core.suspension import batches, suspend_accounts, reactivate_accounts
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Suspend les comptes désignés par numéro de téléphone ou nom d\'utilisateur et ferme leurs sessions'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'identifiers',
+            nargs='*',
+            help='Numéros de téléphone ou noms d\'utilisateur'
+        )
+        parser.add_argument(
+            '--file',
+            help='Fichier contenant un numéro ou un nom d\'utilisateur par ligne'
+        )
+        parser.add_argument(
+            '--reason',
+            default='',
+            help='Motif enregistré dans le journal des suspensions'
+        )
+        parser.add_argument(
+            '--reactivate',
+            action='store_true',
+            help='Réactiver les comptes au lieu de les suspendre'
+        )
+    
+    def handle(self, *args, **options):
+        identifiers = list(options['identifiers'])
+        if options['file']:
+            with open(options['file']) as fileobj:
+                identifiers.extend(line.strip() for line in fileobj if line.strip())
+        if not identifiers:
+            raise CommandError('Aucun utilisateur indiqué')
+        
+        user_ids = set()
+        for batch in batches(identifiers):
+            phones = [phone for phone in map(normalize_phone_number, batch) if phone]
+            user_ids.update(
+                User.objects.filter(Q(phone_e164__in=phones) | Q(username__in=batch)).values_list('id', flat=True)
+            )
+        
+        missing = len(identifiers) - len(user_ids)
+        if missing > 0:
+            self.stdout.write(self.style.WARNING(f'→ {missing} identifiant(s) sans utilisateur correspondant'))
+        
+        if options['reactivate']:
+            reactivated = reactivate_accounts(user_ids, reason=options['reason'])
+            self.stdout.write(self.style.SUCCESS(f'✓ {len(reactivated)} compte(s) réactivé(s)'))
+        else:
+            suspended, revoked = suspend_accounts(user_ids, reason=options['reason'])
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {len(suspended)} compte(s) suspendu(s), {revoked} session(s) fermée(s)'
+            ))
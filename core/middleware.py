@@ -4,6 +4,7 @@ Middleware personnalisés
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.contrib.auth import logout
+from .suspension import is_suspended
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,37 +14,49 @@ class CheckSuspendedAccountMiddleware:
     """
     Middleware pour vérifier si un compte utilisateur est suspendu
     et le déconnecter automatiquement si c'est le cas
+    
+    L'état de suspension est lu sur le compte chargé avec l'utilisateur
+    (core.backends.AccountModelBackend), sinon dans le cache
+    (core.suspension.is_suspended) : aucune requête supplémentaire.
     """
     
+    # URLs qui ne nécessitent pas de vérification
+    EXCLUDED_PATHS = (
+        '/authentication/login/',
+        '/authentication/signup/',
+        '/authentication/verify-otp/',
+        '/authentication/logout/',
+        '/admin/',
+        '/static/',
+        '/media/',
+    )
+    
     def __init__(self, get_response):
         self.get_response = get_response
     
     def __call__(self, request):
-        # Exclure les URLs qui ne nécessitent pas de vérification
-        excluded_paths = [
-            '/authentication/login/',
-            '/authentication/signup/',
-            '/authentication/verify-otp/',
-            '/authentication/logout/',
-            '/admin/',
-            '/static/',
-            '/media/',
-        ]
+        user = request.user
         
-        # Vérifier si l'utilisateur est authentifié
-        if request.user.is_authenticated:
-            # Ne pas vérifier pour les superusers et le staff
-            if not request.user.is_superuser and not request.user.is_staff:
-                # Vérifier si l'utilisateur a un compte virtuel
-                if hasattr(request.user, 'virtual_account'):
-                    # Vérifier si le compte est suspendu
-                    if request.user.virtual_account.is_suspended:
-                        # Ne pas déconnecter sur les pages exclues
-                        if not any(request.path.startswith(path) for path in excluded_paths):
-                            logger.warning(f"Accès refusé pour compte suspendu: {request.user.username}")
-                            logout(request)
-                            messages.error(request, 'Votre compte a été suspendu. Veuillez contacter l\'administrateur.')
-                            return redirect('authentication:login')
+        # Ne pas vérifier pour les superusers, le staff et les pages exclues
+        if (
+            user.is_authenticated
+            and not user.is_superuser
+            and not user.is_staff
+            and not request.path.startswith(self.EXCLUDED_PATHS)
+            and self.account_suspended(user)
+        ):
+            logger.warning(f"Accès refusé pour compte suspendu: {user.username}")
+            logout(request)
+            messages.error(request, 'Votre compte a été suspendu. Veuillez contacter l\'administrateur.')
+            return redirect('authentication:login')
         
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+    
+    @staticmethod
+    def account_suspended(user):
+        """Le compte de l'utilisateur est-il suspendu ?"""
+        if user.__class__.virtual_account.is_cached(user):
+            account = getattr(user, 'virtual_account', None)
+            return account is not None and account.is_suspended
+        return is_suspended(user.pk)
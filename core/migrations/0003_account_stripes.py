@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:45
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_user_managers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='virtualaccount',
+            name='stripe_count',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Pour les comptes très sollicités (plateforme, gros marchands) : les crédits sont répartis sur N sous-soldes pour éviter un verrou unique. 0 = désactivé', verbose_name='Nombre de sous-soldes'),
+        ),
+        migrations.CreateModel(
+            name='AccountStripe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField(verbose_name='Numéro du sous-solde')),
+                ('balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Solde')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stripes', to='core.virtualaccount', verbose_name='Compte virtuel')),
+            ],
+            options={
+                'verbose_name': 'Sous-solde',
+                'verbose_name_plural': 'Sous-soldes',
+                'ordering': ['account', 'index'],
+                'constraints': [models.UniqueConstraint(fields=('account', 'index'), name='unique_account_stripe')],
+            },
+        ),
+    ]
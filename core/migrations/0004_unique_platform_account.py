@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_account_stripes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='virtualaccount',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_platform_account', True)), fields=('is_platform_account',), name='unique_platform_account'),
+        ),
+    ]
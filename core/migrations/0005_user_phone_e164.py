@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:49
+
+from django.db import migrations, models
+
+
+def backfill_phone_e164(apps, schema_editor):
+    from core.phone import backfill_phone_e164 as backfill
+    backfill(apps.get_model('core', 'User'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_unique_platform_account'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='phone_e164',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Forme canonique du numéro, utilisée pour les recherches exactes', max_length=16, null=True, verbose_name='Numéro E.164'),
+        ),
+        migrations.RunPython(backfill_phone_e164, migrations.RunPython.noop),
+    ]
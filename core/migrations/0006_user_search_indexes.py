@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:44
+
+from django.db import migrations, models
+
+# Index d'expression de la recherche des utilisateurs (voir dashboard.users) :
+# les lookups istartswith/icontains de Django portent sur UPPER(colonne::text)
+SEARCH_INDEXES = [
+    ('core_user_username_prefix', '(UPPER("username"::text) text_pattern_ops)', 'btree'),
+    ('core_user_email_prefix', '(UPPER("email"::text) text_pattern_ops)', 'btree'),
+    ('core_user_username_trgm', '(UPPER("username"::text) gin_trgm_ops)', 'gin'),
+    ('core_user_email_trgm', '(UPPER("email"::text) gin_trgm_ops)', 'gin'),
+    ('core_user_phone_trgm', '("phone_number" gin_trgm_ops)', 'gin'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression, method in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON core_user USING {method} {expression}'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    
+    # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+    atomic = False
+    
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0005_user_phone_e164'),
+    ]
+    
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-id'], name='user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='virtualaccount',
+            index=models.Index(condition=models.Q(('is_suspended', True)), fields=['user'], name='suspended_account_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
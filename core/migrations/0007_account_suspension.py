@@ -0,0 +1,46 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_key', models.CharField(max_length=40, unique=True, verbose_name='Clé de session')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de connexion')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Session utilisateur',
+                'verbose_name_plural': 'Sessions utilisateur',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('suspended', 'Suspension'), ('reactivated', 'Réactivation')], max_length=20, verbose_name='Action')),
+                ('reason', models.CharField(blank=True, max_length=255, verbose_name='Motif')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='core.virtualaccount', verbose_name='Compte virtuel')),
+                ('performed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Effectuée par')),
+            ],
+            options={
+                'verbose_name': 'Changement de statut',
+                'verbose_name_plural': 'Changements de statut',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['account', '-created_at'], name='status_change_account_idx')],
+            },
+        ),
+    ]
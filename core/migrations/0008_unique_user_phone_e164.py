@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:53
+
+from django.db import migrations, models
+
+
+def check_collisions(apps, schema_editor):
+    from core.phone import check_phone_e164_collisions
+    check_phone_e164_collisions(apps.get_model('core', 'User'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0007_account_suspension'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_collisions, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, help_text='Forme canonique du numéro, utilisée pour les recherches exactes', max_length=16, null=True, verbose_name='Numéro E.164'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(('phone_e164__isnull', False)), fields=('phone_e164',), name='unique_user_phone_e164'),
+        ),
+    ]
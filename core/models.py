@@ -5,6 +5,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import RegexValidator
 from decimal import Decimal
+from .phone import normalize_phone_number
 import logging
 
 logger = logging.getLogger(__name__)
@@ -87,6 +88,15 @@ class User(AbstractUser):
         verbose_name="Numéro de téléphone"
     )
     
+    phone_e164 = models.CharField(
+        max_length=16,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Numéro E.164",
+        help_text="Forme canonique du numéro, utilisée pour les recherches exactes"
+    )
+    
     is_active = models.BooleanField(
         default=False,
         verbose_name="Compte activé",
@@ -106,6 +116,18 @@ class User(AbstractUser):
         verbose_name = "Utilisateur"
         verbose_name_plural = "Utilisateurs"
         ordering = ['-created_at']
+        constraints = [
+            # Index unique partiel : un numéro ne désigne qu'un seul compte
+            models.UniqueConstraint(
+                fields=['phone_e164'],
+                condition=models.Q(phone_e164__isnull=False),
+                name='unique_user_phone_e164'
+            ),
+        ]
+        indexes = [
+            # Liste paginée par clé (created_at, id) de la gestion des utilisateurs
+            models.Index(fields=['-created_at', '-id'], name='user_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.username} ({self.phone_number})"
@@ -118,6 +140,12 @@ class User(AbstractUser):
         if self.is_superuser and not self.is_active:
             self.is_active = True
         
+        # Garder la forme canonique du numéro synchronisée
+        self.phone_e164 = normalize_phone_number(self.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone_number' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'phone_e164'}
+        
         super().save(*args, **kwargs)
         if is_new:
             logger.info(f"Nouvel utilisateur créé: {self.username} - {self.phone_number}")
@@ -155,6 +183,14 @@ class VirtualAccount(models.Model):
         help_text="Indique si c'est le compte de la plateforme"
     )
     
+    stripe_count = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Nombre de sous-soldes",
+        help_text="Pour les comptes très sollicités (plateforme, gros marchands) : "
+                  "les crédits sont répartis sur N sous-soldes pour éviter un verrou unique. "
+                  "0 = désactivé"
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
     
@@ -162,12 +198,41 @@ class VirtualAccount(models.Model):
         verbose_name = "Compte virtuel"
         verbose_name_plural = "Comptes virtuels"
         ordering = ['-created_at']
+        constraints = [
+            # Index unique partiel : garantit un seul compte plateforme
+            models.UniqueConstraint(
+                fields=['is_platform_account'],
+                condition=models.Q(is_platform_account=True),
+                name='unique_platform_account'
+            ),
+        ]
+        indexes = [
+            # Index partiel : les comptes suspendus sont peu nombreux
+            models.Index(fields=['user'], condition=models.Q(is_suspended=True), name='suspended_account_idx'),
+        ]
     
     def __str__(self):
         status = "SUSPENDU" if self.is_suspended else "ACTIF"
         platform_tag = " [PLATEFORME]" if self.is_platform_account else ""
         return f"Compte de {self.user.username} - {self.balance} FCFA ({status}){platform_tag}"
     
+    @property
+    def logical_balance(self):
+        """Solde réel du compte : solde principal + somme des sous-soldes"""
+        if not self.stripe_count:
+            return self.balance
+        stripes_total = self.stripes.aggregate(total=models.Sum('balance'))['total'] or Decimal('0.00')
+        return self.balance + stripes_total
+    
+    def ensure_stripes(self):
+        """Crée les sous-soldes manquants du compte"""
+        existing = set(self.stripes.values_list('index', flat=True))
+        AccountStripe.objects.bulk_create([
+            AccountStripe(account=self, index=index)
+            for index in range(self.stripe_count)
+            if index not in existing
+        ])
+    
     def can_perform_operations(self):
         """Vérifie si le compte peut effectuer des opérations"""
         return not self.is_suspended and self.user.is_active
@@ -194,4 +259,117 @@ class VirtualAccount(models.Model):
                     logger.warning(f"Suspension du compte: {self.user.username}")
                 else:
                     logger.info(f"Réactivation du compte: {self.user.username}")
-        super().save(*args, **kwargs)
\ No newline at end of file
+                # Import local pour éviter l'import circulaire
+                from .suspension import remember_suspension
+                remember_suspension([self.user_id], self.is_suspended)
+        super().save(*args, **kwargs)
+
+
+class AccountStripe(models.Model):
+    """
+    Sous-solde d'un compte virtuel très sollicité.
+    Les crédits concurrents sont répartis sur plusieurs lignes au lieu de
+    tous verrouiller la ligne du compte ; la commande consolidate_stripes
+    reverse périodiquement les sous-soldes dans le solde principal.
+    """
+    account = models.ForeignKey(
+        VirtualAccount,
+        on_delete=models.CASCADE,
+        related_name='stripes',
+        verbose_name="Compte virtuel"
+    )
+    
+    index = models.PositiveSmallIntegerField(verbose_name="Numéro du sous-solde")
+    
+    balance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Solde"
+    )
+    
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
+    
+    class Meta:
+        verbose_name = "Sous-solde"
+        verbose_name_plural = "Sous-soldes"
+        ordering = ['account', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'index'], name='unique_account_stripe'),
+        ]
+    
+    def __str__(self):
+        return f"Sous-solde {self.index} de {self.account.user.username} - {self.balance} FCFA"
+
+
+class UserSession(models.Model):
+    """
+    Sessions ouvertes d'un utilisateur.
+    Index utilisateur -> clé de session, alimenté à la connexion : il permet
+    de révoquer les sessions d'un compte suspendu sans parcourir la table
+    des sessions (dont les données sont encodées).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='sessions',
+        verbose_name="Utilisateur"
+    )
+    
+    session_key = models.CharField(max_length=40, unique=True, verbose_name="Clé de session")
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de connexion")
+    
+    class Meta:
+        verbose_name = "Session utilisateur"
+        verbose_name_plural = "Sessions utilisateur"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Session de {self.user.username} ({self.created_at:%d/%m/%Y %H:%M})"
+
+
+class AccountStatusChange(models.Model):
+    """
+    Journal des suspensions et réactivations de comptes
+    """
+    SUSPENDED = 'suspended'
+    REACTIVATED = 'reactivated'
+    
+    ACTION_CHOICES = [
+        (SUSPENDED, 'Suspension'),
+        (REACTIVATED, 'Réactivation'),
+    ]
+    
+    account = models.ForeignKey(
+        VirtualAccount,
+        on_delete=models.CASCADE,
+        related_name='status_changes',
+        verbose_name="Compte virtuel"
+    )
+    
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES, verbose_name="Action")
+    
+    performed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Effectuée par"
+    )
+    
+    reason = models.CharField(max_length=255, blank=True, verbose_name="Motif")
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date")
+    
+    class Meta:
+        verbose_name = "Changement de statut"
+        verbose_name_plural = "Changements de statut"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['account', '-created_at'], name='status_change_account_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_action_display()} du compte de {self.account.user.username}"
@@ -0,0 +1,187 @@
+"""
+Normalisation des numéros de téléphone au format E.164
+"""
+from django.conf import settings
+from django.db.models import Count
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+E164_REGEX = re.compile(r'^\+[1-9]\d{7,14}$')
+# Caractères admis dans un numéro saisi : "+" initial, chiffres et séparateurs usuels
+PHONE_INPUT_REGEX = re.compile(r'^\+?[\d\s().\-]+$')
+
+
+class PhoneNumberCollision(Exception):
+    """Plusieurs utilisateurs ont des numéros de même forme E.164"""
+    pass
+
+
+def normalize_phone_number(phone_number, default_country_code=None):
+    """
+    Convertit un numéro saisi librement en forme canonique E.164
+    
+    Exemples (indicatif par défaut 228) :
+        "+228 90 00 00 00" -> "+22890000000"
+        "0022890000000"    -> "+22890000000"
+        "90000000"         -> "+22890000000"
+    
+    Args:
+        phone_number: Le numéro tel que saisi
+        default_country_code: Indicatif pays des numéros nationaux
+            (par défaut settings.PHONE_DEFAULT_COUNTRY_CODE)
+    
+    Returns:
+        str or None: Le numéro E.164, ou None s'il n'est pas valide (y compris
+            si la saisie contient des lettres ou d'autres caractères)
+    """
+    if not phone_number:
+        return None
+    
+    country_code = default_country_code or settings.PHONE_DEFAULT_COUNTRY_CODE
+    raw = str(phone_number).strip()
+    if not PHONE_INPUT_REGEX.match(raw):
+        # "user12345" ou "bob123456@mail.com" ne sont pas des numéros
+        return None
+    digits = re.sub(r'\D', '', raw)
+    if not digits:
+        return None
+    
+    if raw.startswith('+'):
+        candidate = digits
+    elif digits.startswith('00'):
+        # Préfixe international
+        candidate = digits[2:]
+    elif digits.startswith(country_code) and len(digits) > settings.PHONE_NATIONAL_NUMBER_LENGTH:
+        # Indicatif saisi sans le "+"
+        candidate = digits
+    else:
+        # Numéro national, éventuellement précédé du préfixe de ligne 0
+        candidate = country_code + digits.lstrip('0')
+    
+    e164 = f"+{candidate}"
+    if not E164_REGEX.match(e164):
+        return None
+    return e164
+
+
+def backfill_phone_e164(user_model, chunk_size=1000, progress=None):
+    """
+    Renseigne la colonne phone_e164 des utilisateurs existants par blocs,
+    en parcourant la table par clé primaire
+    
+    Args:
+        user_model: Le modèle utilisateur (éventuellement historique, en migration)
+        chunk_size: Nombre d'utilisateurs par bloc
+        progress: Fonction appelée après chaque bloc avec (dernier id, nombre mis à jour)
+    
+    Returns:
+        int: Nombre d'utilisateurs mis à jour
+    
+    Raises:
+        PhoneNumberCollision: Si des utilisateurs partagent un même numéro
+            une fois normalisé (le bloc en cause n'est pas écrit)
+    """
+    last_pk = 0
+    total_updated = 0
+    
+    while True:
+        users = list(
+            user_model.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                'pk', 'username', 'phone_number', 'phone_e164'
+            )[:chunk_size]
+        )
+        if not users:
+            return total_updated
+        
+        changed = []
+        for user in users:
+            e164 = normalize_phone_number(user.phone_number)
+            if user.phone_e164 != e164:
+                user.phone_e164 = e164
+                changed.append(user)
+        
+        if changed:
+            collisions = chunk_collisions(user_model, changed)
+            if collisions:
+                raise_collisions(collisions)
+            user_model.objects.bulk_update(changed, ['phone_e164'])
+        total_updated += len(changed)
+        last_pk = users[-1].pk
+        
+        if progress is not None:
+            progress(last_pk, total_updated)
+
+
+def chunk_collisions(user_model, users):
+    """
+    Numéros recalculés d'un bloc déjà pris, dans le bloc ou en base
+    
+    Returns:
+        dict: {numéro E.164: [(id, username, numéro saisi), ...]}
+    """
+    holders = {}
+    for user in users:
+        if user.phone_e164:
+            holders.setdefault(user.phone_e164, []).append((user.pk, user.username, user.phone_number))
+    
+    existing = user_model.objects.filter(phone_e164__in=list(holders)).exclude(
+        pk__in=[user.pk for user in users]
+    ).order_by('pk').values_list('phone_e164', 'pk', 'username', 'phone_number')
+    for phone_e164, pk, username, phone_number in existing:
+        holders[phone_e164].insert(0, (pk, username, phone_number))
+    
+    return {phone_e164: found for phone_e164, found in holders.items() if len(found) > 1}
+
+
+def phone_e164_collisions(user_model, limit=50):
+    """
+    Numéros E.164 partagés par plusieurs utilisateurs
+    
+    Args:
+        user_model: Le modèle utilisateur (éventuellement historique, en migration)
+        limit: Nombre maximal de numéros rapportés
+    
+    Returns:
+        dict: {numéro E.164: [(id, username, numéro saisi), ...]}
+    """
+    duplicated = list(
+        user_model.objects.filter(phone_e164__isnull=False).values('phone_e164').annotate(
+            users=Count('pk')
+        ).filter(users__gt=1).order_by('phone_e164').values_list('phone_e164', flat=True)[:limit]
+    )
+    
+    collisions = {}
+    users = user_model.objects.filter(phone_e164__in=duplicated).order_by('phone_e164', 'pk').values_list(
+        'phone_e164', 'pk', 'username', 'phone_number'
+    )
+    for phone_e164, pk, username, phone_number in users:
+        collisions.setdefault(phone_e164, []).append((pk, username, phone_number))
+    return collisions
+
+
+def check_phone_e164_collisions(user_model):
+    """
+    Vérifie qu'aucun numéro E.164 n'est partagé par plusieurs utilisateurs
+    
+    Raises:
+        PhoneNumberCollision: Avec la liste des comptes concernés, à corriger
+            avant de relancer
+    """
+    collisions = phone_e164_collisions(user_model)
+    if collisions:
+        raise_collisions(collisions)
+
+
+def raise_collisions(collisions):
+    """Journalise et lève PhoneNumberCollision avec la liste des comptes concernés"""
+    report = '\n'.join(
+        f"  {phone_e164}: " + ', '.join(f"{username} (#{pk}, saisi '{phone_number}')" for pk, username, phone_number in users)
+        for phone_e164, users in collisions.items()
+    )
+    logger.error(f"{len(collisions)} numéro(s) E.164 partagé(s) par plusieurs utilisateurs")
+    raise PhoneNumberCollision(
+        f"{len(collisions)} numéro(s) partagé(s) par plusieurs utilisateurs une fois normalisé(s), "
+        f"à corriger avant de continuer :\n{report}"
+    )
@@ -1,9 +1,11 @@
 """
 Signals pour la création automatique des comptes virtuels
+et l'index des sessions ouvertes
 """
+from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import User, VirtualAccount
+from .models import User, VirtualAccount, UserSession
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,4 +28,23 @@ def create_virtual_account(sender, instance, created, **kwargs):
             VirtualAccount.objects.create(user=instance)
             logger.info(f"Compte virtuel créé pour l'utilisateur: {instance.username}")
         except Exception as e:
-            logger.error(f"Erreur lors de la création du compte virtuel pour {instance.username}: {str(e)}")
\ No newline at end of file
+            logger.error(f"Erreur lors de la création du compte virtuel pour {instance.username}: {str(e)}")
+
+
+@receiver(user_logged_in)
+def record_session(sender, request, user, **kwargs):
+    """
+    Enregistre la session ouverte pour pouvoir la révoquer
+    (ex. à la suspension du compte)
+    """
+    session_key = getattr(request, 'session', None) and request.session.session_key
+    if session_key:
+        UserSession.objects.get_or_create(session_key=session_key, defaults={'user': user})
+
+
+@receiver(user_logged_out)
+def forget_session(sender, request, user, **kwargs):
+    """Retire la session fermée de l'index"""
+    session_key = getattr(request, 'session', None) and request.session.session_key
+    if session_key:
+        UserSession.objects.filter(session_key=session_key).delete()
@@ -0,0 +1,192 @@
+"""
+Suspension et réactivation de comptes en masse
+
+Les comptes sont modifiés par un UPDATE ensembliste par lot, le journal
+(AccountStatusChange) est écrit par bulk_create, et les sessions des
+utilisateurs suspendus sont supprimées tout de suite grâce à l'index
+UserSession : ils sont déconnectés sans attendre leur prochaine requête.
+
+L'état de suspension lu par CheckSuspendedAccountMiddleware est servi par
+une entrée de cache par utilisateur, réécrite à chaque changement de statut
+une fois la transaction validée. Ce cache doit être partagé entre les
+processus (SUSPENSION_CACHE_ALIAS) : avec un cache local (LocMemCache),
+les autres processus ne verraient pas la suspension avant l'expiration de
+leur entrée, l'état est donc toujours relu en base.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from importlib import import_module
+from .models import VirtualAccount, UserSession, AccountStatusChange
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Taille des lots : borne la liste IN et la durée des verrous
+BATCH_SIZE = 1000
+
+# Envoyé après l'UPDATE ensembliste (qui n'émet pas post_save), avec
+# account_ids et user_ids : les caches des autres applications s'y abonnent
+accounts_status_changed = Signal()
+
+CACHE_KEY = 'core:suspended:{}'
+# À incrémenter si le contenu de l'entrée change
+CACHE_VERSION = 1
+
+
+def batches(items, size=BATCH_SIZE):
+    """Découpe une liste en lots"""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def suspension_cache():
+    """
+    Cache de l'état de suspension, ou None s'il est local au processus
+    """
+    cache = caches[settings.SUSPENSION_CACHE_ALIAS]
+    return None if isinstance(cache, LocMemCache) else cache
+
+
+def is_suspended(user_id):
+    """
+    Le compte de l'utilisateur est-il suspendu ? (servi depuis le cache
+    partagé s'il y en a un, sinon lu en base)
+    
+    Un utilisateur sans compte virtuel est considéré comme non suspendu.
+    """
+    cache = suspension_cache()
+    key = CACHE_KEY.format(user_id)
+    suspended = cache.get(key, version=CACHE_VERSION) if cache else None
+    if suspended is None:
+        suspended = bool(
+            VirtualAccount.objects.filter(user_id=user_id).values_list('is_suspended', flat=True).first()
+        )
+        if cache:
+            cache.set(key, suspended, settings.SUSPENSION_CACHE_TTL, version=CACHE_VERSION)
+    return suspended
+
+
+def remember_suspension(user_ids, suspended):
+    """
+    Met à jour l'état en cache des utilisateurs après validation de la transaction
+    """
+    cache = suspension_cache()
+    entries = {CACHE_KEY.format(user_id): suspended for user_id in user_ids}
+    if cache and entries:
+        transaction.on_commit(
+            lambda: cache.set_many(entries, settings.SUSPENSION_CACHE_TTL, version=CACHE_VERSION)
+        )
+
+
+def revoke_sessions(user_ids):
+    """
+    Supprime les sessions ouvertes des utilisateurs
+    
+    Returns:
+        int: Nombre de sessions révoquées
+    """
+    engine = import_module(settings.SESSION_ENGINE)
+    db_engine = import_module('django.contrib.sessions.backends.db')
+    revoked = 0
+    
+    for batch in batches(user_ids):
+        sessions = UserSession.objects.filter(user_id__in=batch)
+        keys = list(sessions.values_list('session_key', flat=True))
+        if not keys:
+            continue
+        
+        if engine.SessionStore is db_engine.SessionStore:
+            # Sessions en base : une seule suppression par lot
+            engine.SessionStore.get_model_class().objects.filter(session_key__in=keys).delete()
+        else:
+            # Cache ou cache + base : chaque session doit être retirée du cache
+            store = engine.SessionStore()
+            for key in keys:
+                store.delete(key)
+        
+        sessions.delete()
+        revoked += len(keys)
+    
+    return revoked
+
+
+def _change_status(user_ids, suspend, performed_by=None, reason=''):
+    """
+    Applique un changement de statut aux comptes des utilisateurs
+    
+    Returns:
+        list: Ids des utilisateurs dont le compte a changé de statut
+    """
+    action = AccountStatusChange.SUSPENDED if suspend else AccountStatusChange.REACTIVATED
+    changed = []
+    
+    for batch in batches(user_ids):
+        with transaction.atomic():
+            accounts = VirtualAccount.objects.select_for_update(of=('self',)).filter(
+                user_id__in=batch,
+                user__is_staff=False,
+                is_platform_account=False,
+                is_suspended=not suspend,
+            )
+            rows = list(accounts.values_list('id', 'user_id'))
+            if not rows:
+                continue
+            
+            VirtualAccount.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+                is_suspended=suspend, updated_at=timezone.now()
+            )
+            AccountStatusChange.objects.bulk_create([
+                AccountStatusChange(account_id=pk, action=action, performed_by=performed_by, reason=reason)
+                for pk, _ in rows
+            ])
+            remember_suspension([user_id for _, user_id in rows], suspend)
+            accounts_status_changed.send(
+                sender=VirtualAccount,
+                account_ids=[pk for pk, _ in rows],
+                user_ids=[user_id for _, user_id in rows],
+            )
+        changed.extend(user_id for _, user_id in rows)
+    
+    return changed
+
+
+def suspend_accounts(user_ids, performed_by=None, reason=''):
+    """
+    Suspend les comptes des utilisateurs et révoque leurs sessions
+    
+    Les comptes du staff, le compte plateforme et les comptes déjà suspendus
+    sont ignorés.
+    
+    Args:
+        user_ids: Ids des utilisateurs
+        performed_by: Administrateur à l'origine de la suspension
+        reason: Motif enregistré dans le journal
+    
+    Returns:
+        tuple: (ids des utilisateurs suspendus, nombre de sessions révoquées)
+    """
+    suspended = _change_status(user_ids, True, performed_by, reason)
+    revoked = revoke_sessions(suspended)
+    
+    by = f" par {performed_by.username}" if performed_by else ""
+    logger.warning(f"{len(suspended)} compte(s) suspendu(s){by}, {revoked} session(s) révoquée(s)")
+    return suspended, revoked
+
+
+def reactivate_accounts(user_ids, performed_by=None, reason=''):
+    """
+    Réactive les comptes suspendus des utilisateurs
+    
+    Returns:
+        list: Ids des utilisateurs réactivés
+    """
+    reactivated = _change_status(user_ids, False, performed_by, reason)
+    
+    by = f" par {performed_by.username}" if performed_by else ""
+    logger.info(f"{len(reactivated)} compte(s) réactivé(s){by}")
+    return reactivated
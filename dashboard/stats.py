@@ -0,0 +1,141 @@
+"""
+Statistiques du dashboard administrateur
+
+Les compteurs sont calculés en une requête d'agrégation conditionnelle par
+table, puis mis en cache. À l'expiration, un seul processus recalcule
+pendant que les autres continuent de servir la valeur précédente : plusieurs
+administrateurs qui rafraîchissent le dashboard ne déclenchent qu'un seul
+parcours des tables.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Sum, Q, Exists, OuterRef
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from core.models import VirtualAccount
+from transactions.models import Transaction, TransactionDailyStats, ArchiveSegment
+from transactions.rollups import get_totals
+
+User = get_user_model()
+
+CACHE_KEY = 'dashboard:admin_stats'
+LOCK_KEY = 'dashboard:admin_stats:lock'
+
+# Types comptés par le dashboard
+STATS_TYPES = [
+    Transaction.DEPOSIT,
+    Transaction.TRANSFER,
+    Transaction.WITHDRAWAL,
+    Transaction.FEE,
+]
+
+
+def compute_account_counts():
+    """Comptes actifs et suspendus (une requête)"""
+    return VirtualAccount.objects.filter(is_platform_account=False).aggregate(
+        active_accounts=Count('pk', filter=Q(is_suspended=False)),
+        suspended_accounts=Count('pk', filter=Q(is_suspended=True)),
+    )
+
+
+def compute_live_transaction_stats():
+    """
+    Compteurs des transactions complétées, par type (une requête sur
+    Transaction)
+    
+    Les mois archivés ne sont plus dans la table : leur contribution est lue
+    dans les agrégats quotidiens (une requête), toujours à jour pour ces
+    mois puisque l'archivage ne dépasse pas le filigrane.
+    """
+    aggregates = {}
+    for transaction_type in STATS_TYPES:
+        aggregates[f'{transaction_type}_count'] = Count('pk', filter=Q(transaction_type=transaction_type))
+        aggregates[f'{transaction_type}_amount'] = Sum('amount', filter=Q(transaction_type=transaction_type))
+    by_type = Transaction.objects.filter(status=Transaction.COMPLETED).aggregate(**aggregates)
+    
+    archived = TransactionDailyStats.objects.alias(month=TruncMonth('day')).filter(
+        Exists(ArchiveSegment.objects.filter(month=OuterRef('month'))),
+        status=Transaction.COMPLETED, transaction_type__in=STATS_TYPES,
+    ).values('transaction_type').annotate(count=Sum('count'), amount=Sum('amount')).order_by()
+    for row in archived:
+        transaction_type = row['transaction_type']
+        by_type[f'{transaction_type}_count'] = (by_type[f'{transaction_type}_count'] or 0) + row['count']
+        by_type[f'{transaction_type}_amount'] = (by_type[f'{transaction_type}_amount'] or 0) + row['amount']
+    return by_type
+
+
+def compute_rollup_transaction_stats():
+    """
+    Mêmes compteurs, lus dans les agrégats quotidiens (complétés par les
+    transactions postérieures au dernier jour agrégé)
+    """
+    by_type = {}
+    for transaction_type, totals in get_totals(STATS_TYPES).items():
+        by_type[f'{transaction_type}_count'] = totals['count']
+        by_type[f'{transaction_type}_amount'] = totals['amount']
+    return by_type
+
+
+def compute_stats():
+    """
+    Calcule les statistiques du dashboard
+    
+    La source des compteurs de transactions est choisie par
+    settings.ADMIN_DASHBOARD_STATS_SOURCE : 'live' (table Transaction) ou
+    'rollup' (agrégats quotidiens).
+    """
+    if settings.ADMIN_DASHBOARD_STATS_SOURCE == 'rollup':
+        by_type = compute_rollup_transaction_stats()
+    else:
+        by_type = compute_live_transaction_stats()
+    
+    counts = {t: by_type[f'{t}_count'] or 0 for t in STATS_TYPES}
+    amounts = {t: by_type[f'{t}_amount'] or 0 for t in STATS_TYPES}
+    
+    return {
+        'total_users': User.objects.filter(is_staff=False).count(),
+        **compute_account_counts(),
+        'total_transactions': sum(counts.values()),
+        'total_volume': sum(amount for t, amount in amounts.items() if t != Transaction.FEE),
+        'total_fees': amounts[Transaction.FEE],
+        'transactions_by_type': [
+            {'transaction_type': t, 'count': count} for t, count in counts.items() if count
+        ],
+    }
+
+
+def get_admin_stats():
+    """
+    Statistiques du dashboard, servies depuis le cache
+    
+    La valeur est conservée au-delà de sa durée de fraîcheur
+    (ADMIN_DASHBOARD_STATS_TTL) ; une fois périmée, le premier processus qui
+    obtient le verrou la recalcule et les autres servent la valeur périmée.
+    """
+    cached = cache.get(CACHE_KEY)
+    now = timezone.now().timestamp()
+    
+    if cached is not None:
+        stats, expires_at = cached
+        if now < expires_at or not cache.add(LOCK_KEY, True, settings.ADMIN_DASHBOARD_STATS_LOCK_TIMEOUT):
+            return stats
+    elif not cache.add(LOCK_KEY, True, settings.ADMIN_DASHBOARD_STATS_LOCK_TIMEOUT):
+        # Premier calcul déjà en cours ailleurs, sans valeur à servir : calculer quand même
+        return compute_stats()
+    
+    try:
+        stats = compute_stats()
+        cache.set(
+            CACHE_KEY,
+            (stats, now + settings.ADMIN_DASHBOARD_STATS_TTL),
+            settings.ADMIN_DASHBOARD_STATS_TTL * settings.ADMIN_DASHBOARD_STATS_STALE_FACTOR
+        )
+        return stats
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def invalidate_admin_stats():
+    """Force le recalcul au prochain affichage"""
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,94 @@
+"""
+Recherche et pagination des utilisateurs pour la gestion des comptes
+
+La liste est paginée par clé (created_at, id) comme l'historique des
+transactions : chaque page lit au plus page_size + 1 lignes par l'index sur
+created_at, quel que soit le nombre d'utilisateurs. La recherche s'appuie
+sur des index d'expression sous PostgreSQL (migration core 0006) : préfixe
+(text_pattern_ops) pour les saisies courtes, trigrammes (pg_trgm) au-delà,
+correspondance exacte sur le numéro E.164 en plus pour une saisie en forme
+de numéro complet.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+from core.phone import normalize_phone_number
+from transactions.history import paginate
+
+User = get_user_model()
+
+ACTIVE = 'active'
+SUSPENDED = 'suspended'
+
+# En dessous de cette longueur, les trigrammes ne filtrent rien : recherche par préfixe
+TRIGRAM_MIN_LENGTH = 3
+
+USER_FIELDS = (
+    'id', 'username', 'email', 'phone_number', 'date_joined', 'created_at',
+    'virtual_account__id', 'virtual_account__balance', 'virtual_account__is_suspended',
+)
+
+
+def search_filter(query):
+    """
+    Condition de recherche sur le nom d'utilisateur, l'email et le téléphone
+    
+    Returns:
+        Q: Condition à appliquer aux utilisateurs
+    """
+    query = query.strip()
+    
+    if len(query) < TRIGRAM_MIN_LENGTH:
+        condition = Q(username__istartswith=query) | Q(email__istartswith=query)
+    else:
+        condition = Q(username__icontains=query) | Q(email__icontains=query) | Q(phone_number__contains=query)
+    
+    # Saisie en forme de numéro complet : correspondance exacte sur le numéro
+    # canonique, en plus (et non à la place) du nom et de l'email
+    phone = normalize_phone_number(query) if len(query) >= 8 else None
+    if phone is not None:
+        condition |= Q(phone_e164=phone)
+    return condition
+
+
+def search_users(query=None, status=None, cursor=None, page_size=None):
+    """
+    Une page d'utilisateurs (hors staff), du plus récent au plus ancien
+    
+    Args:
+        query: Texte recherché (nom d'utilisateur, email ou téléphone)
+        status: ACTIVE, SUSPENDED ou None pour tous
+        cursor: Curseur renvoyé par la page précédente
+        page_size: Utilisateurs par page (par défaut settings.MANAGE_USERS_PAGE_SIZE)
+    
+    Returns:
+        tuple: (utilisateurs: list, next_cursor: str or None)
+    """
+    page_size = page_size or settings.MANAGE_USERS_PAGE_SIZE
+    
+    users = User.objects.filter(is_staff=False)
+    if query and query.strip():
+        users = users.filter(search_filter(query))
+    if status == ACTIVE:
+        users = users.filter(virtual_account__is_suspended=False)
+    elif status == SUSPENDED:
+        users = users.filter(virtual_account__is_suspended=True)
+    
+    users = users.select_related('virtual_account').only(*USER_FIELDS).order_by('-created_at', '-id')
+    return paginate(users, cursor, page_size)
+
+
+def estimated_user_count():
+    """
+    Nombre approximatif d'utilisateurs, lu dans les statistiques du planificateur
+    sous PostgreSQL (sans parcourir la table) ; compte exact ailleurs
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [User._meta.db_table])
+            row = cursor.fetchone()
+        # -1 tant que la table n'a jamais été analysée
+        if row and row[0] >= 0:
+            return row[0]
+    return User.objects.filter(is_staff=False).count()
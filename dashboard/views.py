@@ -5,10 +5,20 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.views import View
+from django.http import StreamingHttpResponse
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from core.models import VirtualAccount
+from django.utils import timezone
 from transactions.models import Transaction
-from django.db.models import Count, Sum, Q
+from transactions.history import get_account_history, latest
+from transactions.exports import iter_csv, iter_gzip
+from transactions.forms import RegulatorExportForm
+from transactions.stats import AccountStatsService
+from transactions.rollups import get_daily_series
+from core.suspension import suspend_accounts, reactivate_accounts
+from .stats import get_admin_stats
+from .users import search_users, estimated_user_count
+from datetime import timedelta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,15 +34,7 @@ class UserDashboardView(LoginRequiredMixin, View):
     
     def get(self, request):
         # Récupérer les dernières transactions
-        sent_transactions = request.user.virtual_account.sent_transactions.all()[:5]
-        received_transactions = request.user.virtual_account.received_transactions.all()[:5]
-        
-        # Combiner et trier
-        recent_transactions = sorted(
-            list(sent_transactions) + list(received_transactions),
-            key=lambda x: x.created_at,
-            reverse=True
-        )[:5]
+        recent_transactions, _ = get_account_history(request.user.virtual_account, page_size=5)
         
         context = {
             'recent_transactions': recent_transactions,
@@ -51,43 +53,20 @@ class AdminDashboardView(LoginRequiredMixin, UserPassesTestMixin, View):
         return self.request.user.is_staff or self.request.user.is_superuser
     
     def get(self, request):
-        # Statistiques utilisateurs
-        total_users = User.objects.filter(is_staff=False).count()
-        active_accounts = VirtualAccount.objects.filter(
-            is_suspended=False,
-            is_platform_account=False
-        ).count()
-        suspended_accounts = VirtualAccount.objects.filter(
-            is_suspended=True,
-            is_platform_account=False
-        ).count()
-        
-        # Statistiques transactions
-        total_transactions = Transaction.objects.filter(status=Transaction.COMPLETED).count()
-        total_volume = Transaction.objects.filter(
-            status=Transaction.COMPLETED
-        ).exclude(
-            transaction_type=Transaction.FEE
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        # Calcul des commissions
-        total_fees = Transaction.objects.filter(
-            transaction_type=Transaction.FEE,
-            status=Transaction.COMPLETED
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        # Transactions par type
-        transactions_by_type = Transaction.objects.filter(
-            status=Transaction.COMPLETED
-        ).values('transaction_type').annotate(count=Count('id'))
+        # Compteurs (une requête par table, mis en cache)
+        stats = get_admin_stats()
         
         # Dernières transactions
-        recent_transactions = Transaction.objects.filter(
-            status=Transaction.COMPLETED
-        ).select_related(
-            'sender_account__user',
-            'receiver_account__user'
-        ).order_by('-created_at')[:10]
+        recent_transactions = latest(
+            Transaction.objects.filter(
+                status=Transaction.COMPLETED
+            ).select_related(
+                'sender_account__user',
+                'receiver_account__user'
+            ).order_by('-created_at'),
+            10,
+            timedelta(days=settings.TRANSACTION_RECENT_WINDOW_DAYS)
+        )
         
         # Utilisateurs récents
         recent_users = User.objects.filter(
@@ -95,15 +74,68 @@ class AdminDashboardView(LoginRequiredMixin, UserPassesTestMixin, View):
         ).order_by('-date_joined')[:5]
         
         context = {
-            'total_users': total_users,
-            'active_accounts': active_accounts,
-            'suspended_accounts': suspended_accounts,
-            'total_transactions': total_transactions,
-            'total_volume': total_volume,
-            'total_fees': total_fees,
-            'transactions_by_type': transactions_by_type,
+            **stats,
             'recent_transactions': recent_transactions,
             'recent_users': recent_users,
+            'export_form': RegulatorExportForm(),
+        }
+        return render(request, self.template_name, context)
+
+
+class RegulatorExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    Vue pour télécharger l'export réglementaire des transactions d'une période
+    (CSV compressé en gzip, envoyé au fil de la lecture)
+    """
+    def test_func(self):
+        return self.request.user.is_staff or self.request.user.is_superuser
+    
+    def get(self, request):
+        form = RegulatorExportForm(request.GET)
+        if not form.is_valid():
+            messages.error(request, 'Période d\'export invalide.')
+            return redirect('dashboard:admin_dashboard')
+        
+        start_date = form.cleaned_data['start_date']
+        end_date = form.cleaned_data['end_date']
+        
+        response = StreamingHttpResponse(
+            iter_gzip(iter_csv(start_date, end_date)),
+            content_type='application/gzip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="transactions_{start_date}_{end_date}.csv.gz"'
+        logger.info(f"Admin {request.user.username} a exporté les transactions du {start_date} au {end_date}")
+        return response
+
+
+class RevenueView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    Vue de l'évolution quotidienne des volumes et des commissions,
+    lue dans les agrégats quotidiens
+    """
+    template_name = 'dashboard/revenue.html'
+    PERIODS = [7, 30, 90, 365]
+    
+    def test_func(self):
+        return self.request.user.is_staff or self.request.user.is_superuser
+    
+    def get(self, request):
+        try:
+            days = int(request.GET.get('days', settings.ADMIN_REVENUE_DAYS))
+        except ValueError:
+            days = settings.ADMIN_REVENUE_DAYS
+        days = min(max(days, 1), max(self.PERIODS))
+        
+        end_day = timezone.localdate()
+        series = get_daily_series(end_day - timedelta(days=days - 1), end_day)
+        
+        context = {
+            'series': list(reversed(series)),
+            'days': days,
+            'periods': self.PERIODS,
+            'total_volume': sum(point['volume'] for point in series),
+            'total_fees': sum(point['fees'] for point in series),
+            'total_count': sum(point['count'] for point in series),
         }
         return render(request, self.template_name, context)
 
@@ -118,21 +150,20 @@ class ManageUsersView(LoginRequiredMixin, UserPassesTestMixin, View):
         return self.request.user.is_staff or self.request.user.is_superuser
     
     def get(self, request):
-        # Récupérer tous les utilisateurs (sauf staff et plateforme)
-        users = User.objects.filter(
-            is_staff=False
-        ).select_related('virtual_account').order_by('-date_joined')
-        
-        # Filtrer par statut si demandé
+        # Une page d'utilisateurs (sauf staff), paginée par curseur
+        query = request.GET.get('q', '').strip()
         status_filter = request.GET.get('status')
-        if status_filter == 'active':
-            users = users.filter(virtual_account__is_suspended=False)
-        elif status_filter == 'suspended':
-            users = users.filter(virtual_account__is_suspended=True)
+        cursor = request.GET.get('cursor')
+        
+        users, next_cursor = search_users(query, status_filter, cursor)
         
         context = {
             'users': users,
+            'query': query,
             'status_filter': status_filter,
+            'next_cursor': next_cursor,
+            'is_first_page': not cursor,
+            'estimated_total': estimated_user_count(),
         }
         return render(request, self.template_name, context)
 
@@ -153,9 +184,13 @@ class SuspendUserView(LoginRequiredMixin, UserPassesTestMixin, View):
             elif user.virtual_account.is_suspended:
                 messages.warning(request, f'Le compte de {user.username} est déjà suspendu.')
             else:
-                user.virtual_account.suspend()
-                messages.success(request, f'Le compte de {user.username} a été suspendu avec succès.')
-                logger.warning(f"Admin {request.user.username} a suspendu le compte de {user.username}")
+                suspended, _ = suspend_accounts([user.id], performed_by=request.user)
+                if suspended:
+                    messages.success(request, f'Le compte de {user.username} a été suspendu avec succès.')
+                    logger.warning(f"Admin {request.user.username} a suspendu le compte de {user.username}")
+                else:
+                    # Statut changé entre-temps par une autre requête
+                    messages.warning(request, f'Le compte de {user.username} n\'a pas été suspendu.')
         else:
             messages.error(request, 'Cet utilisateur n\'a pas de compte virtuel.')
         
@@ -176,15 +211,46 @@ class ReactivateUserView(LoginRequiredMixin, UserPassesTestMixin, View):
             if not user.virtual_account.is_suspended:
                 messages.warning(request, f'Le compte de {user.username} n\'est pas suspendu.')
             else:
-                user.virtual_account.reactivate()
-                messages.success(request, f'Le compte de {user.username} a été réactivé avec succès.')
-                logger.info(f"Admin {request.user.username} a réactivé le compte de {user.username}")
+                if reactivate_accounts([user.id], performed_by=request.user):
+                    messages.success(request, f'Le compte de {user.username} a été réactivé avec succès.')
+                    logger.info(f"Admin {request.user.username} a réactivé le compte de {user.username}")
+                else:
+                    messages.warning(request, f'Le compte de {user.username} n\'a pas été réactivé.')
         else:
             messages.error(request, 'Cet utilisateur n\'a pas de compte virtuel.')
         
         return redirect('dashboard:manage_users')
 
 
+class BulkUserStatusView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    Vue pour suspendre ou réactiver plusieurs utilisateurs à la fois
+    """
+    def test_func(self):
+        return self.request.user.is_staff or self.request.user.is_superuser
+    
+    def post(self, request):
+        user_ids = [int(pk) for pk in request.POST.getlist('user_ids') if pk.isdigit()]
+        action = request.POST.get('action')
+        reason = request.POST.get('reason', '').strip()[:255]
+        
+        if not user_ids:
+            messages.warning(request, 'Aucun utilisateur sélectionné.')
+        elif action == 'suspend':
+            suspended, revoked = suspend_accounts(user_ids, performed_by=request.user, reason=reason)
+            messages.success(
+                request,
+                f'{len(suspended)} compte(s) suspendu(s), {revoked} session(s) fermée(s).'
+            )
+        elif action == 'reactivate':
+            reactivated = reactivate_accounts(user_ids, performed_by=request.user, reason=reason)
+            messages.success(request, f'{len(reactivated)} compte(s) réactivé(s).')
+        else:
+            messages.error(request, 'Action inconnue.')
+        
+        return redirect('dashboard:manage_users')
+
+
 class UserDetailView(LoginRequiredMixin, UserPassesTestMixin, View):
     """
     Vue pour voir les détails d'un utilisateur
@@ -197,34 +263,20 @@ class UserDetailView(LoginRequiredMixin, UserPassesTestMixin, View):
     def get(self, request, user_id):
         user = get_object_or_404(User, id=user_id)
         
+        cursor = request.GET.get('cursor')
+        
         # Récupérer les transactions de l'utilisateur
         if hasattr(user, 'virtual_account'):
-            sent_transactions = user.virtual_account.sent_transactions.all()[:20]
-            received_transactions = user.virtual_account.received_transactions.all()[:20]
-            
-            all_transactions = sorted(
-                list(sent_transactions) + list(received_transactions),
-                key=lambda x: x.created_at,
-                reverse=True
-            )[:20]
+            all_transactions, next_cursor = get_account_history(user.virtual_account, cursor)
             
-            # Statistiques
-            total_sent = user.virtual_account.sent_transactions.filter(
-                status=Transaction.COMPLETED
-            ).exclude(
-                transaction_type=Transaction.FEE
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
-            
-            total_received = user.virtual_account.received_transactions.filter(
-                status=Transaction.COMPLETED
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
-            
-            total_fees_paid = user.virtual_account.sent_transactions.filter(
-                transaction_type=Transaction.FEE,
-                status=Transaction.COMPLETED
-            ).aggregate(Sum('amount'))['amount__sum'] or 0
+            # Statistiques tenues à jour par les services de transaction
+            stats = AccountStatsService.get(user.virtual_account)
+            total_sent = stats.total_sent
+            total_received = stats.total_received
+            total_fees_paid = stats.fees_paid_amount
         else:
             all_transactions = []
+            next_cursor = None
             total_sent = 0
             total_received = 0
             total_fees_paid = 0
@@ -232,6 +284,8 @@ class UserDetailView(LoginRequiredMixin, UserPassesTestMixin, View):
         context = {
             'user_detail': user,
             'transactions': all_transactions,
+            'next_cursor': next_cursor,
+            'is_first_page': not cursor,
             'total_sent': total_sent,
             'total_received': total_received,
             'total_fees_paid': total_fees_paid,
@@ -0,0 +1,137 @@
+"""
+Tests pour l'archivage des transactions anciennes
+"""
+import pytest
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+from django.urls import reverse
+from dashboard.stats import compute_live_transaction_stats
+from transactions.archive import archive_month, archive_old_transactions, archived_rows, archived_months, load_index
+from transactions.exports import iter_csv
+from transactions.models import Transaction, ActivityFeedEntry, LedgerEntry, ArchiveSegment, TransactionDailyStats
+from transactions.partitions import add_months
+from transactions.rollups import day_start, get_totals, run_rollup
+from transactions.services import DepositService, TransferService, WithdrawalService
+from transactions.stats import AccountStatsService
+from transactions.statements import statement_rows
+
+OLD_MONTH = date(2023, 3, 1)
+
+
+@pytest.fixture
+def old_activity(test_user, test_user2, platform_account, settings, tmp_path):
+    """Un dépôt, un transfert et un retrait en mars 2023, un dépôt aujourd'hui"""
+    settings.TRANSACTION_ARCHIVE_DIR = str(tmp_path)
+    settings.TRANSACTION_ARCHIVE_BLOCK_SIZE = 2
+    
+    DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+    TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('3000'))
+    WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'))
+    for model in (Transaction, ActivityFeedEntry, LedgerEntry):
+        model.objects.all().update(created_at=day_start(OLD_MONTH.replace(day=10)))
+    
+    DepositService.deposit(test_user.virtual_account, Decimal('700'))
+    AccountStatsService.verify(fix=True)
+    load_index.cache_clear()
+
+
+@pytest.mark.django_db
+class TestArchive:
+    """Tests de l'écriture des segments et de la lecture des mois archivés"""
+    
+    def test_month_moves_out_of_hot_tables(self, old_activity, test_user):
+        segment = archive_month(OLD_MONTH)
+        
+        assert segment.row_count == 4
+        assert Transaction.objects.count() == 1
+        assert ActivityFeedEntry.objects.filter(created_at__lt=day_start(add_months(OLD_MONTH, 1))).count() == 0
+        # Le grand livre reste complet, ses écritures archivées sont détachées
+        assert LedgerEntry.objects.count() == 10
+        archived = LedgerEntry.objects.filter(transaction__isnull=True)
+        assert archived.count() == 8
+        assert set(archived.values_list('transaction_reference', flat=True)) == {
+            row['reference'] for row in archived_rows(test_user.virtual_account.pk)
+        }
+        assert LedgerEntry.objects.filter(transaction__isnull=False).get(account=test_user.virtual_account).transaction_reference
+        assert archive_month(OLD_MONTH) is None
+    
+    def test_account_rows_read_only_indexed_blocks(self, old_activity, test_user, test_user2):
+        segment = archive_month(OLD_MONTH)
+        index = load_index(segment.index_path)
+        
+        assert len(index['blocks']) == 2
+        assert index['accounts'][str(test_user2.virtual_account.pk)] == [0]
+        
+        rows = list(archived_rows(test_user2.virtual_account.pk))
+        assert [row['amount'] for row in rows] == ['3000.00']
+        assert rows[0]['sender_username'] == test_user.username
+        
+        assert len(list(archived_rows(test_user.virtual_account.pk, end_date=date(2023, 3, 9)))) == 0
+    
+    def test_statement_includes_archived_months(self, old_activity, test_user):
+        archive_month(OLD_MONTH)
+        
+        rows = list(statement_rows(test_user.virtual_account))
+        
+        assert [row[2] for row in rows] == ['deposit', 'transfer', 'withdrawal', 'fee', 'deposit']
+        assert rows[1][3] == ActivityFeedEntry.OUT
+        assert rows[1][5] == 'testuser2'
+        assert rows[-1][4] == '700.00'
+    
+    def test_history_offers_archived_months(self, client, old_activity, test_user):
+        archive_month(OLD_MONTH)
+        client.force_login(test_user)
+        
+        response = client.get(reverse('transactions:history'))
+        
+        assert response.context['archives'] == [{'month': OLD_MONTH, 'end': date(2023, 3, 31)}]
+    
+    def test_archived_months_do_not_read_indexes(self, old_activity, test_user, test_user2, django_assert_num_queries):
+        """L'appartenance d'un compte aux segments est lue en base, en une requête"""
+        archive_month(OLD_MONTH)
+        load_index.cache_clear()
+        
+        with django_assert_num_queries(1):
+            assert archived_months(test_user2.virtual_account) == [OLD_MONTH]
+        assert load_index.cache_info().currsize == 0
+    
+    def test_regulator_export_includes_archived_months(self, old_activity):
+        """L'export d'une période relit les mois archivés, puis la table"""
+        archive_month(OLD_MONTH)
+        
+        rows = list(csv.DictReader(io.StringIO(''.join(iter_csv(OLD_MONTH, date.today())))))
+        
+        assert [row['transaction_type'] for row in rows] == ['deposit', 'transfer', 'withdrawal', 'fee', 'deposit']
+        assert rows[1]['sender_username'] == 'testuser'
+        assert rows[1]['receiver_phone'] == '+228222222222'
+        
+        march = list(csv.DictReader(io.StringIO(''.join(iter_csv(OLD_MONTH, OLD_MONTH.replace(day=9))))))
+        assert march == []
+    
+    def test_stats_verification_counts_archived_months(self, old_activity):
+        archive_month(OLD_MONTH)
+        
+        assert AccountStatsService.verify() == []
+    
+    def test_archive_requires_daily_rollups(self, old_activity, settings):
+        """Sans agrégats, rien n'est archivé ; ensuite les totaux restent exacts"""
+        assert archive_old_transactions(horizon_days=365) == []
+        
+        run_rollup()
+        totals_before = get_totals()
+        segments = archive_old_transactions(horizon_days=365)
+        
+        assert [segment.month for segment in segments] == [OLD_MONTH]
+        assert ArchiveSegment.objects.count() == 1
+        assert get_totals() == totals_before
+        
+        # Le dashboard (source 'live') compte toujours les mois archivés
+        assert compute_live_transaction_stats()['deposit_count'] == 2
+        assert compute_live_transaction_stats()['fee_amount'] == totals_before['fee']['amount']
+        
+        # Un recalcul forcé ne remonte pas dans les mois archivés
+        run_rollup(since=OLD_MONTH)
+        assert TransactionDailyStats.objects.filter(day__lt=add_months(OLD_MONTH, 1)).count() == 4
+        assert get_totals() == totals_before
@@ -0,0 +1,58 @@
+"""
+Tests pour le chargement de l'utilisateur de la requête avec son compte
+"""
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core.backends import AccountModelBackend
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestAccountModelBackend:
+    """Tests du backend d'authentification"""
+    
+    def test_get_user_joins_account(self, test_user, django_assert_num_queries):
+        """L'utilisateur et son compte sont chargés en une requête"""
+        with django_assert_num_queries(1):
+            user = AccountModelBackend().get_user(test_user.pk)
+            balance = user.virtual_account.balance
+        
+        assert balance == test_user.virtual_account.balance
+    
+    def test_get_user_without_account(self, db, django_assert_num_queries):
+        """Un utilisateur sans compte virtuel est chargé, sans requête pour le compte"""
+        user = User.objects.create_user(
+            username='sanscompte', email='sans@example.com', password='testpass123',
+            phone_number='+228333333333', is_active=True
+        )
+        
+        with django_assert_num_queries(1):
+            loaded = AccountModelBackend().get_user(user.pk)
+            assert not hasattr(loaded, 'virtual_account')
+        
+        assert loaded == user
+    
+    @pytest.mark.parametrize('url_name, expected', [
+        # Session, utilisateur avec son compte
+        ('transactions:deposit', 2),
+        ('transactions:transfer', 2),
+        ('transactions:withdrawal_request', 2),
+        # + transactions récentes (fenêtre récente puis complément)
+        ('dashboard:user_dashboard', 4),
+        # + page du fil d'activité et segments archivés
+        ('transactions:history', 4),
+    ])
+    def test_pages_do_not_fetch_account_again(self, client, test_user, url_name, expected):
+        """Ni le middleware, ni la vue, ni le template ne relisent le compte"""
+        client.force_login(test_user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse(url_name))
+        
+        assert response.status_code == 200
+        assert len(queries) == expected
+        assert not any('FROM "core_virtualaccount"' in query['sql'] for query in queries)
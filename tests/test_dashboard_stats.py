@@ -0,0 +1,69 @@
+"""
+Tests pour les statistiques du dashboard administrateur
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import override_settings
+from dashboard.stats import compute_stats, get_admin_stats, CACHE_KEY, LOCK_KEY
+from transactions.services import DepositService, TransferService, WithdrawalService
+from transactions.rollups import run_rollup
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def activity(test_user, test_user2, platform_account):
+    """Un dépôt, un transfert et un retrait (avec commission)"""
+    DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+    TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('3000'))
+    WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'))
+
+
+@pytest.mark.django_db
+class TestAdminStats:
+    """Tests du calcul et du cache des statistiques"""
+    
+    def test_one_query_per_table(self, activity, django_assert_num_queries):
+        """Utilisateurs, comptes, transactions et agrégats des mois archivés : une requête chacun"""
+        with django_assert_num_queries(4):
+            stats = compute_stats()
+        
+        assert stats['total_transactions'] == 4
+        assert stats['total_volume'] == Decimal('17900')
+        assert stats['total_fees'] == Decimal('100')
+        assert stats['active_accounts'] == 2
+    
+    def test_rollup_source_matches_live(self, activity):
+        """Les agrégats quotidiens donnent les mêmes compteurs"""
+        live = compute_stats()
+        run_rollup()
+        with override_settings(ADMIN_DASHBOARD_STATS_SOURCE='rollup'):
+            rollup = compute_stats()
+        
+        assert rollup == live
+    
+    def test_cached_value_is_served(self, activity, django_assert_num_queries):
+        """Tant qu'elle est fraîche, la valeur en cache est servie sans requête"""
+        first = get_admin_stats()
+        
+        with django_assert_num_queries(0):
+            assert get_admin_stats() == first
+    
+    def test_stale_value_served_while_recomputing(self, activity, django_assert_num_queries):
+        """Une valeur périmée est servie pendant qu'un autre processus la recalcule"""
+        first = get_admin_stats()
+        cache.set(CACHE_KEY, (first, 0), 300)  # fraîcheur dépassée
+        cache.add(LOCK_KEY, True, 60)
+        
+        with django_assert_num_queries(0):
+            assert get_admin_stats() == first
+        
+        cache.delete(LOCK_KEY)
+        with django_assert_num_queries(4):
+            get_admin_stats()
@@ -0,0 +1,225 @@
+"""
+Tests pour l'import des fichiers de décaissements
+"""
+import json
+import pytest
+from decimal import Decimal
+from datetime import timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from transactions.disbursements import DisbursementProcessor, DisbursementBatchBusy
+from transactions.executor import TransactionExecutor
+from transactions.models import DisbursementBatch, Transaction
+from transactions.services import DepositService, TransferService
+from tests.test_executor import make_db_error
+
+
+@pytest.fixture
+def funded_sender(test_user):
+    DepositService.deposit(test_user.virtual_account, Decimal('100000'))
+    return test_user
+
+
+def write_csv(path, rows):
+    lines = ['phone,amount,description'] + [','.join(row) for row in rows]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return path
+
+
+@pytest.mark.django_db
+class TestDisbursementProcessor:
+    """Tests pour le traitement par blocs des décaissements"""
+    
+    def test_process_csv_file(self, tmp_path, funded_sender, test_user2):
+        """Tester l'import complet d'un fichier CSV"""
+        path = write_csv(tmp_path / 'paie.csv', [
+            (test_user2.phone_number, '1000', 'Salaire'),
+            ('+228000000000', '1000', ''),
+            (test_user2.phone_number, '2000', ''),
+        ])
+        batch = DisbursementBatch.objects.create(
+            sender_account=funded_sender.virtual_account,
+            source_path=str(path),
+        )
+        
+        progress = []
+        DisbursementProcessor.process(batch, chunk_size=2, progress=progress.append)
+        
+        batch.refresh_from_db()
+        assert batch.status == DisbursementBatch.COMPLETED
+        assert batch.records_processed == 3
+        assert batch.succeeded_count == 2
+        assert batch.failed_count == 1
+        assert batch.total_amount == Decimal('3000')
+        assert [p['chunk'] for p in progress] == [1, 2]
+    
+    def test_crash_resumes_from_checkpoint(self, tmp_path, funded_sender, test_user2, monkeypatch):
+        """Après un incident, le traitement reprend au dernier bloc validé"""
+        path = tmp_path / 'paie.jsonl'
+        path.write_text('\n'.join(
+            json.dumps({'phone': test_user2.phone_number, 'amount': '100'}) for _ in range(5)
+        ), encoding='utf-8')
+        batch = DisbursementBatch.objects.create(
+            sender_account=funded_sender.virtual_account,
+            source_path=str(path),
+            file_format=DisbursementBatch.JSONL,
+        )
+        
+        original_transfer_many = TransferService.transfer_many
+        calls = []
+        
+        def crashing_transfer_many(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('Incident simulé')
+            return original_transfer_many(*args, **kwargs)
+        
+        monkeypatch.setattr(TransferService, 'transfer_many', crashing_transfer_many)
+        with pytest.raises(RuntimeError):
+            DisbursementProcessor.process(batch, chunk_size=2)
+        
+        batch.refresh_from_db()
+        assert batch.status == DisbursementBatch.FAILED
+        assert batch.records_processed == 2
+        
+        monkeypatch.setattr(TransferService, 'transfer_many', original_transfer_many)
+        DisbursementProcessor.process(batch, chunk_size=2)
+        
+        batch.refresh_from_db()
+        assert batch.status == DisbursementBatch.COMPLETED
+        assert batch.records_processed == 5
+        assert Transaction.objects.filter(transaction_type=Transaction.TRANSFER).count() == 5
+    
+    def test_management_command(self, tmp_path, funded_sender, test_user2):
+        """Tester la commande process_disbursements"""
+        path = write_csv(tmp_path / 'paie.csv', [(test_user2.phone_number, '500', '')])
+        
+        call_command('process_disbursements', str(path), sender=funded_sender.username)
+        
+        batch = DisbursementBatch.objects.get()
+        assert batch.status == DisbursementBatch.COMPLETED
+        assert batch.succeeded_count == 1
+
+    
+    def test_running_batch_is_not_processed_twice(self, tmp_path, funded_sender, test_user2):
+        """Un lot en cours n'est repris qu'à l'expiration de son bail ou avec force"""
+        path = write_csv(tmp_path / 'paie.csv', [(test_user2.phone_number, '100', '')] * 3)
+        batch = DisbursementBatch.objects.create(
+            sender_account=funded_sender.virtual_account,
+            source_path=str(path),
+            status=DisbursementBatch.RUNNING,
+            lease_expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        
+        with pytest.raises(DisbursementBatchBusy):
+            DisbursementProcessor.process(batch)
+        assert Transaction.objects.filter(transaction_type=Transaction.TRANSFER).count() == 0
+        
+        DisbursementBatch.objects.filter(pk=batch.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        DisbursementProcessor.process(batch)
+        
+        batch.refresh_from_db()
+        assert batch.status == DisbursementBatch.COMPLETED
+        assert batch.lease_expires_at is None
+        assert Transaction.objects.filter(transaction_type=Transaction.TRANSFER).count() == 3
+    
+    def test_force_resumes_running_batch(self, tmp_path, funded_sender, test_user2):
+        """--force reprend un lot en cours dont le bail court encore"""
+        path = write_csv(tmp_path / 'paie.csv', [(test_user2.phone_number, '100', '')])
+        batch = DisbursementBatch.objects.create(
+            sender_account=funded_sender.virtual_account,
+            source_path=str(path),
+            status=DisbursementBatch.RUNNING,
+            lease_expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        
+        call_command('process_disbursements', batch=batch.pk, force=True)
+        
+        batch.refresh_from_db()
+        assert batch.status == DisbursementBatch.COMPLETED
+    
+    def test_chunk_aborts_when_checkpoint_moved(self, tmp_path, funded_sender, test_user2, monkeypatch):
+        """Un bloc dont le point de reprise a été déplacé par un autre traitement n'est pas payé"""
+        path = write_csv(tmp_path / 'paie.csv', [(test_user2.phone_number, '100', '')] * 4)
+        batch = DisbursementBatch.objects.create(
+            sender_account=funded_sender.virtual_account,
+            source_path=str(path),
+        )
+        original_claim = DisbursementProcessor.claim
+        
+        def claim_then_race(batch, force=False):
+            original_claim(batch, force)
+            # Un autre traitement paie les deux premières lignes entre-temps
+            DisbursementBatch.objects.filter(pk=batch.pk).update(records_processed=2)
+        
+        monkeypatch.setattr(DisbursementProcessor, 'claim', staticmethod(claim_then_race))
+        with pytest.raises(DisbursementBatchBusy):
+            DisbursementProcessor.process(batch, chunk_size=2)
+        
+        assert Transaction.objects.filter(transaction_type=Transaction.TRANSFER).count() == 0
+        assert DisbursementBatch.objects.get(pk=batch.pk).status == DisbursementBatch.RUNNING
+    
+    def test_admin_action_only_queues(self, client, admin_user, tmp_path, funded_sender, test_user2):
+        """L'action de l'admin met le lot en file ; la commande --pending le traite"""
+        path = write_csv(tmp_path / 'paie.csv', [(test_user2.phone_number, '100', '')])
+        batch = DisbursementBatch.objects.create(
+            sender_account=funded_sender.virtual_account,
+            source_path=str(path),
+            status=DisbursementBatch.FAILED,
+        )
+        client.force_login(admin_user)
+        
+        client.post(reverse('admin:transactions_disbursementbatch_changelist'), {
+            'action': 'process_batches', '_selected_action': [batch.pk],
+        })
+        
+        batch.refresh_from_db()
+        assert batch.status == DisbursementBatch.PENDING
+        assert Transaction.objects.filter(transaction_type=Transaction.TRANSFER).count() == 0
+        
+        call_command('process_disbursements', pending=True)
+        
+        batch.refresh_from_db()
+        assert batch.status == DisbursementBatch.COMPLETED
+        assert batch.succeeded_count == 1
+
+@pytest.mark.django_db(transaction=True)
+class TestDisbursementRetry:
+    """Tests du rejeu d'un bloc sur interblocage (hors transaction de test)"""
+    
+    def test_deadlocked_chunk_is_retried(self, tmp_path, funded_sender, test_user2, settings, monkeypatch):
+        """Un interblocage sur un bloc annule puis rejoue le bloc, sans perdre de paiement"""
+        settings.TRANSACTION_RETRY_BASE_DELAY = 0
+        settings.TRANSACTION_RETRY_MAX_DELAY = 0
+        TransactionExecutor.reset_metrics()
+        
+        path = write_csv(tmp_path / 'paie.csv', [(test_user2.phone_number, '100', '')] * 5)
+        batch = DisbursementBatch.objects.create(
+            sender_account=funded_sender.virtual_account,
+            source_path=str(path),
+        )
+        
+        original = TransferService._execute_transfer_many
+        calls = []
+        
+        def deadlocking_execute(*args, **kwargs):
+            calls.append(1)
+            result = original(*args, **kwargs)
+            if len(calls) == 2:
+                # Le deuxième bloc a déjà écrit ses transferts : ils doivent être annulés
+                raise make_db_error('40P01')
+            return result
+        
+        monkeypatch.setattr(TransferService, '_execute_transfer_many', deadlocking_execute)
+        DisbursementProcessor.process(batch, chunk_size=2)
+        
+        batch.refresh_from_db()
+        assert batch.status == DisbursementBatch.COMPLETED
+        assert batch.records_processed == 5
+        assert batch.succeeded_count == 5
+        assert batch.failed_count == 0
+        assert batch.total_amount == Decimal('500')
+        assert Transaction.objects.filter(transaction_type=Transaction.TRANSFER).count() == 5
+        assert len(calls) == 4
+        assert TransactionExecutor.get_metrics()['retries'] == 1
@@ -0,0 +1,91 @@
+"""
+Tests pour l'exécuteur de transactions (verrouillage ordonné et reprise)
+"""
+import pytest
+from decimal import Decimal
+from django.db import DatabaseError, OperationalError
+from core.models import VirtualAccount
+from transactions.executor import TransactionExecutor
+from transactions.services import DepositService, TransferService
+
+
+class FakePgError(Exception):
+    """Simule une erreur psycopg2 portant un code SQLSTATE"""
+    
+    def __init__(self, pgcode):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+def make_db_error(pgcode):
+    """Construit une erreur Django enveloppant une erreur du driver"""
+    error = OperationalError(f"erreur {pgcode}")
+    error.__cause__ = FakePgError(pgcode)
+    return error
+
+
+@pytest.fixture
+def no_backoff(settings):
+    settings.TRANSACTION_RETRY_BASE_DELAY = 0
+    settings.TRANSACTION_RETRY_MAX_DELAY = 0
+    TransactionExecutor.reset_metrics()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTransactionExecutor:
+    """Tests pour TransactionExecutor"""
+    
+    def test_deadlock_is_retried(self, no_backoff, test_user):
+        """Un interblocage est rejoué de manière transparente"""
+        calls = []
+        
+        def operation():
+            calls.append(1)
+            if len(calls) == 1:
+                raise make_db_error('40P01')
+            return 'ok'
+        
+        result = TransactionExecutor.run(operation, accounts=[test_user.virtual_account])
+        
+        assert result == 'ok'
+        assert len(calls) == 2
+        assert TransactionExecutor.get_metrics()['retries'] == 1
+    
+    def test_retry_budget_is_bounded(self, no_backoff, settings):
+        """Les tentatives s'arrêtent une fois le budget épuisé"""
+        settings.TRANSACTION_MAX_ATTEMPTS = 3
+        calls = []
+        
+        def operation():
+            calls.append(1)
+            raise make_db_error('40001')
+        
+        with pytest.raises(DatabaseError):
+            TransactionExecutor.run(operation)
+        
+        assert len(calls) == 3
+        assert TransactionExecutor.get_metrics()['exhausted'] == 1
+    
+    def test_other_errors_are_not_retried(self, no_backoff):
+        """Les erreurs non liées à la concurrence remontent immédiatement"""
+        calls = []
+        
+        def operation():
+            calls.append(1)
+            raise make_db_error('23505')
+        
+        with pytest.raises(DatabaseError):
+            TransactionExecutor.run(operation)
+        
+        assert len(calls) == 1
+    
+    def test_lock_refreshes_stale_balance(self, test_user, test_user2):
+        """Le verrouillage recharge le solde réel des comptes en mémoire"""
+        DepositService.deposit(test_user.virtual_account, Decimal('1000'))
+        stale_account = VirtualAccount.objects.get(pk=test_user.virtual_account.pk)
+        DepositService.deposit(test_user.virtual_account, Decimal('500'))
+        
+        success, _, _ = TransferService.transfer(stale_account, test_user2.phone_number, Decimal('200'))
+        
+        assert success is True
+        assert stale_account.balance == Decimal('1300')
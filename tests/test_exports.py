@@ -0,0 +1,66 @@
+"""
+Tests pour l'export réglementaire des transactions
+"""
+import pytest
+import csv
+import gzip
+import io
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from transactions.exports import iter_csv, iter_gzip
+from transactions.services import DepositService, TransferService
+
+
+@pytest.fixture
+def exported_transactions(test_user, test_user2):
+    """Un dépôt et un transfert du jour"""
+    DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+    TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('3000'))
+    return test_user, test_user2
+
+
+@pytest.mark.django_db
+class TestRegulatorExport:
+    """Tests de l'export réglementaire"""
+    
+    def test_gzip_stream_round_trip(self, exported_transactions):
+        """Le flux gzip se décompresse en CSV avec les identités des deux comptes"""
+        today = timezone.localdate()
+        
+        data = gzip.decompress(b''.join(iter_gzip(iter_csv(today, today)))).decode()
+        rows = list(csv.DictReader(io.StringIO(data)))
+        
+        assert [row['transaction_type'] for row in rows] == ['deposit', 'transfer']
+        assert rows[1]['sender_username'] == 'testuser'
+        assert rows[1]['receiver_phone'] == '+228222222222'
+    
+    def test_command_writes_one_file_per_day(self, exported_transactions, tmp_path):
+        """La commande écrit un fichier gzip par jour de la période"""
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        
+        call_command('export_transactions', str(yesterday), str(today), output=str(tmp_path), workers=1)
+        
+        with gzip.open(tmp_path / f'transactions_{yesterday}.csv.gz', 'rt') as fileobj:
+            assert len(list(csv.reader(fileobj))) == 1  # en-tête seul
+        with gzip.open(tmp_path / f'transactions_{today}.csv.gz', 'rt') as fileobj:
+            assert len(list(csv.reader(fileobj))) == 3
+    
+    def test_endpoint_is_staff_only(self, client, admin_user, exported_transactions):
+        """Seuls les administrateurs peuvent télécharger l'export"""
+        test_user, _ = exported_transactions
+        today = str(timezone.localdate())
+        url = reverse('dashboard:export_transactions')
+        
+        client.force_login(test_user)
+        assert client.get(url, {'start_date': today, 'end_date': today}).status_code == 403
+        
+        client.force_login(admin_user)
+        response = client.get(url, {'start_date': today, 'end_date': today})
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/gzip'
+        data = gzip.decompress(b''.join(response.streaming_content)).decode()
+        assert data.startswith('reference,created_at')
@@ -0,0 +1,87 @@
+"""
+Tests pour le fil d'activité dénormalisé des comptes
+"""
+import pytest
+from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+from transactions.feed import ActivityFeedService
+from transactions.models import ActivityFeedEntry
+from transactions.services import DepositService, TransferService, WithdrawalService
+
+
+@pytest.mark.django_db
+class TestActivityFeed:
+    """Tests de l'écriture et de la lecture du fil d'activité"""
+    
+    def test_one_entry_per_affected_account(self, test_user, test_user2, platform_account):
+        """Dépôt et retrait touchent un compte, transfert et commission deux"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('3000'))
+        WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'))
+        
+        # dépôt (1) + transfert (2) + retrait (1) + commission (2)
+        assert ActivityFeedEntry.objects.count() == 6
+        
+        sent = ActivityFeedEntry.objects.get(account=test_user.virtual_account, transaction_type='transfer')
+        received = ActivityFeedEntry.objects.get(account=test_user2.virtual_account)
+        assert sent.direction == ActivityFeedEntry.OUT
+        assert sent.counterparty_username == 'testuser2'
+        assert sent.counterparty_phone == test_user2.phone_number
+        assert received.direction == ActivityFeedEntry.IN
+        assert received.counterparty_username == 'testuser'
+        
+        fee = ActivityFeedEntry.objects.get(account=platform_account)
+        assert fee.transaction_type == 'fee'
+        assert fee.direction == ActivityFeedEntry.IN
+    
+    def test_transfer_many_writes_feed(self, test_user, test_user2):
+        """Les transferts groupés alimentent aussi le fil"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        TransferService.transfer_many(test_user.virtual_account, [
+            (test_user2.phone_number, Decimal('1000')),
+            (test_user2.phone_number, Decimal('2000')),
+        ])
+        
+        assert test_user2.virtual_account.feed_entries.count() == 2
+    
+    def test_page_is_a_single_query(self, test_user, test_user2, django_assert_num_queries):
+        """Une page du fil coûte une seule requête, sans jointure"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        for _ in range(5):
+            TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('100'))
+        
+        with django_assert_num_queries(1):
+            entries, next_cursor = ActivityFeedService.get_page(test_user.virtual_account, page_size=4)
+            names = [entry.counterparty_username for entry in entries]
+        
+        assert names == ['testuser2'] * 4
+        
+        entries, next_cursor = ActivityFeedService.get_page(test_user.virtual_account, next_cursor, page_size=4)
+        assert [entry.transaction_type for entry in entries] == ['transfer', 'deposit']
+        assert next_cursor is None
+    
+    def test_rebuild_command(self, test_user, test_user2, platform_account):
+        """La reconstruction régénère le même fil à partir des transactions"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('3000'))
+        WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'))
+        
+        fields = ('account_id', 'transaction_id', 'direction', 'amount', 'counterparty_username', 'reference')
+        expected = sorted(ActivityFeedEntry.objects.values_list(*fields))
+        ActivityFeedEntry.objects.filter(account=test_user.virtual_account).delete()
+        
+        call_command('rebuild_activity_feed', chunk_size=2)
+        
+        assert sorted(ActivityFeedEntry.objects.values_list(*fields)) == expected
+    
+    def test_history_view_reads_feed(self, client, test_user, test_user2):
+        """La page d'historique affiche le fil du compte"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('3000'))
+        client.force_login(test_user2)
+        
+        response = client.get(reverse('transactions:history'))
+        
+        assert response.status_code == 200
+        assert 'De: testuser' in response.content.decode()
@@ -0,0 +1,101 @@
+"""
+Tests pour l'historique des transactions paginé par curseur
+"""
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from transactions.history import get_account_history, decode_cursor
+from transactions.services import DepositService, TransferService
+
+
+@pytest.fixture
+def busy_accounts(test_user, test_user2):
+    """Deux comptes avec 25 transactions émises et reçues"""
+    DepositService.deposit(test_user.virtual_account, Decimal('100000'))
+    DepositService.deposit(test_user2.virtual_account, Decimal('100000'))
+    for _ in range(12):
+        TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('1000'))
+        TransferService.transfer(test_user2.virtual_account, test_user.phone_number, Decimal('500'))
+    return test_user, test_user2
+
+
+@pytest.mark.django_db
+class TestAccountHistory:
+    """Tests de la requête d'historique partagée"""
+    
+    def test_history_covers_sent_and_received(self, busy_accounts):
+        """L'historique contient les transactions émises et reçues, des plus récentes aux plus anciennes"""
+        test_user, _ = busy_accounts
+        
+        transactions, _ = get_account_history(test_user.virtual_account, page_size=100)
+        
+        assert len(transactions) == 25
+        assert transactions == sorted(transactions, key=lambda t: (t.created_at, t.id), reverse=True)
+    
+    def test_cursor_walks_full_history(self, busy_accounts):
+        """Le curseur permet de parcourir tout l'historique sans doublon ni trou"""
+        test_user, _ = busy_accounts
+        
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = get_account_history(test_user.virtual_account, cursor, page_size=10)
+            seen.extend(txn.pk for txn in page)
+            if cursor is None:
+                break
+        
+        expected = set(
+            test_user.virtual_account.sent_transactions.values_list('pk', flat=True)
+        ) | set(
+            test_user.virtual_account.received_transactions.values_list('pk', flat=True)
+        )
+        assert len(seen) == len(set(seen)) == 25
+        assert set(seen) == expected
+    
+    def test_page_is_a_single_query(self, busy_accounts, django_assert_num_queries):
+        """Une page, utilisateurs compris, coûte une seule requête"""
+        test_user, _ = busy_accounts
+        
+        with django_assert_num_queries(1):
+            transactions, _ = get_account_history(test_user.virtual_account)
+            names = [(t.sender_account.user.username, t.receiver_account.user.username) for t in transactions]
+        
+        assert len(names) == 20
+    
+    def test_invalid_cursor_returns_first_page(self, busy_accounts):
+        """Un curseur invalide ramène à la première page"""
+        test_user, _ = busy_accounts
+        
+        assert decode_cursor('pas-un-curseur') is None
+        first, _ = get_account_history(test_user.virtual_account)
+        page, _ = get_account_history(test_user.virtual_account, 'pas-un-curseur')
+        
+        assert [t.pk for t in page] == [t.pk for t in first]
+
+
+@pytest.mark.django_db
+class TestHistoryViews:
+    """Tests des vues utilisant l'historique"""
+    
+    def test_history_view_paginates(self, client, busy_accounts):
+        """La page d'historique propose la page suivante au-delà de 20 transactions"""
+        test_user, _ = busy_accounts
+        client.force_login(test_user)
+        
+        response = client.get(reverse('transactions:history'))
+        assert len(response.context['transactions']) == 20
+        assert response.context['next_cursor']
+        
+        response = client.get(reverse('transactions:history'), {'cursor': response.context['next_cursor']})
+        assert len(response.context['transactions']) == 5
+        assert response.context['next_cursor'] is None
+    
+    def test_user_detail_paginates(self, client, admin_user, busy_accounts):
+        """La fiche utilisateur de l'admin n'est plus tronquée à 20 transactions"""
+        test_user, _ = busy_accounts
+        client.force_login(admin_user)
+        
+        response = client.get(reverse('dashboard:user_detail', args=[test_user.id]))
+        
+        assert response.status_code == 200
+        assert response.context['next_cursor']
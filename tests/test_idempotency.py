@@ -0,0 +1,134 @@
+"""
+Tests pour les clés d'idempotence des opérations financières
+"""
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+from transactions.idempotency import IdempotencyService
+from transactions.models import Transaction, IdempotencyKey
+from transactions.services import DepositService, TransferService, WithdrawalService
+
+
+@pytest.fixture(autouse=True)
+def clear_idempotency_cache():
+    """Le cache est propre au processus : le vider entre les tests"""
+    IdempotencyService.clear()
+    yield
+    IdempotencyService.clear()
+
+
+@pytest.mark.django_db
+class TestIdempotentServices:
+    """Tests du rejeu des dépôts, transferts et retraits"""
+    
+    def test_deposit_replay_returns_original_result(self, test_user):
+        """Un dépôt rejoué renvoie la transaction d'origine sans recréditer"""
+        account = test_user.virtual_account
+        
+        first = DepositService.deposit(account, Decimal('10000'), idempotency_key='dep-1')
+        second = DepositService.deposit(account, Decimal('10000'), idempotency_key='dep-1')
+        
+        assert first[0] is True and second[0] is True
+        assert second[1] == first[1]
+        assert second[2].pk == first[2].pk
+        account.refresh_from_db()
+        assert account.balance == Decimal('10000')
+        assert Transaction.objects.filter(transaction_type=Transaction.DEPOSIT).count() == 1
+    
+    def test_transfer_replay_served_from_cache(self, test_user, test_user2, django_capture_on_commit_callbacks,
+                                               django_assert_num_queries):
+        """Après validation, le rejeu d'un transfert ne coûte aucune requête"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            success, message, txn = TransferService.transfer(
+                test_user.virtual_account, test_user2.phone_number, Decimal('1000'),
+                idempotency_key='trf-1'
+            )
+        assert success is True
+        
+        with django_assert_num_queries(0):
+            replay = TransferService.transfer(
+                test_user.virtual_account, test_user2.phone_number, Decimal('1000'),
+                idempotency_key='trf-1'
+            )
+        
+        assert replay[2].pk == txn.pk
+        test_user2.virtual_account.refresh_from_db()
+        assert test_user2.virtual_account.balance == Decimal('1000')
+    
+    def test_withdrawal_replay(self, test_user, platform_account):
+        """Un retrait rejoué renvoie les deux transactions d'origine"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        
+        first = WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'), idempotency_key='wd-1')
+        second = WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'), idempotency_key='wd-1')
+        
+        assert second[2]['withdrawal'].pk == first[2]['withdrawal'].pk
+        assert second[2]['fee'].pk == first[2]['fee'].pk
+        assert second[2]['total_amount'] == Decimal('5000')
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('5000')
+    
+    def test_failed_operation_is_not_recorded(self, test_user, test_user2):
+        """Un échec n'enregistre pas la clé : le client peut réessayer"""
+        success, _, _ = TransferService.transfer(
+            test_user.virtual_account, test_user2.phone_number, Decimal('1000'),
+            idempotency_key='trf-2'
+        )
+        assert success is False
+        assert not IdempotencyKey.objects.exists()
+        
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        success, _, _ = TransferService.transfer(
+            test_user.virtual_account, test_user2.phone_number, Decimal('1000'),
+            idempotency_key='trf-2'
+        )
+        assert success is True
+    
+    def test_key_reused_for_another_operation(self, test_user):
+        """Une clé déjà utilisée pour un dépôt ne peut pas servir à un retrait"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'), idempotency_key='key-1')
+        
+        success, message, result = WithdrawalService.withdraw(
+            test_user.virtual_account, Decimal('5000'), idempotency_key='key-1'
+        )
+        
+        assert success is False
+        assert result is None
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('10000')
+    
+    def test_keys_are_scoped_by_account(self, test_user, test_user2):
+        """La même clé sur deux comptes correspond à deux opérations distinctes"""
+        DepositService.deposit(test_user.virtual_account, Decimal('1000'), idempotency_key='same')
+        DepositService.deposit(test_user2.virtual_account, Decimal('1000'), idempotency_key='same')
+        
+        assert IdempotencyKey.objects.count() == 2
+
+
+@pytest.mark.django_db
+class TestIdempotentViews:
+    """Tests de la double soumission des formulaires"""
+    
+    def test_deposit_form_resubmission(self, client, test_user):
+        """Le même formulaire soumis deux fois ne crée qu'un dépôt"""
+        client.force_login(test_user)
+        data = {'amount': '5000', 'description': 'Dépôt', 'idempotency_key': 'form-key'}
+        
+        client.post(reverse('transactions:deposit'), data)
+        client.post(reverse('transactions:deposit'), data)
+        
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('5000')
+    
+    def test_idempotency_key_header(self, client, test_user):
+        """L'en-tête Idempotency-Key est pris en compte"""
+        client.force_login(test_user)
+        data = {'amount': '5000', 'description': 'Dépôt'}
+        
+        client.post(reverse('transactions:deposit'), data, HTTP_IDEMPOTENCY_KEY='header-key')
+        client.post(reverse('transactions:deposit'), data, HTTP_IDEMPOTENCY_KEY='header-key')
+        
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('5000')
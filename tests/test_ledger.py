@@ -0,0 +1,119 @@
+"""
+Tests pour le grand livre en partie double et les points de solde
+"""
+import pytest
+from decimal import Decimal
+from datetime import timedelta
+from django.db.models import Sum
+from django.utils import timezone
+from transactions.ledger import LedgerService
+from transactions.models import LedgerEntry, BalanceCheckpoint
+from transactions.services import DepositService, TransferService, WithdrawalService
+
+
+@pytest.mark.django_db
+class TestLedgerEntries:
+    """Tests de l'écriture du grand livre par les services"""
+    
+    def test_each_transaction_is_balanced(self, test_user, test_user2, platform_account):
+        """Chaque transaction produit un débit et un crédit du même montant"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('3000'))
+        WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'))
+        
+        debits = LedgerEntry.objects.filter(direction=LedgerEntry.DEBIT).aggregate(Sum('amount'))['amount__sum']
+        credits = LedgerEntry.objects.filter(direction=LedgerEntry.CREDIT).aggregate(Sum('amount'))['amount__sum']
+        
+        # dépôt + transfert + retrait + commission
+        assert LedgerEntry.objects.count() == 8
+        assert debits == credits
+    
+    def test_external_counterpart(self, test_user, platform_account):
+        """Dépôts et retraits ont une contrepartie externe (compte NULL)"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'))
+        
+        external = LedgerEntry.objects.filter(account__isnull=True)
+        assert external.get(direction=LedgerEntry.DEBIT).amount == Decimal('10000')
+        assert external.get(direction=LedgerEntry.CREDIT).amount == Decimal('4900')
+    
+    def test_ledger_matches_balances(self, test_user, test_user2, platform_account):
+        """Le solde calculé par le grand livre correspond au solde des comptes"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('3000'))
+        WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'))
+        TransferService.transfer_many(test_user2.virtual_account, [(test_user.phone_number, Decimal('1000'))])
+        
+        for account in (test_user.virtual_account, test_user2.virtual_account, platform_account):
+            account.refresh_from_db()
+            is_consistent, ledger_balance, account_balance = LedgerService.verify(account)
+            assert is_consistent, (ledger_balance, account_balance)
+    
+    def test_failed_transfer_writes_nothing(self, test_user, test_user2):
+        """Un transfert refusé n'écrit rien dans le grand livre"""
+        TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('1000'))
+        
+        assert not LedgerEntry.objects.exists()
+    
+    def test_entries_are_append_only(self, test_user):
+        """Une écriture ne peut être ni modifiée ni supprimée"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        entry = LedgerEntry.objects.first()
+        
+        entry.amount = Decimal('1')
+        with pytest.raises(ValueError):
+            entry.save()
+        with pytest.raises(ValueError):
+            entry.delete()
+
+
+@pytest.mark.django_db
+class TestBalanceCheckpoints:
+    """Tests des points de solde et du solde à une date"""
+    
+    def test_balance_at_point_in_time(self, test_user):
+        """Le solde passé ignore les écritures postérieures"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        between = timezone.now()
+        DepositService.deposit(test_user.virtual_account, Decimal('5000'))
+        
+        assert LedgerService.balance_at(test_user.virtual_account, between) == Decimal('10000')
+        assert LedgerService.balance_at(test_user.virtual_account) == Decimal('15000')
+    
+    def test_checkpoints_are_incremental(self, test_user, test_user2):
+        """Un point de solde part du point précédent et ne couvre que les comptes actifs"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        
+        assert LedgerService.create_checkpoints(as_of=timezone.now()) == 1
+        first = BalanceCheckpoint.objects.get(account=test_user.virtual_account)
+        assert first.balance == Decimal('10000')
+        
+        # Aucune nouvelle écriture : aucun nouveau point
+        assert LedgerService.create_checkpoints(as_of=timezone.now()) == 0
+        
+        TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('4000'))
+        assert LedgerService.create_checkpoints(as_of=timezone.now()) == 2
+        
+        latest = BalanceCheckpoint.objects.filter(account=test_user.virtual_account).first()
+        assert latest.balance == Decimal('6000')
+        assert latest.entry_count == 1
+    
+    def test_balance_uses_nearest_checkpoint(self, test_user, django_assert_num_queries):
+        """Le solde se calcule depuis le point le plus proche plus la fin du journal"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        LedgerService.create_checkpoints(as_of=timezone.now())
+        DepositService.deposit(test_user.virtual_account, Decimal('2500'))
+        
+        # Le point est falsifié pour prouver qu'il est bien utilisé
+        BalanceCheckpoint.objects.update(balance=Decimal('100'))
+        
+        with django_assert_num_queries(2):
+            balance = LedgerService.balance_at(test_user.virtual_account)
+        assert balance == Decimal('2600')
+    
+    def test_checkpoint_lag_leaves_recent_entries_in_tail(self, test_user):
+        """Par défaut, les écritures trop récentes restent hors du point de solde"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        
+        assert LedgerService.create_checkpoints() == 0
+        assert LedgerService.create_checkpoints(as_of=timezone.now() + timedelta(seconds=1)) == 1
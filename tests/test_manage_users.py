@@ -0,0 +1,110 @@
+"""
+Tests pour la recherche paginée de la gestion des utilisateurs
+"""
+import pytest
+from django.urls import reverse
+from dashboard.users import search_users, ACTIVE, SUSPENDED
+
+
+@pytest.fixture
+def many_users(user_factory):
+    """25 utilisateurs, dont les 5 premiers suspendus"""
+    users = []
+    for i in range(25):
+        user = user_factory(
+            username=f'client{i:02d}',
+            email=f'client{i:02d}@example.com',
+            phone_number=f'+2289000{i:04d}',
+        )
+        if i < 5:
+            user.virtual_account.is_suspended = True
+            user.virtual_account.save()
+        users.append(user)
+    return users
+
+
+@pytest.mark.django_db
+class TestSearchUsers:
+    """Tests de la recherche d'utilisateurs"""
+    
+    def test_cursor_walks_all_users(self, many_users, admin_user):
+        """Le curseur parcourt tous les utilisateurs, staff exclu, sans doublon"""
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = search_users(cursor=cursor, page_size=10)
+            seen.extend(user.pk for user in page)
+            if cursor is None:
+                break
+        
+        assert len(seen) == len(set(seen)) == 25
+        assert admin_user.pk not in seen
+    
+    def test_status_filter(self, many_users):
+        """Le filtre de statut sépare comptes actifs et suspendus"""
+        suspended, _ = search_users(status=SUSPENDED)
+        active, _ = search_users(status=ACTIVE)
+        
+        assert {user.username for user in suspended} == {f'client{i:02d}' for i in range(5)}
+        assert len(active) == 20
+    
+    def test_short_query_is_a_prefix_search(self, many_users, test_user):
+        """Une saisie courte cherche par préfixe du nom ou de l'email"""
+        users, _ = search_users('te')
+        
+        assert [user.pk for user in users] == [test_user.pk]
+    
+    def test_query_matches_inside_username(self, many_users):
+        """Une saisie plus longue cherche dans le nom d'utilisateur"""
+        users, _ = search_users('nt07')
+        
+        assert [user.username for user in users] == ['client07']
+    
+    def test_full_phone_number_matches_exactly(self, many_users):
+        """Un numéro complet, quel que soit son format, désigne un seul utilisateur"""
+        for query in ('+228 90 00 00 12', '90000012'):
+            users, _ = search_users(query)
+            assert [user.username for user in users] == ['client12']
+    
+    def test_digits_in_username_or_email_are_not_a_phone(self, many_users, user_factory):
+        """Un nom ou un email contenant des chiffres reste trouvable"""
+        user = user_factory(username='user12345', email='bob123456@mail.com', phone_number='+22891111111')
+        
+        for query in ('user12345', 'bob123456@mail.com'):
+            users, _ = search_users(query)
+            assert [found.pk for found in users] == [user.pk]
+    
+    def test_page_is_a_single_query(self, many_users, django_assert_num_queries):
+        """Une page, comptes virtuels compris, coûte une seule requête"""
+        with django_assert_num_queries(1):
+            users, _ = search_users(page_size=10)
+            balances = [user.virtual_account.balance for user in users]
+        
+        assert len(balances) == 10
+
+
+@pytest.mark.django_db
+class TestManageUsersView:
+    """Tests de la vue de gestion des utilisateurs"""
+    
+    def test_view_combines_search_and_status(self, client, admin_user, many_users):
+        """La recherche et le filtre de statut se combinent"""
+        client.force_login(admin_user)
+        
+        response = client.get(reverse('dashboard:manage_users'), {'q': 'client', 'status': 'active'})
+        
+        assert response.status_code == 200
+        assert len(response.context['users']) == 20
+        assert response.context['query'] == 'client'
+        assert response.context['next_cursor'] is None
+    
+    def test_view_returns_next_cursor(self, client, admin_user, many_users, settings):
+        """Au-delà d'une page, un lien vers les utilisateurs plus anciens est proposé"""
+        settings.MANAGE_USERS_PAGE_SIZE = 10
+        client.force_login(admin_user)
+        
+        response = client.get(reverse('dashboard:manage_users'))
+        
+        assert len(response.context['users']) == 10
+        assert response.context['next_cursor']
+        assert f"cursor={response.context['next_cursor']}" in response.content.decode()
@@ -1,91 +1,181 @@
-"""
-Tests pour les modèles
-"""
-import pytest
-from decimal import Decimal
-from django.contrib.auth import get_user_model
-from core.models import VirtualAccount
-from transactions.models import Transaction
-
-User = get_user_model()
-
-
-@pytest.mark.django_db
-class TestUserModel:
-    """Tests pour le modèle User"""
-    
-    def test_create_user(self, user_factory):
-        """Tester la création d'un utilisateur"""
-        user = user_factory(username='newuser', email='new@test.com')
-        
-        assert user.username == 'newuser'
-        assert user.email == 'new@test.com'
-        assert user.is_active is True
-    
-    def test_user_has_virtual_account(self, test_user):
-        """Vérifier qu'un utilisateur actif a un compte virtuel"""
-        assert hasattr(test_user, 'virtual_account')
-        assert test_user.virtual_account is not None
-
-
-@pytest.mark.django_db
-class TestVirtualAccountModel:
-    """Tests pour le modèle VirtualAccount"""
-    
-    def test_virtual_account_default_balance(self, test_user):
-        """Vérifier que le solde par défaut est 0"""
-        assert test_user.virtual_account.balance == Decimal('0')
-    
-    def test_virtual_account_can_perform_operations(self, test_user):
-        """Vérifier qu'un compte actif peut effectuer des opérations"""
-        assert test_user.virtual_account.can_perform_operations() is True
-    
-    def test_suspended_account_cannot_perform_operations(self, test_user):
-        """Vérifier qu'un compte suspendu ne peut pas effectuer d'opérations"""
-        test_user.virtual_account.suspend()
-        assert test_user.virtual_account.can_perform_operations() is False
-    
-    def test_suspend_and_reactivate_account(self, test_user):
-        """Tester la suspension et réactivation d'un compte"""
-        # Suspendre
-        test_user.virtual_account.suspend()
-        test_user.virtual_account.refresh_from_db()
-        assert test_user.virtual_account.is_suspended is True
-        
-        # Réactiver
-        test_user.virtual_account.reactivate()
-        test_user.virtual_account.refresh_from_db()
-        assert test_user.virtual_account.is_suspended is False
-
-
-@pytest.mark.django_db
-class TestTransactionModel:
-    """Tests pour le modèle Transaction"""
-    
-    def test_transaction_types_exist(self):
-        """Vérifier que tous les types de transactions existent"""
-        assert Transaction.DEPOSIT == 'deposit'
-        assert Transaction.TRANSFER == 'transfer'
-        assert Transaction.WITHDRAWAL == 'withdrawal'
-        assert Transaction.FEE == 'fee'
-    
-    def test_calculate_total_fees(self, test_user, platform_account):
-        """Tester le calcul du total des commissions"""
-        from transactions.services import DepositService, WithdrawalService
-        
-        # Faire un dépôt puis un retrait
-        DepositService.deposit(test_user.virtual_account, Decimal('50000'))
-        WithdrawalService.withdraw(test_user.virtual_account, Decimal('10000'))
-        
-        # Le retrait de 10000 génère 200 FCFA de frais
-        total_fees = Transaction.calculate_total_fees()
-        assert total_fees == Decimal('200')
-    
-    def test_transaction_has_unique_reference(self, test_user):
-        """Vérifier que chaque transaction a une référence unique"""
-        from transactions.services import DepositService
-        
-        _, _, txn1 = DepositService.deposit(test_user.virtual_account, Decimal('1000'))
-        _, _, txn2 = DepositService.deposit(test_user.virtual_account, Decimal('2000'))
-        
+"""
+Tests pour les modèles
+"""
+import pytest
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from core.phone import normalize_phone_number, backfill_phone_e164, PhoneNumberCollision
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestUserModel:
+    """Tests pour le modèle User"""
+    
+    def test_create_user(self, user_factory):
+        """Tester la création d'un utilisateur"""
+        user = user_factory(username='newuser', email='new@test.com')
+        
+        assert user.username == 'newuser'
+        assert user.email == 'new@test.com'
+        assert user.is_active is True
+    
+    def test_user_has_virtual_account(self, test_user):
+        """Vérifier qu'un utilisateur actif a un compte virtuel"""
+        assert hasattr(test_user, 'virtual_account')
+        assert test_user.virtual_account is not None
+
+
+class TestPhoneNormalization:
+    """Tests pour la normalisation E.164 des numéros"""
+    
+    @pytest.mark.parametrize('raw', [
+        '+22890000000',
+        '+228 90 00 00 00',
+        '0022890000000',
+        '22890000000',
+        '90000000',
+        '90 00 00 00',
+        '090-00-00-00',
+    ])
+    def test_formats_equivalents(self, raw):
+        """Tous les formats usuels donnent la même forme canonique"""
+        assert normalize_phone_number(raw) == '+22890000000'
+    
+    @pytest.mark.parametrize('raw', [
+        '', None, 'abc', '+12', '+000000000000',
+        # Saisies alphanumériques contenant assez de chiffres
+        'user12345', 'bob123456@mail.com', '90000000abc', 'tel:+22890000000', '+228 9000 0000 x12',
+    ])
+    def test_numeros_invalides(self, raw):
+        """Les numéros invalides ne sont pas normalisés"""
+        assert normalize_phone_number(raw) is None
+    
+    @pytest.mark.django_db
+    def test_save_renseigne_phone_e164(self, user_factory):
+        """La forme canonique est calculée à la sauvegarde"""
+        user = user_factory(username='e164', email='e164@test.com', phone_number='90 12 34 56')
+        assert user.phone_e164 == '+22890123456'
+        
+        user.phone_number = '+228 91 00 00 00'
+        user.save(update_fields=['phone_number'])
+        user.refresh_from_db()
+        assert user.phone_e164 == '+22891000000'
+    
+    @pytest.mark.django_db
+    def test_backfill(self, test_user, test_user2):
+        """Le rattrapage renseigne les lignes existantes bloc par bloc"""
+        User.objects.update(phone_e164=None)
+        
+        updated = backfill_phone_e164(User, chunk_size=1)
+        
+        assert updated == 2
+        test_user.refresh_from_db()
+        assert test_user.phone_e164 == '+228111111111'
+        assert backfill_phone_e164(User) == 0
+    
+    @pytest.mark.django_db
+    def test_backfill_stops_on_collision(self, user_factory):
+        """Deux numéros saisis différemment mais identiques une fois normalisés arrêtent le rattrapage"""
+        first = user_factory(username='premier', email='premier@test.com', phone_number='+22890000000')
+        second = user_factory(username='second', email='second@test.com', phone_number='+22890000001')
+        User.objects.filter(pk=second.pk).update(phone_number='0022890000000')
+        User.objects.update(phone_e164=None)
+        
+        with pytest.raises(PhoneNumberCollision) as excinfo:
+            backfill_phone_e164(User, chunk_size=1)
+        
+        assert 'premier' in str(excinfo.value) and 'second' in str(excinfo.value)
+        assert User.objects.get(pk=first.pk).phone_e164 == '+22890000000'
+        assert User.objects.get(pk=second.pk).phone_e164 is None
+    
+    @pytest.mark.django_db
+    def test_phone_e164_is_unique(self, test_user, test_user2):
+        """La base refuse deux comptes avec le même numéro normalisé"""
+        with pytest.raises(IntegrityError), transaction.atomic():
+            User.objects.filter(pk=test_user2.pk).update(phone_e164=test_user.phone_e164)
+    
+    @pytest.mark.django_db
+    def test_admin_rejects_equivalent_phone(self, client, admin_user, test_user):
+        """L'admin refuse un numéro équivalent à celui d'un autre compte"""
+        client.force_login(admin_user)
+        
+        response = client.post(reverse('admin:core_user_add'), {
+            'username': 'doublon',
+            'password1': 'MotDePasse-Solide-42',
+            'password2': 'MotDePasse-Solide-42',
+            'usable_password': 'true',
+            'email': 'doublon@test.com',
+            'phone_number': '00228111111111',
+        })
+        
+        assert response.status_code == 200
+        assert 'phone_number' in response.context['adminform'].form.errors
+        assert not User.objects.filter(username='doublon').exists()
+
+
+@pytest.mark.django_db
+class TestVirtualAccountModel:
+    """Tests pour le modèle VirtualAccount"""
+    
+    def test_virtual_account_default_balance(self, test_user):
+        """Vérifier que le solde par défaut est 0"""
+        assert test_user.virtual_account.balance == Decimal('0')
+    
+    def test_virtual_account_can_perform_operations(self, test_user):
+        """Vérifier qu'un compte actif peut effectuer des opérations"""
+        assert test_user.virtual_account.can_perform_operations() is True
+    
+    def test_suspended_account_cannot_perform_operations(self, test_user):
+        """Vérifier qu'un compte suspendu ne peut pas effectuer d'opérations"""
+        test_user.virtual_account.suspend()
+        assert test_user.virtual_account.can_perform_operations() is False
+    
+    def test_suspend_and_reactivate_account(self, test_user):
+        """Tester la suspension et réactivation d'un compte"""
+        # Suspendre
+        test_user.virtual_account.suspend()
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.is_suspended is True
+        
+        # Réactiver
+        test_user.virtual_account.reactivate()
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.is_suspended is False
+
+
+@pytest.mark.django_db
+class TestTransactionModel:
+    """Tests pour le modèle Transaction"""
+    
+    def test_transaction_types_exist(self):
+        """Vérifier que tous les types de transactions existent"""
+        assert Transaction.DEPOSIT == 'deposit'
+        assert Transaction.TRANSFER == 'transfer'
+        assert Transaction.WITHDRAWAL == 'withdrawal'
+        assert Transaction.FEE == 'fee'
+    
+    def test_calculate_total_fees(self, test_user, platform_account):
+        """Tester le calcul du total des commissions"""
+        from transactions.services import DepositService, WithdrawalService
+        
+        # Faire un dépôt puis un retrait
+        DepositService.deposit(test_user.virtual_account, Decimal('50000'))
+        WithdrawalService.withdraw(test_user.virtual_account, Decimal('10000'))
+        
+        # Le retrait de 10000 génère 200 FCFA de frais
+        total_fees = Transaction.calculate_total_fees()
+        assert total_fees == Decimal('200')
+    
+    def test_transaction_has_unique_reference(self, test_user):
+        """Vérifier que chaque transaction a une référence unique"""
+        from transactions.services import DepositService
+        
+        _, _, txn1 = DepositService.deposit(test_user.virtual_account, Decimal('1000'))
+        _, _, txn2 = DepositService.deposit(test_user.virtual_account, Decimal('2000'))
+        
         assert txn1.reference != txn2.reference
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Tests pour le stockage des codes OTP
+"""
+import pytest
+from django.core import mail
+from authentication.models import OTPCode, OTPEvent
+from authentication.otp import CacheOTPStore, get_store
+from authentication.services import OTPService
+
+
+@pytest.mark.django_db
+class TestDatabaseOTPStore:
+    """Tests du backend historique (OTPCode)"""
+    
+    def test_duplicate_codes_do_not_raise(self, test_user):
+        """Un code tiré deux fois ne provoque plus MultipleObjectsReturned"""
+        first = OTPCode.create_otp(test_user, OTPCode.WITHDRAWAL, 3)
+        second = OTPCode.create_otp(test_user, OTPCode.WITHDRAWAL, 3)
+        OTPCode.objects.filter(pk=first.pk).update(code=second.code)
+        
+        success, _ = OTPCode.verify_otp(test_user, second.code, OTPCode.WITHDRAWAL)
+        
+        assert success is True
+
+
+@pytest.mark.django_db
+class TestCacheOTPStore:
+    """Tests du backend en cache"""
+    
+    @pytest.fixture(autouse=True)
+    def cache_backend(self, settings, tmp_path):
+        settings.CACHES = {
+            **settings.CACHES,
+            'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)},
+        }
+        settings.OTP_BACKEND = 'cache'
+        settings.OTP_CACHE_ALIAS = 'shared'
+        settings.OTP_MAX_ATTEMPTS = 3
+    
+    def test_issue_and_verify_once(self, test_user):
+        """Un code est accepté une seule fois et jamais écrit en base"""
+        otp = get_store().issue(test_user, OTPCode.WITHDRAWAL, 3)
+        
+        assert not OTPCode.objects.exists()
+        assert CacheOTPStore.verify(test_user, otp.code, OTPCode.WITHDRAWAL) == (True, "Code vérifié avec succès.")
+        assert CacheOTPStore.verify(test_user, otp.code, OTPCode.WITHDRAWAL)[0] is False
+        assert list(OTPEvent.objects.order_by('created_at', 'id').values_list('event', flat=True)) == [
+            OTPEvent.ISSUED, OTPEvent.VERIFIED
+        ]
+    
+    def test_local_cache_falls_back_to_database(self, settings, test_user):
+        """Avec un cache local au processus, les codes sont stockés en base"""
+        settings.OTP_CACHE_ALIAS = 'default'
+        
+        otp = get_store().issue(test_user, OTPCode.WITHDRAWAL, 3)
+        
+        assert OTPCode.objects.filter(user=test_user, code=otp.code).exists()
+        assert OTPService.verify_otp(test_user, otp.code, OTPCode.WITHDRAWAL)[0] is True
+    
+    def test_new_code_replaces_previous(self, test_user):
+        """Émettre un nouveau code invalide le précédent"""
+        first = CacheOTPStore.issue(test_user, OTPCode.SIGNUP, 2)
+        second = CacheOTPStore.issue(test_user, OTPCode.SIGNUP, 2)
+        
+        if first.code != second.code:
+            assert CacheOTPStore.verify(test_user, first.code, OTPCode.SIGNUP)[0] is False
+        assert CacheOTPStore.verify(test_user, second.code, OTPCode.SIGNUP)[0] is True
+    
+    def test_codes_are_scoped_by_user_and_type(self, test_user, test_user2):
+        """Le code d'un utilisateur ou d'un autre type n'est pas accepté"""
+        otp = CacheOTPStore.issue(test_user, OTPCode.WITHDRAWAL, 3)
+        
+        assert CacheOTPStore.verify(test_user2, otp.code, OTPCode.WITHDRAWAL)[0] is False
+        assert CacheOTPStore.verify(test_user, otp.code, OTPCode.SIGNUP)[0] is False
+        assert CacheOTPStore.verify(test_user, otp.code, OTPCode.WITHDRAWAL)[0] is True
+    
+    def test_too_many_attempts_lock_the_code(self, test_user):
+        """Au-delà du nombre d'essais autorisé, même le bon code est refusé"""
+        otp = CacheOTPStore.issue(test_user, OTPCode.WITHDRAWAL, 3)
+        wrong = '000000' if otp.code != '000000' else '111111'
+        
+        for _ in range(3):
+            assert CacheOTPStore.verify(test_user, wrong, OTPCode.WITHDRAWAL) == (False, "Code invalide.")
+        
+        success, message = CacheOTPStore.verify(test_user, otp.code, OTPCode.WITHDRAWAL)
+        
+        assert success is False
+        assert message == "Trop d'essais. Demandez un nouveau code."
+        assert OTPEvent.objects.filter(event=OTPEvent.LOCKED).count() == 1
+    
+    def test_service_sends_cached_code(self, test_user):
+        """OTPService passe par le backend configuré"""
+        success, _, otp = OTPService.generate_and_send_otp(test_user, OTPCode.WITHDRAWAL)
+        
+        assert success is True
+        assert otp.code in mail.outbox[-1].body
+        assert OTPService.verify_otp(test_user, otp.code, OTPCode.WITHDRAWAL)[0] is True
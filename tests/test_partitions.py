@@ -0,0 +1,84 @@
+"""
+Tests pour le partitionnement mensuel des transactions
+"""
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from transactions.history import get_account_history
+from transactions.models import Transaction
+from transactions.partitions import (
+    add_months, month_start, partition_name, legacy_upper_bound, ensure_partitions,
+    INDEX_DEFINITION, LEGACY_PARTITION,
+)
+from transactions.services import DepositService
+
+
+class TestPartitionHelpers:
+    """Tests du calcul des mois et des bornes"""
+    
+    def test_add_months_crosses_years(self):
+        assert add_months(date(2026, 11, 1), 1) == date(2026, 12, 1)
+        assert add_months(date(2026, 12, 1), 1) == date(2027, 1, 1)
+        assert add_months(date(2026, 10, 1), 15) == date(2028, 1, 1)
+        assert month_start(date(2026, 10, 16)) == date(2026, 10, 1)
+    
+    def test_partition_name(self):
+        assert partition_name(date(2027, 3, 1)) == 'transactions_transaction_p2027_03'
+    
+    def test_legacy_upper_bound(self):
+        """La borne de la partition d'origine est lue dans son expression PostgreSQL"""
+        partitions = [
+            ('transactions_transaction_default', 'DEFAULT'),
+            (LEGACY_PARTITION, "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00+00')"),
+        ]
+        assert legacy_upper_bound(partitions) == date(2026, 11, 1)
+        assert legacy_upper_bound(partitions[:1]) is None
+    
+    def test_index_definition_is_retargeted(self):
+        """Les définitions d'index de la table d'origine sont reprises sur la table partitionnée"""
+        match = INDEX_DEFINITION.match(
+            'CREATE INDEX transaction_sender__b66812_idx ON public.transactions_transaction_legacy '
+            'USING btree (sender_account_id, created_at DESC)'
+        )
+        assert match.group(1) == 'CREATE INDEX'
+        assert match.group(2) == 'USING btree (sender_account_id, created_at DESC)'
+
+
+@pytest.mark.django_db
+class TestRecentWindow:
+    """Tests de la lecture des partitions récentes en premier"""
+    
+    def test_full_page_in_window_uses_one_query(self, test_user, platform_account, django_assert_num_queries):
+        for _ in range(3):
+            DepositService.deposit(test_user.virtual_account, Decimal('1000'))
+        
+        with django_assert_num_queries(1):
+            page, next_cursor = get_account_history(test_user.virtual_account, page_size=2)
+        
+        assert len(page) == 2
+        assert next_cursor is not None
+    
+    def test_older_transactions_are_still_found(self, test_user, platform_account, settings, django_assert_num_queries):
+        """Une fenêtre trop courte est élargie à toute la table"""
+        DepositService.deposit(test_user.virtual_account, Decimal('1000'))
+        DepositService.deposit(test_user.virtual_account, Decimal('2000'))
+        Transaction.objects.filter(amount=Decimal('1000')).update(
+            created_at=timezone.now() - timedelta(days=settings.TRANSACTION_RECENT_WINDOW_DAYS + 60)
+        )
+        
+        with django_assert_num_queries(2):
+            page, next_cursor = get_account_history(test_user.virtual_account, page_size=5)
+        
+        assert [txn.amount for txn in page] == [Decimal('2000'), Decimal('1000')]
+        assert next_cursor is None
+    
+    def test_ensure_partitions_outside_postgresql(self):
+        """Hors PostgreSQL, la commande ne fait rien"""
+        out = StringIO()
+        call_command('create_transaction_partitions', stdout=out)
+        
+        assert ensure_partitions() == []
+        assert 'PostgreSQL' in out.getvalue()
@@ -0,0 +1,57 @@
+"""
+Tests pour les références de transactions ordonnées dans le temps
+"""
+import pytest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from transactions.references import ReferenceGenerator, generate_reference, reference_timestamp
+from transactions.services import DepositService
+
+
+class TestReferenceGenerator:
+    """Tests du générateur de ULID"""
+    
+    def test_references_are_strictly_increasing(self):
+        """Les références successives sont uniques et croissantes, même dans une milliseconde"""
+        references = [generate_reference() for _ in range(10000)]
+        
+        assert references == sorted(references)
+        assert len(set(references)) == len(references)
+    
+    def test_reference_format(self):
+        """Préfixe TXN- suivi de 26 caractères Crockford"""
+        reference = generate_reference()
+        
+        assert reference.startswith('TXN-')
+        assert len(reference) == 30
+        assert not set(reference[4:]) & set('ILOU')
+    
+    def test_timestamp_is_decodable(self):
+        """La date de génération se lit dans la référence"""
+        before = datetime.now(dt_timezone.utc) - timedelta(milliseconds=1)
+        reference = generate_reference()
+        after = datetime.now(dt_timezone.utc) + timedelta(milliseconds=1)
+        
+        assert before <= reference_timestamp(reference) <= after
+    
+    def test_legacy_reference_has_no_timestamp(self):
+        """Les anciennes références (fragment d'UUID) ne sont pas décodables"""
+        assert reference_timestamp('TXN-1A2B3C4D5E6F') is None
+        assert reference_timestamp(None) is None
+    
+    def test_generators_do_not_collide(self):
+        """Deux générateurs indépendants (workers) partent d'aléas différents"""
+        first, second = ReferenceGenerator(), ReferenceGenerator()
+        
+        references = {first.generate() for _ in range(1000)} | {second.generate() for _ in range(1000)}
+        
+        assert len(references) == 2000
+    
+    @pytest.mark.django_db
+    def test_transactions_use_time_ordered_references(self, test_user):
+        """Les transactions créées par les services reçoivent des références ordonnées"""
+        _, _, first = DepositService.deposit(test_user.virtual_account, Decimal('1000'))
+        _, _, second = DepositService.deposit(test_user.virtual_account, Decimal('1000'))
+        
+        assert first.reference < second.reference
+        assert reference_timestamp(first.reference) is not None
@@ -0,0 +1,113 @@
+"""
+Tests pour les agrégats quotidiens des transactions
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from transactions.models import Transaction, TransactionDailyStats
+from transactions.rollups import run_rollup, get_watermark, get_daily_series, day_start
+from transactions.services import DepositService, TransferService, WithdrawalService
+
+
+def move_to(day, queryset):
+    """Antidate des transactions à midi du jour donné"""
+    queryset.update(created_at=day_start(day) + timedelta(hours=12))
+
+
+@pytest.fixture
+def history(test_user, test_user2, platform_account):
+    """Trois jours d'activité : il y a 5 jours, il y a 3 jours et aujourd'hui"""
+    today = timezone.localdate()
+
+    DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+    move_to(today - timedelta(days=5), Transaction.objects.all())
+
+    TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('3000'))
+    WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'))
+    move_to(today - timedelta(days=3), Transaction.objects.exclude(transaction_type=Transaction.DEPOSIT))
+
+    test_user2.virtual_account.refresh_from_db()
+    TransferService.transfer(test_user2.virtual_account, test_user.phone_number, Decimal('1000'))
+    return today
+
+
+@pytest.mark.django_db
+class TestDailyStats:
+    """Tests de l'agrégation et des totaux combinés"""
+
+    def test_rollup_groups_by_day_type_and_status(self, history):
+        """Une ligne par jour, type et statut"""
+        run_rollup()
+
+        assert get_watermark() == history
+        rows = {
+            (row.day, row.transaction_type): row
+            for row in TransactionDailyStats.objects.filter(status=Transaction.COMPLETED)
+        }
+        assert rows[(history - timedelta(days=5), Transaction.DEPOSIT)].amount == Decimal('10000')
+        assert rows[(history - timedelta(days=3), Transaction.FEE)].amount == Decimal('100')
+        assert rows[(history - timedelta(days=3), Transaction.TRANSFER)].active_accounts == 1
+        assert rows[(history, Transaction.TRANSFER)].count == 1
+        assert len(rows) == 5
+
+    def test_totals_match_full_scan(self, history, test_user):
+        """Agrégats et transactions récentes donnent les mêmes totaux qu'un parcours complet"""
+        run_rollup()
+        # Transaction postérieure au dernier passage, lue directement dans la table
+        DepositService.deposit(test_user.virtual_account, Decimal('2000'))
+
+        assert Transaction.calculate_total_fees() == Decimal('100')
+        assert Transaction.get_transaction_volume() == 6
+        assert Transaction.get_total_amount_transacted() == Decimal('10000') + Decimal('3000') + Decimal('4900') + Decimal('1000') + Decimal('2000')
+
+    def test_incremental_run_reaggregates_late_days(self, history, test_user, settings):
+        """Le passage suivant reprend au filigrane moins la marge de retard"""
+        settings.DAILY_STATS_LATE_DAYS = 3
+        run_rollup()
+
+        # Transaction arrivée tardivement sur un jour déjà agrégé
+        DepositService.deposit(test_user.virtual_account, Decimal('700'))
+        move_to(history - timedelta(days=2), Transaction.objects.filter(amount=Decimal('700')))
+
+        start_day, end_day, _ = run_rollup()
+
+        assert start_day == history - timedelta(days=3)
+        assert end_day == history
+        late = TransactionDailyStats.objects.get(
+            day=history - timedelta(days=2), transaction_type=Transaction.DEPOSIT, status=Transaction.COMPLETED
+        )
+        assert late.amount == Decimal('700')
+        # Le jour hors marge n'a pas été recalculé
+        assert TransactionDailyStats.objects.filter(day=history - timedelta(days=5)).count() == 1
+
+    def test_daily_series(self, history):
+        """La série sépare volume et commissions, un point par jour"""
+        run_rollup()
+
+        series = get_daily_series(history - timedelta(days=6), history)
+
+        assert len(series) == 7
+        by_day = {point['day']: point for point in series}
+        assert by_day[history - timedelta(days=3)]['volume'] == Decimal('7900')
+        assert by_day[history - timedelta(days=3)]['fees'] == Decimal('100')
+        assert by_day[history - timedelta(days=4)]['count'] == 0
+
+    def test_command(self, history):
+        """La commande agrège depuis la première transaction"""
+        call_command('aggregate_daily_stats')
+
+        assert TransactionDailyStats.objects.order_by('day').first().day == history - timedelta(days=5)
+
+    def test_revenue_view(self, client, admin_user, history):
+        """La vue des revenus est réservée aux administrateurs"""
+        run_rollup()
+        client.force_login(admin_user)
+
+        response = client.get(reverse('dashboard:revenue'), {'days': 7})
+
+        assert response.status_code == 200
+        assert response.context['total_fees'] == Decimal('100')
+        assert len(response.context['series']) == 7
@@ -0,0 +1,73 @@
+"""
+Tests pour le téléchargement des relevés de compte
+"""
+import pytest
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+from django.urls import reverse
+from django.utils import timezone
+from transactions.models import ActivityFeedEntry
+from transactions.services import DepositService, TransferService
+
+
+def read_body(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestStatementExport:
+    """Tests de l'export en flux du relevé"""
+    
+    def test_csv_statement(self, client, test_user, test_user2):
+        """Le relevé CSV contient l'en-tête puis les lignes, de la plus ancienne à la plus récente"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        TransferService.transfer(test_user.virtual_account, test_user2.phone_number, Decimal('3000'))
+        client.force_login(test_user)
+        
+        response = client.get(reverse('transactions:statement'))
+        
+        assert response.status_code == 200
+        assert response.streaming
+        assert response['Content-Type'].startswith('text/csv')
+        assert 'attachment' in response['Content-Disposition']
+        
+        rows = list(csv.DictReader(io.StringIO(read_body(response))))
+        assert [row['transaction_type'] for row in rows] == ['deposit', 'transfer']
+        assert rows[1]['direction'] == 'out'
+        assert rows[1]['counterparty_username'] == 'testuser2'
+        assert Decimal(rows[1]['amount']) == Decimal('3000')
+    
+    def test_jsonl_statement_date_range(self, client, test_user):
+        """Le relevé JSON Lines ne couvre que la période demandée"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        DepositService.deposit(test_user.virtual_account, Decimal('5000'))
+        old = ActivityFeedEntry.objects.order_by('id').first()
+        ActivityFeedEntry.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        client.force_login(test_user)
+        
+        today = timezone.localdate()
+        response = client.get(reverse('transactions:statement'), {
+            'format': 'jsonl',
+            'start_date': (today - timedelta(days=1)).isoformat(),
+            'end_date': today.isoformat(),
+        })
+        
+        lines = [json.loads(line) for line in read_body(response).splitlines()]
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        assert len(lines) == 1
+        assert Decimal(lines[0]['amount']) == Decimal('5000')
+    
+    def test_invalid_range_redirects(self, client, test_user):
+        """Une période inversée renvoie vers l'historique"""
+        client.force_login(test_user)
+        
+        response = client.get(reverse('transactions:statement'), {
+            'start_date': '2026-02-01',
+            'end_date': '2026-01-01',
+        })
+        
+        assert response.status_code == 302
+        assert response.url == reverse('transactions:history')
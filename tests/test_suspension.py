@@ -0,0 +1,196 @@
+"""
+Tests pour la suspension de comptes en masse
+"""
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.urls import reverse
+from core.models import VirtualAccount, UserSession, AccountStatusChange
+from django.contrib.messages import get_messages
+from core.suspension import suspend_accounts, reactivate_accounts, is_suspended
+from transactions.resolvers import RecipientResolver
+
+
+@pytest.mark.django_db
+class TestSuspendAccounts:
+    """Tests du service de suspension"""
+    
+    def test_login_records_session(self, client, test_user):
+        """La connexion alimente l'index des sessions, la déconnexion le vide"""
+        client.force_login(test_user)
+        assert UserSession.objects.filter(user=test_user, session_key=client.session.session_key).exists()
+        
+        client.logout()
+        assert not UserSession.objects.filter(user=test_user).exists()
+    
+    def test_suspension_revokes_sessions(self, client, test_user, test_user2):
+        """Les sessions des comptes suspendus sont supprimées aussitôt"""
+        client.force_login(test_user)
+        other_key = client.session.session_key
+        client.force_login(test_user2)
+        
+        suspended, revoked = suspend_accounts([test_user.id])
+        
+        assert suspended == [test_user.id]
+        assert revoked == 1
+        assert not Session.objects.filter(session_key=other_key).exists()
+        assert Session.objects.filter(session_key=client.session.session_key).exists()
+    
+    def test_suspension_writes_audit_rows(self, test_user, test_user2, admin_user):
+        """Chaque compte suspendu a sa ligne dans le journal"""
+        suspend_accounts([test_user.id, test_user2.id], performed_by=admin_user, reason='Fraude')
+        
+        changes = AccountStatusChange.objects.filter(action=AccountStatusChange.SUSPENDED)
+        assert {change.account.user_id for change in changes} == {test_user.id, test_user2.id}
+        assert all(change.performed_by == admin_user and change.reason == 'Fraude' for change in changes)
+        assert VirtualAccount.objects.filter(is_suspended=True).count() == 2
+    
+    def test_staff_platform_and_suspended_are_skipped(self, test_user, admin_user, platform_account):
+        """Staff, compte plateforme et comptes déjà suspendus ne sont pas touchés"""
+        suspend_accounts([test_user.id])
+        
+        suspended, _ = suspend_accounts([test_user.id, admin_user.id, platform_account.user_id])
+        
+        assert suspended == []
+        assert AccountStatusChange.objects.count() == 1
+        assert not VirtualAccount.objects.get(user=admin_user).is_suspended
+        assert not VirtualAccount.objects.get(pk=platform_account.pk).is_suspended
+    
+    def test_reactivation(self, test_user):
+        """La réactivation lève la suspension et est journalisée"""
+        suspend_accounts([test_user.id])
+        
+        assert reactivate_accounts([test_user.id]) == [test_user.id]
+        
+        test_user.virtual_account.refresh_from_db()
+        assert not test_user.virtual_account.is_suspended
+        assert AccountStatusChange.objects.filter(action=AccountStatusChange.REACTIVATED).count() == 1
+    
+    def test_suspension_invalidates_recipient_cache(self, test_user):
+        """L'UPDATE ensembliste retire les comptes du cache des destinataires"""
+        RecipientResolver.clear()
+        assert RecipientResolver.resolve(test_user.phone_number).is_suspended is False
+        
+        suspend_accounts([test_user.id])
+        
+        assert RecipientResolver.resolve(test_user.phone_number).is_suspended is True
+    
+    def test_command_resolves_phones_and_usernames(self, test_user, test_user2, tmp_path):
+        """La commande accepte numéros (tout format) et noms d'utilisateur, en argument ou en fichier"""
+        listing = tmp_path / 'comptes.txt'
+        listing.write_text('testuser2\n')
+        
+        call_command('suspend_accounts', '+228 11 11 11 111', '--file', str(listing), '--reason', 'Incident')
+        
+        assert VirtualAccount.objects.filter(is_suspended=True).count() == 2
+        assert set(AccountStatusChange.objects.values_list('reason', flat=True)) == {'Incident'}
+
+
+@pytest.mark.django_db
+class TestBulkUserStatusView:
+    """Tests de l'action groupée de la gestion des utilisateurs"""
+    
+    def test_bulk_suspend_and_reactivate(self, client, admin_user, test_user, test_user2):
+        """Les utilisateurs cochés sont suspendus puis réactivés en une requête"""
+        client.force_login(admin_user)
+        url = reverse('dashboard:bulk_user_status')
+        
+        response = client.post(url, {'user_ids': [test_user.id, test_user2.id], 'action': 'suspend'})
+        
+        assert response.status_code == 302
+        assert VirtualAccount.objects.filter(is_suspended=True).count() == 2
+        assert AccountStatusChange.objects.filter(performed_by=admin_user).count() == 2
+        
+        client.post(url, {'user_ids': [test_user.id], 'action': 'reactivate'})
+        assert list(VirtualAccount.objects.filter(is_suspended=True).values_list('user_id', flat=True)) == [test_user2.id]
+    
+    def test_single_view_reports_skipped_account(self, client, admin_user, test_user, monkeypatch):
+        """Un compte que le service n'a pas suspendu n'est pas annoncé comme suspendu"""
+        monkeypatch.setattr('dashboard.views.suspend_accounts', lambda *args, **kwargs: ([], 0))
+        client.force_login(admin_user)
+        
+        response = client.post(reverse('dashboard:suspend_user', args=[test_user.id]))
+        
+        assert [message.level_tag for message in get_messages(response.wsgi_request)] == ['warning']
+    
+    def test_bulk_requires_staff(self, client, test_user, test_user2):
+        """Un utilisateur normal ne peut pas suspendre d'autres comptes"""
+        client.force_login(test_user)
+        
+        response = client.post(reverse('dashboard:bulk_user_status'), {'user_ids': [test_user2.id], 'action': 'suspend'})
+        
+        assert response.status_code == 403
+        assert not VirtualAccount.objects.filter(is_suspended=True).exists()
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """Cache partagé entre processus (fichiers) pour l'état de suspension"""
+    settings.CACHES = {
+        **settings.CACHES,
+        'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)},
+    }
+    settings.SUSPENSION_CACHE_ALIAS = 'shared'
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('shared_cache')
+class TestSuspensionCache:
+    """Tests de l'état de suspension servi depuis le cache"""
+    
+    def test_page_view_does_not_query_account(self, client, test_user, django_assert_num_queries):
+        """Une fois l'état en cache, le middleware ne lit plus le compte"""
+        client.force_login(test_user)
+        assert is_suspended(test_user.id) is False
+        
+        # Session et utilisateur seulement
+        with django_assert_num_queries(2):
+            client.get('/static/absent.css')
+    
+    def test_suspend_updates_cache(self, test_user, django_capture_on_commit_callbacks):
+        """suspend() et reactivate() mettent à jour l'entrée en cache"""
+        assert is_suspended(test_user.id) is False
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            test_user.virtual_account.suspend()
+        assert is_suspended(test_user.id) is True
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            test_user.virtual_account.reactivate()
+        assert is_suspended(test_user.id) is False
+    
+    def test_bulk_suspension_updates_cache(self, test_user, test_user2, django_capture_on_commit_callbacks):
+        """La suspension en masse met à jour le cache sans relire les comptes"""
+        assert is_suspended(test_user.id) is False
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            suspend_accounts([test_user.id, test_user2.id])
+        
+        assert is_suspended(test_user.id) is True
+        assert is_suspended(test_user2.id) is True
+    
+    def test_suspended_user_is_logged_out(self, client, test_user, django_capture_on_commit_callbacks):
+        """Un compte suspendu par suspend(), sans révocation des sessions, est déconnecté à la requête suivante"""
+        client.force_login(test_user)
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            test_user.virtual_account.suspend()
+        response = client.get(reverse('dashboard:user_dashboard'))
+        
+        assert response.status_code == 302
+        assert response.url == reverse('authentication:login')
+        assert '_auth_user_id' not in client.session
+
+
+@pytest.mark.django_db
+class TestProcessLocalCache:
+    """Avec un cache local au processus, l'état est toujours relu en base"""
+    
+    def test_state_is_read_from_database(self, test_user, django_assert_num_queries):
+        """Une suspension faite par un autre processus (sans cache commun) est vue aussitôt"""
+        assert is_suspended(test_user.id) is False
+        
+        VirtualAccount.objects.filter(user=test_user).update(is_suspended=True)
+        
+        with django_assert_num_queries(1):
+            assert is_suspended(test_user.id) is True
@@ -3,7 +3,8 @@ Tests pour les opérations de transactions
 """
 import pytest
 from decimal import Decimal
-from transactions.services import DepositService, TransferService, WithdrawalService
+from core.models import VirtualAccount
+from transactions.services import BalanceService, DepositService, TransferService, WithdrawalService
 from transactions.models import Transaction
 
 
@@ -194,4 +195,316 @@ class TestWithdrawalService:
         for requested, expected_withdrawal, expected_fee in test_amounts:
             withdrawal_amount, fee_amount = WithdrawalService.calculate_fee(requested)
             assert withdrawal_amount == expected_withdrawal
-            assert fee_amount == expected_fee
\ No newline at end of file
+            assert fee_amount == expected_fee
+
+@pytest.mark.django_db
+class TestBalanceService:
+    """Tests pour les primitives de mouvement de solde"""
+    
+    def test_debit_insufficient_balance_not_applied(self, test_user):
+        """Vérifier qu'un débit supérieur au solde n'est pas appliqué"""
+        DepositService.deposit(test_user.virtual_account, Decimal('1000'))
+        
+        assert BalanceService.debit(test_user.virtual_account, Decimal('5000')) is False
+        
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('1000')
+    
+    def test_debit_suspended_account_not_applied(self, test_user):
+        """Vérifier qu'un compte suspendu ne peut pas être débité"""
+        DepositService.deposit(test_user.virtual_account, Decimal('1000'))
+        test_user.virtual_account.suspend()
+        
+        assert BalanceService.debit(test_user.virtual_account, Decimal('500')) is False
+    
+    def test_stale_instances_cannot_overdraw(self, test_user, test_user2):
+        """Deux transferts depuis des copies périmées du compte ne doivent pas rendre le solde négatif"""
+        DepositService.deposit(test_user.virtual_account, Decimal('1000'))
+        
+        first_copy = VirtualAccount.objects.get(pk=test_user.virtual_account.pk)
+        second_copy = VirtualAccount.objects.get(pk=test_user.virtual_account.pk)
+        
+        success1, _, _ = TransferService.transfer(first_copy, test_user2.phone_number, Decimal('800'))
+        success2, _, _ = TransferService.transfer(second_copy, test_user2.phone_number, Decimal('800'))
+        
+        assert success1 is True
+        assert success2 is False
+        
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('200')
+
+
+@pytest.mark.django_db
+class TestTransferManyService:
+    """Tests pour les transferts groupés"""
+    
+    def test_transfer_many_credits_all_receivers(self, test_user, test_user2, user_factory):
+        """Tester un lot de transferts vers plusieurs destinataires"""
+        user3 = user_factory(username='testuser3', email='test3@example.com', phone_number='+228333333333')
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        
+        results = TransferService.transfer_many(test_user.virtual_account, [
+            (test_user2.phone_number, Decimal('1000')),
+            (user3.phone_number, Decimal('2000'), 'Salaire'),
+            (test_user2.phone_number, Decimal('500')),
+        ])
+        
+        assert [success for success, _, _ in results] == [True, True, True]
+        assert results[1][2].description == 'Salaire'
+        
+        test_user.virtual_account.refresh_from_db()
+        test_user2.virtual_account.refresh_from_db()
+        user3.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('6500')
+        assert test_user2.virtual_account.balance == Decimal('1500')
+        assert user3.virtual_account.balance == Decimal('2000')
+        assert Transaction.objects.filter(transaction_type=Transaction.TRANSFER).count() == 3
+    
+    def test_transfer_many_reports_invalid_items(self, test_user, test_user2):
+        """Les paiements invalides sont rejetés sans bloquer le reste du lot"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        
+        results = TransferService.transfer_many(test_user.virtual_account, [
+            ('+228000000000', Decimal('1000')),
+            (test_user.phone_number, Decimal('1000')),
+            (test_user2.phone_number, Decimal('-5')),
+            (test_user2.phone_number, Decimal('1000')),
+        ])
+        
+        assert [success for success, _, _ in results] == [False, False, False, True]
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('9000')
+    
+    @pytest.mark.parametrize('amount', ['NaN', 'Infinity', '-Infinity', 'sNaN', 'abc'])
+    def test_transfer_many_rejects_non_finite_amounts(self, test_user, test_user2, amount):
+        """NaN, Infinity ou un montant illisible ne rejettent que leur paiement"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        
+        results = TransferService.transfer_many(test_user.virtual_account, [
+            (test_user2.phone_number, amount),
+            (test_user2.phone_number, Decimal('1000')),
+        ])
+        
+        assert results[0] == (False, "Montant invalide", None)
+        assert results[1][0] is True
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('9000')
+    
+    def test_transfer_many_insufficient_balance_fails_uncovered_items(self, test_user, test_user2):
+        """Les paiements sont servis dans l'ordre : seuls ceux que le solde ne couvre plus échouent"""
+        DepositService.deposit(test_user.virtual_account, Decimal('1500'))
+        
+        results = TransferService.transfer_many(test_user.virtual_account, [
+            (test_user2.phone_number, Decimal('1000')),
+            (test_user2.phone_number, Decimal('1000')),
+            (test_user2.phone_number, Decimal('100')),
+        ])
+        
+        assert [success for success, _, _ in results] == [True, False, False]
+        assert results[1][1] == "Solde insuffisant pour effectuer ce transfert"
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('500')
+        assert Transaction.objects.filter(transaction_type=Transaction.TRANSFER).count() == 1
+    
+    def test_transfer_many_receiver_suspended_meanwhile(self, test_user, test_user2, user_factory):
+        """Un destinataire suspendu après sa résolution ne fait échouer que son paiement"""
+        from transactions.resolvers import RecipientResolver
+        
+        user3 = user_factory(username='testuser3', email='test3@example.com', phone_number='+228333333333')
+        DepositService.deposit(test_user.virtual_account, Decimal('5000'))
+        RecipientResolver.clear()
+        RecipientResolver.resolve_many([test_user2.phone_number, user3.phone_number])
+        # Suspension faite par un autre processus : le cache de celui-ci n'est pas invalidé
+        VirtualAccount.objects.filter(pk=test_user2.virtual_account.pk).update(is_suspended=True)
+        
+        results = TransferService.transfer_many(test_user.virtual_account, [
+            (test_user2.phone_number, Decimal('1000')),
+            (user3.phone_number, Decimal('2000')),
+        ])
+        
+        assert [success for success, _, _ in results] == [False, True]
+        assert results[0][1] == "Le compte du destinataire est suspendu"
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('3000')
+        assert Transaction.objects.filter(transaction_type=Transaction.TRANSFER).count() == 1
+
+
+@pytest.mark.django_db
+class TestStripedPlatformAccount:
+    """Tests pour les sous-soldes du compte plateforme"""
+    
+    def test_withdrawal_fee_goes_to_stripe(self, test_user, platform_account):
+        """La commission est créditée sur un sous-solde, pas sur la ligne du compte"""
+        platform_account.stripe_count = 4
+        platform_account.save()
+        platform_account.ensure_stripes()
+        DepositService.deposit(test_user.virtual_account, Decimal('50000'))
+        
+        success, _, data = WithdrawalService.withdraw(test_user.virtual_account, Decimal('10000'))
+        
+        assert success is True
+        platform_account.refresh_from_db()
+        assert platform_account.balance == Decimal('0')
+        assert platform_account.logical_balance == data['fee_amount']
+        assert data['fee'].receiver_account_id == platform_account.pk
+    
+    def test_consolidate_stripes_command(self, test_user, platform_account):
+        """La consolidation reverse les sous-soldes dans le solde principal"""
+        from django.core.management import call_command
+        
+        platform_account.stripe_count = 4
+        platform_account.save()
+        DepositService.deposit(test_user.virtual_account, Decimal('50000'))
+        WithdrawalService.withdraw(test_user.virtual_account, Decimal('10000'))
+        WithdrawalService.withdraw(test_user.virtual_account, Decimal('5000'))
+        
+        call_command('consolidate_stripes')
+        
+        platform_account.refresh_from_db()
+        assert platform_account.balance == Decimal('300')
+        assert platform_account.logical_balance == Decimal('300')
+        assert not platform_account.stripes.exclude(balance=0).exists()
+    
+    def test_debit_consolidates_after_the_payment(self, test_user, platform_account, django_capture_on_commit_callbacks):
+        """Dans une transaction, le débit ne consolide pas : il échoue et la consolidation suit la validation"""
+        platform_account.stripe_count = 4
+        platform_account.save()
+        DepositService.deposit(test_user.virtual_account, Decimal('50000'))
+        WithdrawalService.withdraw(test_user.virtual_account, Decimal('10000'))
+        platform_account.refresh_from_db()
+        
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            assert BalanceService.debit(platform_account, Decimal('150')) is False
+            assert platform_account.stripes.exclude(balance=0).exists()
+        
+        assert len(callbacks) == 1
+        assert BalanceService.debit(platform_account, Decimal('150')) is True
+        platform_account.refresh_from_db()
+        assert platform_account.balance == Decimal('50')
+
+
+@pytest.mark.django_db
+class TestPlatformAccountCache:
+    """Tests pour le cache du compte plateforme"""
+    
+    def test_withdrawal_does_not_look_up_platform_account(self, test_user, platform_account):
+        """Une fois résolu, le compte plateforme n'est plus recherché par is_platform_account"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from transactions.services import TransactionService
+        
+        DepositService.deposit(test_user.virtual_account, Decimal('50000'))
+        TransactionService.get_platform_account()
+        
+        with CaptureQueriesContext(connection) as ctx:
+            success, _, _ = WithdrawalService.withdraw(test_user.virtual_account, Decimal('10000'))
+        
+        assert success is True
+        lookups = [
+            query['sql'] for query in ctx.captured_queries
+            if 'WHERE' in query['sql'] and 'is_platform_account' in query['sql'].split('WHERE', 1)[1]
+        ]
+        assert lookups == []
+    
+    def test_cache_invalidated_when_platform_account_changes(self, platform_account, test_user):
+        """Le cache est invalidé quand un autre compte devient compte plateforme"""
+        from transactions.services import TransactionService
+        
+        assert TransactionService.get_platform_account().pk == platform_account.pk
+        
+        platform_account.is_platform_account = False
+        platform_account.save()
+        test_user.virtual_account.is_platform_account = True
+        test_user.virtual_account.save()
+        
+        assert TransactionService.get_platform_account().pk == test_user.virtual_account.pk
+    
+    def test_cache_expires(self, platform_account, test_user, settings):
+        """Un changement fait par un autre processus (sans signal ici) est vu à l'expiration"""
+        from transactions.services import TransactionService
+        
+        settings.PLATFORM_ACCOUNT_CACHE_TTL = 0
+        assert TransactionService.get_platform_account().pk == platform_account.pk
+        
+        VirtualAccount.objects.filter(pk=platform_account.pk).update(is_platform_account=False)
+        VirtualAccount.objects.filter(pk=test_user.virtual_account.pk).update(is_platform_account=True)
+        
+        assert TransactionService.get_platform_account().pk == test_user.virtual_account.pk
+
+
+@pytest.mark.django_db
+class TestRecipientResolver:
+    """Tests pour la résolution des destinataires"""
+    
+    def test_repeat_payee_costs_no_lookup(self, test_user, test_user2, django_assert_num_queries):
+        """Un bénéficiaire déjà résolu est servi depuis le cache"""
+        from transactions.resolvers import RecipientResolver
+        
+        RecipientResolver.clear()
+        RecipientResolver.reset_metrics()
+        
+        with django_assert_num_queries(1):
+            first = RecipientResolver.resolve(test_user2.phone_number)
+        with django_assert_num_queries(0):
+            second = RecipientResolver.resolve(test_user2.phone_number)
+        
+        assert first.pk == second.pk == test_user2.virtual_account.pk
+        assert second.user.username == test_user2.username
+        assert RecipientResolver.get_metrics()['hits'] == 1
+        assert RecipientResolver.get_metrics()['misses'] == 1
+    
+    def test_entry_expires(self, test_user2, settings):
+        """Une suspension faite par un autre processus (sans signal ici) est vue à l'expiration"""
+        from transactions.resolvers import RecipientResolver
+        
+        RecipientResolver.clear()
+        settings.RECIPIENT_CACHE_TTL = 0
+        assert RecipientResolver.resolve(test_user2.phone_number).is_suspended is False
+        
+        VirtualAccount.objects.filter(pk=test_user2.virtual_account.pk).update(is_suspended=True)
+        
+        assert RecipientResolver.resolve(test_user2.phone_number).is_suspended is True
+    
+    def test_suspension_invalidates_cache(self, test_user, test_user2):
+        """Un destinataire suspendu après mise en cache ne peut plus être crédité"""
+        from transactions.resolvers import RecipientResolver
+        
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        RecipientResolver.resolve(test_user2.phone_number)
+        test_user2.virtual_account.suspend()
+        
+        success, message, _ = TransferService.transfer(
+            test_user.virtual_account, test_user2.phone_number, Decimal('1000')
+        )
+        
+        assert success is False
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('10000')
+    
+    def test_stale_cache_cannot_credit_suspended_account(self, test_user, test_user2):
+        """Même avec un cache périmé, la base refuse de créditer un compte suspendu"""
+        from transactions.resolvers import RecipientResolver
+        
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        RecipientResolver.resolve(test_user2.phone_number)
+        VirtualAccount.objects.filter(pk=test_user2.virtual_account.pk).update(is_suspended=True)
+        
+        success, message, _ = TransferService.transfer(
+            test_user.virtual_account, test_user2.phone_number, Decimal('1000')
+        )
+        
+        assert success is False
+        assert message == "Le compte du destinataire est suspendu"
+        test_user.virtual_account.refresh_from_db()
+        assert test_user.virtual_account.balance == Decimal('10000')
+    
+    def test_transfer_numero_saisi_au_format_national(self, test_user, test_user2):
+        """Un numéro saisi sans indicatif ni + trouve le même destinataire"""
+        DepositService.deposit(test_user.virtual_account, Decimal('10000'))
+        
+        success, message, txn = TransferService.transfer(
+            test_user.virtual_account, '22 22 22 222', Decimal('1000')
+        )
+        
+        assert success is True
+        assert txn.receiver_account.pk == test_user2.virtual_account.pk
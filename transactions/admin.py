@@ -1,8 +1,8 @@
 """
 Configuration de l'interface d'administration pour l'app transactions
 """
-from django.contrib import admin
-from .models import Transaction
+from django.contrib import admin, messages
+from .models import Transaction, DisbursementBatch, IdempotencyKey, LedgerEntry, BalanceCheckpoint
 
 
 @admin.register(Transaction)
@@ -63,4 +63,133 @@ class TransactionAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         """Empêche la modification de transactions"""
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(DisbursementBatch)
+class DisbursementBatchAdmin(admin.ModelAdmin):
+    """Configuration de l'admin pour les lots de décaissements"""
+    
+    list_display = [
+        'id',
+        'sender_account',
+        'file_format',
+        'status',
+        'records_processed',
+        'succeeded_count',
+        'failed_count',
+        'total_amount',
+        'created_at'
+    ]
+    
+    list_filter = ['status', 'file_format', 'created_at']
+    
+    search_fields = ['sender_account__user__username', 'source_path', 'upload']
+    
+    raw_id_fields = ['sender_account']
+    
+    readonly_fields = [
+        'source_path',
+        'status',
+        'records_processed',
+        'succeeded_count',
+        'failed_count',
+        'total_amount',
+        'last_error',
+        'lease_expires_at',
+        'created_at',
+        'updated_at'
+    ]
+    
+    ordering = ['-created_at']
+    
+    actions = ['process_batches']
+    
+    fieldsets = (
+        ('Fichier', {
+            'fields': ('sender_account', 'upload', 'source_path', 'file_format', 'description')
+        }),
+        ('Progression', {
+            'fields': ('status', 'records_processed', 'succeeded_count', 'failed_count', 'total_amount', 'last_error', 'lease_expires_at')
+        }),
+        ('Dates', {
+            'fields': ('created_at', 'updated_at')
+        }),
+    )
+    
+    @admin.action(description="Mettre en file les lots sélectionnés (traitement / reprise)")
+    def process_batches(self, request, queryset):
+        """
+        Met les lots sélectionnés en attente ; ils sont traités à partir de
+        leur point de reprise par la commande process_disbursements --pending
+        (tâche planifiée), jamais dans la requête HTTP.
+        Les lots terminés ou en cours ne sont pas touchés.
+        """
+        queued = queryset.filter(
+            status__in=[DisbursementBatch.PENDING, DisbursementBatch.FAILED]
+        ).update(status=DisbursementBatch.PENDING, last_error='')
+        skipped = queryset.count() - queued
+        
+        self.message_user(request, f"{queued} lot(s) mis en file de traitement", messages.SUCCESS)
+        if skipped:
+            self.message_user(request, f"{skipped} lot(s) terminé(s) ou en cours ignoré(s)", messages.WARNING)
+    
+    def has_delete_permission(self, request, obj=None):
+        """Empêche la suppression des lots déjà commencés"""
+        if obj and obj.records_processed:
+            return False
+        return super().has_delete_permission(request, obj)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    """Configuration de l'admin pour les clés d'idempotence (lecture seule)"""
+    
+    list_display = ['key', 'operation', 'account', 'transaction', 'created_at']
+    list_filter = ['operation', 'created_at']
+    search_fields = ['key', 'account__user__username', 'transaction__reference']
+    raw_id_fields = ['account', 'transaction', 'fee_transaction']
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    """Configuration de l'admin pour le grand livre (lecture seule, ajout seul)"""
+    
+    list_display = ['created_at', 'transaction_reference', 'account', 'direction', 'amount']
+    list_filter = ['direction', 'created_at']
+    search_fields = ['transaction_reference', 'account__user__username']
+    raw_id_fields = ['transaction', 'account']
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BalanceCheckpoint)
+class BalanceCheckpointAdmin(admin.ModelAdmin):
+    """Configuration de l'admin pour les points de solde (lecture seule)"""
+    
+    list_display = ['account', 'as_of', 'balance', 'entry_count', 'created_at']
+    list_filter = ['as_of']
+    search_fields = ['account__user__username']
+    raw_id_fields = ['account']
+    ordering = ['-as_of']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,13 @@
+"""
+Configuration de l'application transactions
+"""
 from django.apps import AppConfig
 
 
 class TransactionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'transactions'
+    
+    def ready(self):
+        """Importer les signals lors du démarrage de l'application"""
+        import transactions.signals
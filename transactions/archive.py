@@ -0,0 +1,349 @@
+"""
+Archivage des transactions anciennes dans des fichiers compressés
+
+Les mois plus anciens que TRANSACTION_ARCHIVE_HORIZON_DAYS sont sortis de la
+table des transactions (et du fil d'activité) vers un segment par mois :
+un fichier JSON Lines découpé en blocs gzip indépendants, lisible d'un bloc
+comme en entier (gzip -dc), accompagné d'un index JSON qui donne pour chaque
+compte les blocs qui le concernent. Un relevé ou l'historique d'un compte ne
+décompresse que ces blocs.
+
+Le grand livre, les agrégats quotidiens et les statistiques de comptes
+restent en base (les écritures des transactions archivées en sont
+détachées, voir delete_month) : l'index conserve la contribution de chaque compte aux
+statistiques pour que leur vérification tienne compte des mois archivés.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
+from decimal import Decimal
+from functools import lru_cache
+from types import SimpleNamespace
+from .models import Transaction, ActivityFeedEntry, IdempotencyKey, LedgerEntry, ArchiveSegment, ArchiveSegmentAccount
+from .partitions import month_start, add_months, drop_partition, lock_month
+from .rollups import day_start, get_watermark
+from .stats import transaction_counters
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger('transactions')
+
+ARCHIVE_COLUMNS = (
+    ('id', 'id'),
+    ('reference', 'reference'),
+    ('created_at', 'created_at'),
+    ('transaction_type', 'transaction_type'),
+    ('status', 'status'),
+    ('amount', 'amount'),
+    ('description', 'description'),
+    ('sender_account_id', 'sender_account_id'),
+    ('sender_username', 'sender_account__user__username'),
+    ('sender_phone', 'sender_account__user__phone_number'),
+    ('receiver_account_id', 'receiver_account_id'),
+    ('receiver_username', 'receiver_account__user__username'),
+    ('receiver_phone', 'receiver_account__user__phone_number'),
+)
+
+ARCHIVE_HEADER = tuple(name for name, _ in ARCHIVE_COLUMNS)
+
+
+def month_bounds(month):
+    """Bornes [début, fin[ d'un mois dans le fuseau local"""
+    return day_start(month), day_start(add_months(month, 1))
+
+
+def month_queryset(month):
+    """Transactions d'un mois"""
+    start, end = month_bounds(month)
+    return Transaction.objects.filter(created_at__gte=start, created_at__lt=end)
+
+
+def write_segment(month, directory, block_size=None):
+    """
+    Écrit le segment et l'index d'un mois
+    
+    Returns:
+        tuple: (chemin du segment, chemin de l'index, nombre de transactions,
+            empreinte SHA-256, ids des comptes présents)
+    """
+    block_size = block_size or settings.TRANSACTION_ARCHIVE_BLOCK_SIZE
+    path = os.path.join(directory, f'transactions_{month:%Y-%m}.jsonl.gz')
+    index_path = os.path.join(directory, f'transactions_{month:%Y-%m}.index.json')
+    
+    rows = month_queryset(month).order_by('created_at', 'id').values_list(
+        *(lookup for _, lookup in ARCHIVE_COLUMNS)
+    ).iterator(chunk_size=block_size)
+    
+    blocks = []
+    accounts = {}
+    stats = {}
+    digest = hashlib.sha256()
+    count = 0
+    
+    with open(f'{path}.part', 'wb') as fileobj:
+        lines = []
+        
+        def flush():
+            # Un membre gzip par bloc : chaque bloc se décompresse seul
+            data = gzip.compress(''.join(lines).encode())
+            blocks.append([fileobj.tell(), len(data)])
+            fileobj.write(data)
+            digest.update(data)
+            lines.clear()
+        
+        for row in rows:
+            record = dict(zip(ARCHIVE_HEADER, row))
+            record['created_at'] = record['created_at'].isoformat()
+            record['amount'] = str(record['amount'])
+            lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+            
+            for account_id in {record['sender_account_id'], record['receiver_account_id']} - {None}:
+                account_blocks = accounts.setdefault(str(account_id), [])
+                if not account_blocks or account_blocks[-1] != len(blocks):
+                    account_blocks.append(len(blocks))
+            
+            if record['status'] == Transaction.COMPLETED:
+                for account_id, counter in transaction_counters(SimpleNamespace(**record)):
+                    account_stats = stats.setdefault(str(account_id), {})
+                    account_stats[f'{counter}_count'] = account_stats.get(f'{counter}_count', 0) + 1
+                    account_stats[f'{counter}_amount'] = str(
+                        Decimal(account_stats.get(f'{counter}_amount', '0')) + Decimal(record['amount'])
+                    )
+                    account_stats['last_activity_at'] = record['created_at']
+            
+            if len(lines) >= block_size:
+                flush()
+        if lines:
+            flush()
+    
+    index = {'month': month.isoformat(), 'blocks': blocks, 'accounts': accounts, 'stats': stats}
+    with open(f'{index_path}.part', 'w') as fileobj:
+        json.dump(index, fileobj)
+    
+    os.replace(f'{path}.part', path)
+    os.replace(f'{index_path}.part', index_path)
+    return path, index_path, count, digest.hexdigest(), [int(pk) for pk in accounts]
+
+
+def delete_month(month):
+    """
+    Supprime les transactions d'un mois de la table, en supprimant sa
+    partition quand elle en a une
+    
+    Le grand livre garde ses écritures : elles sont d'abord détachées
+    (transaction à NULL, référence conservée dans transaction_reference),
+    la clé étrangère n'étant pas contrainte en base (db_constraint=False),
+    puis les transactions sont supprimées hors ORM (PROTECT).
+    """
+    LedgerEntry.objects.filter(transaction_id__in=month_queryset(month).values('pk')).update(transaction=None)
+    
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql' and drop_partition(cursor, month):
+            return
+        ids, params = month_queryset(month).values('pk').query.sql_with_params()
+        cursor.execute(f'DELETE FROM {Transaction._meta.db_table} WHERE id IN ({ids})', params)
+
+
+def archive_month(month, directory=None):
+    """
+    Archive un mois : écrit son segment puis retire ses transactions,
+    leurs lignes du fil d'activité et leurs clés d'idempotence
+    
+    Returns:
+        ArchiveSegment or None: None si le mois est déjà archivé ou si la
+            table a changé pendant l'écriture
+    """
+    directory = directory or settings.TRANSACTION_ARCHIVE_DIR
+    if ArchiveSegment.objects.filter(month=month).exists():
+        return None
+    
+    os.makedirs(directory, exist_ok=True)
+    path, index_path, count, checksum, account_ids = write_segment(month, directory)
+    start, end = month_bounds(month)
+    
+    with transaction.atomic():
+        # Plus aucune écriture sur le mois jusqu'à la suppression : le
+        # recomptage vaut pour les lignes effectivement supprimées
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                lock_month(cursor, month)
+        
+        if month_queryset(month).count() != count:
+            logger.error(f"Archivage du mois {month:%Y-%m} annulé: transactions modifiées pendant l'écriture")
+            os.remove(path)
+            os.remove(index_path)
+            return None
+        
+        ActivityFeedEntry.objects.filter(created_at__gte=start, created_at__lt=end).delete()
+        IdempotencyKey.objects.filter(
+            Q(transaction__created_at__gte=start, transaction__created_at__lt=end) |
+            Q(fee_transaction__created_at__gte=start, fee_transaction__created_at__lt=end)
+        ).delete()
+        delete_month(month)
+        
+        segment = ArchiveSegment.objects.create(
+            month=month, path=path, index_path=index_path, row_count=count, checksum=checksum
+        )
+        ArchiveSegmentAccount.objects.bulk_create(
+            [ArchiveSegmentAccount(segment=segment, account_id=pk) for pk in account_ids],
+            batch_size=1000
+        )
+    
+    logger.info(f"Mois {month:%Y-%m} archivé: {count} transaction(s) dans {path}")
+    return segment
+
+
+def archive_old_transactions(horizon_days=None, directory=None, progress=None):
+    """
+    Archive les mois entièrement antérieurs à l'horizon
+    
+    Seuls les mois déjà couverts par les agrégats quotidiens (hors marge de
+    recalcul) sont archivés, pour que les totaux de la plateforme restent exacts.
+    
+    Args:
+        progress: Callback optionnel appelé avec chaque segment écrit
+    
+    Returns:
+        list: Segments créés
+    """
+    if horizon_days is None:
+        horizon_days = settings.TRANSACTION_ARCHIVE_HORIZON_DAYS
+    
+    watermark = get_watermark()
+    if watermark is None:
+        logger.warning("Aucun agrégat quotidien: lancez aggregate_daily_stats avant d'archiver")
+        return []
+    
+    limit = min(
+        month_start(timezone.localdate() - timedelta(days=horizon_days)),
+        month_start(watermark - timedelta(days=settings.DAILY_STATS_LATE_DAYS)),
+    )
+    
+    segments = []
+    while True:
+        # Mois de la plus ancienne transaction restante : les mois vides sont sautés
+        first = Transaction.objects.aggregate(first=Min('created_at'))['first']
+        if first is None or month_start(timezone.localdate(first)) >= limit:
+            return segments
+        
+        segment = archive_month(month_start(timezone.localdate(first)), directory)
+        if segment is None:
+            return segments
+        segments.append(segment)
+        if progress:
+            progress(segment)
+
+
+@lru_cache(maxsize=128)
+def load_index(index_path):
+    """Index d'un segment (gardé en mémoire : les segments ne changent plus)"""
+    with open(index_path) as fileobj:
+        return json.load(fileobj)
+
+
+def segments_between(start_date=None, end_date=None):
+    """Segments archivés couvrant une période de jours inclusifs"""
+    segments = ArchiveSegment.objects.order_by('month')
+    if start_date:
+        segments = segments.filter(month__gte=month_start(start_date))
+    if end_date:
+        segments = segments.filter(month__lte=end_date)
+    return segments
+
+
+def archived_rows(account_id, start_date=None, end_date=None):
+    """
+    Parcourt les transactions archivées d'un compte, de la plus ancienne à la plus récente
+    
+    Seuls les blocs listés par l'index pour ce compte sont lus et décompressés.
+    
+    Returns:
+        iterator: Dicts dans le format de ARCHIVE_COLUMNS (created_at en datetime)
+    """
+    start = day_start(start_date) if start_date else None
+    end = day_start(end_date + timedelta(days=1)) if end_date else None
+    
+    for segment in segments_between(start_date, end_date).filter(accounts__account_id=account_id):
+        index = load_index(segment.index_path)
+        block_numbers = index['accounts'].get(str(account_id), [])
+        if not block_numbers:
+            continue
+        
+        with open(segment.path, 'rb') as fileobj:
+            for number in block_numbers:
+                offset, length = index['blocks'][number]
+                fileobj.seek(offset)
+                for line in gzip.decompress(fileobj.read(length)).decode().splitlines():
+                    record = json.loads(line)
+                    if account_id not in (record['sender_account_id'], record['receiver_account_id']):
+                        continue
+                    record['created_at'] = parse_datetime(record['created_at'])
+                    if (start and record['created_at'] < start) or (end and record['created_at'] >= end):
+                        continue
+                    yield record
+
+
+def archived_period_rows(start_date, end_date):
+    """
+    Parcourt les transactions archivées d'une période, tous comptes
+    confondus, de la plus ancienne à la plus récente
+    
+    Les segments sont décompressés en flux ; la lecture d'un segment
+    s'arrête à la fin de la période (les lignes y sont triées par date).
+    
+    Returns:
+        iterator: Dicts dans le format de ARCHIVE_COLUMNS (created_at en datetime)
+    """
+    start = day_start(start_date)
+    end = day_start(end_date + timedelta(days=1))
+    
+    for segment in segments_between(start_date, end_date):
+        with gzip.open(segment.path, 'rt') as fileobj:
+            for line in fileobj:
+                record = json.loads(line)
+                record['created_at'] = parse_datetime(record['created_at'])
+                if record['created_at'] >= end:
+                    break
+                if record['created_at'] >= start:
+                    yield record
+
+
+def archived_months(account):
+    """Mois archivés dans lesquels le compte a des transactions (une requête, sans lire les index)"""
+    return list(
+        ArchiveSegment.objects.filter(accounts__account=account).order_by('-month').values_list('month', flat=True)
+    )
+
+
+def archived_stats(account_ids):
+    """
+    Contribution des mois archivés aux statistiques des comptes
+    
+    Returns:
+        dict: {id du compte: {champ de AccountStats: valeur}}
+    """
+    contributions = {}
+    for segment in ArchiveSegment.objects.only('index_path'):
+        stats = load_index(segment.index_path)['stats']
+        for pk in account_ids:
+            account_stats = stats.get(str(pk))
+            if not account_stats:
+                continue
+            totals = contributions.setdefault(pk, {})
+            for field, value in account_stats.items():
+                if field == 'last_activity_at':
+                    value = parse_datetime(value)
+                    if totals.get(field) is None or value > totals[field]:
+                        totals[field] = value
+                elif field.endswith('_count'):
+                    totals[field] = totals.get(field, 0) + value
+                else:
+                    totals[field] = totals.get(field, Decimal('0')) + Decimal(value)
+    return contributions
@@ -0,0 +1,260 @@
+"""
+Pipeline d'import des fichiers de décaissement (paie, paiements groupés)
+
+Le fichier est lu ligne à ligne par une suite de générateurs, découpé en
+blocs, et chaque bloc est transféré via TransferService.transfer_many dans
+une transaction qui enregistre aussi le point de reprise du lot. Un
+interblocage annule le bloc entier, point de reprise compris, et le bloc
+est rejoué par TransactionExecutor.
+Un traitement réserve le lot par un bail (voir claim) et chaque bloc
+vérifie sous verrou que le point de reprise n'a pas bougé : deux
+traitements du même lot ne peuvent pas payer deux fois les mêmes lignes.
+Le fichier n'est jamais chargé entièrement en mémoire.
+"""
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
+from itertools import islice
+from .executor import TransactionExecutor
+from .models import DisbursementBatch
+from .services import TransferService
+import csv
+import json
+import time
+import logging
+
+logger = logging.getLogger('transactions')
+
+
+class DisbursementFileError(Exception):
+    """Erreur de lecture d'un fichier de décaissement"""
+
+
+class DisbursementBatchBusy(Exception):
+    """Le lot est déjà traité ailleurs (bail en cours ou point de reprise déplacé)"""
+
+
+def read_records(path, file_format):
+    """
+    Lit les enregistrements du fichier un par un
+    
+    Yields:
+        dict: Les champs bruts d'une ligne (phone, amount, description)
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format == DisbursementBatch.JSONL:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Compter la ligne pour garder le point de reprise aligné ; elle sera rejetée
+                    logger.warning(f"Ligne {line_number}: JSON invalide")
+                    yield {}
+        else:
+            reader = csv.DictReader(f)
+            missing = {'phone', 'amount'} - set(reader.fieldnames or [])
+            if missing:
+                raise DisbursementFileError(
+                    f"Colonnes manquantes dans l'en-tête CSV: {', '.join(sorted(missing))}"
+                )
+            for row in reader:
+                if not any(row.values()):
+                    continue
+                yield row
+
+
+def parse_payments(records, default_description):
+    """
+    Convertit les enregistrements bruts en paiements
+    
+    Yields:
+        tuple: (receiver_phone, amount, description)
+    """
+    for record in records:
+        phone = str(record.get('phone') or '').strip()
+        amount = str(record.get('amount') or '').strip()
+        description = str(record.get('description') or '').strip() or default_description
+        yield (phone, amount, description)
+
+
+def chunked(iterable, size):
+    """Découpe un itérable en listes de taille maximale size"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class DisbursementProcessor:
+    """
+    Traite un lot de décaissements bloc par bloc avec reprise sur incident
+    """
+    
+    @staticmethod
+    def lease_deadline():
+        """Fin d'un bail pris ou renouvelé maintenant"""
+        return timezone.now() + timedelta(seconds=settings.DISBURSEMENT_LEASE_SECONDS)
+    
+    @staticmethod
+    def claim(batch, force=False):
+        """
+        Réserve le lot pour ce traitement (UPDATE conditionnel)
+        
+        Un lot en cours (RUNNING) n'est repris que si son bail a expiré, ou
+        avec force=True (traitement précédent arrêté avec certitude).
+        
+        Raises:
+            DisbursementBatchBusy: Le lot est déjà réservé
+        """
+        batches = DisbursementBatch.objects.filter(pk=batch.pk).exclude(status=DisbursementBatch.COMPLETED)
+        if not force:
+            batches = batches.filter(
+                ~Q(status=DisbursementBatch.RUNNING) |
+                Q(lease_expires_at__isnull=True) |
+                Q(lease_expires_at__lt=timezone.now())
+            )
+        claimed = batches.update(
+            status=DisbursementBatch.RUNNING,
+            last_error='',
+            lease_expires_at=DisbursementProcessor.lease_deadline(),
+            updated_at=timezone.now(),
+        )
+        if not claimed:
+            raise DisbursementBatchBusy(f"Le lot #{batch.pk} est déjà en cours de traitement")
+        
+        # Point de reprise et compteurs à jour (un traitement précédent a pu avancer)
+        batch.refresh_from_db()
+    
+    @staticmethod
+    def process(batch, chunk_size=None, progress=None, force=False):
+        """
+        Traite (ou reprend) un lot de décaissements
+        
+        Args:
+            batch: Le DisbursementBatch à traiter
+            chunk_size: Nombre de lignes par bloc (par défaut settings.DISBURSEMENT_CHUNK_SIZE)
+            progress: Fonction appelée après chaque bloc avec un dict de progression
+            force: Reprendre un lot en cours dont le bail n'a pas expiré
+        
+        Raises:
+            DisbursementBatchBusy: Le lot est déjà traité ailleurs
+        
+        Returns:
+            DisbursementBatch: Le lot mis à jour
+        """
+        chunk_size = chunk_size or settings.DISBURSEMENT_CHUNK_SIZE
+        
+        if batch.status == DisbursementBatch.COMPLETED:
+            return batch
+        
+        DisbursementProcessor.claim(batch, force=force)
+        
+        resumed_from = batch.records_processed
+        if resumed_from:
+            logger.info(f"Reprise du lot #{batch.pk} après {resumed_from} lignes")
+        
+        started_at = time.monotonic()
+        try:
+            payments = parse_payments(
+                read_records(batch.file_path, batch.file_format),
+                batch.description or "Décaissement"
+            )
+            # Ignorer les lignes déjà traitées avant l'interruption
+            payments = islice(payments, resumed_from, None)
+            
+            for chunk_number, chunk in enumerate(chunked(payments, chunk_size), start=1):
+                chunk_started_at = time.monotonic()
+                DisbursementProcessor._process_chunk(batch, chunk)
+                
+                if progress is not None:
+                    elapsed = time.monotonic() - started_at
+                    chunk_elapsed = time.monotonic() - chunk_started_at
+                    progress({
+                        'chunk': chunk_number,
+                        'chunk_size': len(chunk),
+                        'records_processed': batch.records_processed,
+                        'succeeded': batch.succeeded_count,
+                        'failed': batch.failed_count,
+                        'chunk_rate': len(chunk) / chunk_elapsed if chunk_elapsed else 0,
+                        'rate': (batch.records_processed - resumed_from) / elapsed if elapsed else 0,
+                    })
+        
+        except DisbursementBatchBusy as e:
+            # Le lot appartient à un autre traitement : ne pas toucher à son statut
+            logger.error(f"Lot #{batch.pk} abandonné: {str(e)}")
+            raise
+        except Exception as e:
+            batch.status = DisbursementBatch.FAILED
+            batch.last_error = str(e)
+            batch.lease_expires_at = None
+            batch.save(update_fields=['status', 'last_error', 'lease_expires_at', 'updated_at'])
+            logger.error(f"Échec du lot #{batch.pk} après {batch.records_processed} lignes: {str(e)}")
+            raise
+        
+        batch.status = DisbursementBatch.COMPLETED
+        batch.lease_expires_at = None
+        batch.save(update_fields=['status', 'lease_expires_at', 'updated_at'])
+        logger.info(
+            f"Lot #{batch.pk} terminé: {batch.succeeded_count} réussis, "
+            f"{batch.failed_count} rejetés, {batch.total_amount} FCFA"
+        )
+        return batch
+    
+    @staticmethod
+    def _process_chunk(batch, chunk):
+        """
+        Transfère un bloc et enregistre le point de reprise dans la même transaction
+        
+        Le bloc est exécuté par TransactionExecutor : en cas d'interblocage ou
+        d'échec de sérialisation, transferts et point de reprise sont annulés
+        ensemble puis le bloc est rejoué, au lieu de rejeter ses paiements.
+        
+        Raises:
+            DisbursementBatchBusy: Le point de reprise a été déplacé par un
+                autre traitement (bloc déjà payé)
+        """
+        start = batch.records_processed
+        counters = (batch.succeeded_count, batch.failed_count, batch.total_amount)
+        
+        def operation():
+            # Verrou du lot : un autre traitement qui aurait payé ce bloc a déplacé le point de reprise
+            checkpoint = DisbursementBatch.objects.select_for_update().values_list(
+                'records_processed', flat=True
+            ).get(pk=batch.pk)
+            if checkpoint != start:
+                raise DisbursementBatchBusy(
+                    f"Point de reprise du lot #{batch.pk} déplacé ({start} → {checkpoint}) par un autre traitement"
+                )
+            
+            # Repartir des compteurs d'avant le bloc à chaque tentative
+            batch.succeeded_count, batch.failed_count, batch.total_amount = counters
+            results = TransferService.transfer_many(batch.sender_account, chunk)
+            
+            for offset, (success, message, txn) in enumerate(results):
+                if success:
+                    batch.succeeded_count += 1
+                    batch.total_amount += txn.amount
+                else:
+                    batch.failed_count += 1
+                    logger.warning(f"Lot #{batch.pk} ligne {start + offset + 1} rejetée: {message}")
+            
+            batch.records_processed = start + len(chunk)
+            batch.lease_expires_at = DisbursementProcessor.lease_deadline()
+            batch.save(update_fields=[
+                'records_processed', 'succeeded_count', 'failed_count', 'total_amount',
+                'lease_expires_at', 'updated_at'
+            ])
+        
+        try:
+            TransactionExecutor.run(operation)
+        except Exception:
+            # Le point de reprise n'a pas été enregistré : l'instance non plus
+            batch.records_processed = start
+            batch.succeeded_count, batch.failed_count, batch.total_amount = counters
+            raise
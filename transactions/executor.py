@@ -0,0 +1,169 @@
+"""
+Exécution des opérations financières avec verrouillage ordonné des comptes
+et reprise automatique des conflits de concurrence
+"""
+from django.db import transaction, connection, DatabaseError
+from django.conf import settings
+from core.models import VirtualAccount
+import random
+import threading
+import time
+import logging
+
+logger = logging.getLogger('transactions')
+
+
+class TransactionExecutor:
+    """
+    Exécute une opération financière dans une transaction base de données :
+    - verrouille les comptes concernés (select_for_update) par id croissant,
+      ce qui supprime les interblocages entre transferts croisés
+    - applique éventuellement un niveau d'isolation plus strict
+    - rejoue l'opération en cas d'interblocage ou d'échec de sérialisation
+    """
+    
+    # Codes SQLSTATE PostgreSQL pouvant être rejoués sans risque
+    RETRYABLE_SQLSTATES = {
+        '40001',  # serialization_failure
+        '40P01',  # deadlock_detected
+    }
+    
+    ISOLATION_LEVELS = {
+        'read committed': 'READ COMMITTED',
+        'repeatable read': 'REPEATABLE READ',
+        'serializable': 'SERIALIZABLE',
+    }
+    
+    _metrics = {
+        'executions': 0,
+        'retries': 0,
+        'exhausted': 0,
+    }
+    _metrics_lock = threading.Lock()
+    
+    @classmethod
+    def run(cls, operation, accounts=(), isolation_level=None, max_attempts=None):
+        """
+        Exécute une opération de manière atomique avec reprise automatique
+        
+        Args:
+            operation: Fonction sans argument effectuant les écritures
+            accounts: Les comptes virtuels à verrouiller avant l'opération
+            isolation_level: 'read committed', 'repeatable read' ou 'serializable'
+                (par défaut settings.TRANSACTION_ISOLATION_LEVEL)
+            max_attempts: Nombre maximal de tentatives
+                (par défaut settings.TRANSACTION_MAX_ATTEMPTS)
+        
+        Returns:
+            Le résultat de l'opération
+        """
+        if isolation_level is None:
+            isolation_level = settings.TRANSACTION_ISOLATION_LEVEL
+        if max_attempts is None:
+            max_attempts = settings.TRANSACTION_MAX_ATTEMPTS
+        
+        cls._increment('executions')
+        
+        # Dans une transaction englobante, impossible de rejouer ou de changer
+        # le niveau d'isolation : l'appelant garde la maîtrise de la reprise
+        if connection.in_atomic_block:
+            with transaction.atomic():
+                cls.lock_accounts(accounts)
+                return operation()
+        
+        attempt = 1
+        while True:
+            try:
+                with transaction.atomic():
+                    cls._set_isolation_level(isolation_level)
+                    cls.lock_accounts(accounts)
+                    return operation()
+            except DatabaseError as e:
+                if not cls.is_retryable(e):
+                    raise
+                if attempt >= max_attempts:
+                    cls._increment('exhausted')
+                    logger.error(f"Conflit de concurrence non résolu après {attempt} tentatives: {str(e)}")
+                    raise
+                
+                cls._increment('retries')
+                delay = cls._backoff_delay(attempt)
+                logger.warning(
+                    f"Conflit de concurrence (tentative {attempt}/{max_attempts}), "
+                    f"nouvel essai dans {delay * 1000:.0f} ms: {str(e)}"
+                )
+                time.sleep(delay)
+                attempt += 1
+    
+    @staticmethod
+    def lock_accounts(accounts):
+        """
+        Verrouille les comptes par id croissant et rafraîchit leur solde en mémoire
+        Les comptes à sous-soldes sont ignorés.
+        
+        Args:
+            accounts: Les comptes virtuels à verrouiller
+        """
+        accounts_by_id = {}
+        for account in accounts:
+            # Les comptes à sous-soldes ne sont pas verrouillés : leurs crédits
+            # portent sur les sous-soldes, c'est tout l'intérêt du découpage
+            if account is not None and not account.stripe_count:
+                accounts_by_id.setdefault(account.pk, []).append(account)
+        
+        if not accounts_by_id:
+            return
+        
+        locked_balances = VirtualAccount.objects.select_for_update().filter(
+            pk__in=accounts_by_id.keys()
+        ).order_by('pk').values_list('pk', 'balance')
+        
+        for pk, balance in locked_balances:
+            for account in accounts_by_id[pk]:
+                account.balance = balance
+    
+    @classmethod
+    def is_retryable(cls, error):
+        """Indique si une erreur base de données peut être rejouée"""
+        cause = error.__cause__ if error.__cause__ is not None else error
+        return getattr(cause, 'pgcode', None) in cls.RETRYABLE_SQLSTATES
+    
+    @classmethod
+    def get_metrics(cls):
+        """Retourne une copie des compteurs d'exécution et de reprise"""
+        with cls._metrics_lock:
+            return dict(cls._metrics)
+    
+    @classmethod
+    def reset_metrics(cls):
+        """Remet les compteurs à zéro"""
+        with cls._metrics_lock:
+            for key in cls._metrics:
+                cls._metrics[key] = 0
+    
+    @classmethod
+    def _increment(cls, key):
+        with cls._metrics_lock:
+            cls._metrics[key] += 1
+    
+    @classmethod
+    def _set_isolation_level(cls, isolation_level):
+        """Applique le niveau d'isolation à la transaction courante (PostgreSQL)"""
+        if not isolation_level or connection.vendor != 'postgresql':
+            return
+        
+        level = cls.ISOLATION_LEVELS.get(isolation_level.lower())
+        if level is None:
+            raise ValueError(f"Niveau d'isolation inconnu: {isolation_level}")
+        
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET TRANSACTION ISOLATION LEVEL {level}")
+    
+    @staticmethod
+    def _backoff_delay(attempt):
+        """Délai exponentiel avec gigue complète"""
+        ceiling = min(
+            settings.TRANSACTION_RETRY_MAX_DELAY,
+            settings.TRANSACTION_RETRY_BASE_DELAY * (2 ** (attempt - 1))
+        )
+        return random.uniform(0, ceiling)
@@ -0,0 +1,175 @@
+"""
+Export réglementaire de la table des transactions (CSV compressé en gzip)
+
+Les lignes sont lues par un curseur côté serveur, ou par COPY TO STDOUT sous
+PostgreSQL, et compressées à la volée : la mémoire reste bornée quel que soit
+le volume. La commande d'export découpe la période en jours, exportés en
+parallèle par un pool de processus ; les fichiers gzip produits peuvent être
+concaténés tels quels.
+
+Les mois archivés (voir archive) ne sont plus dans la table : leurs lignes
+sont relues dans les segments et précèdent celles de la table, les mois
+archivés étant toujours plus anciens que les mois restants.
+"""
+from django.conf import settings
+from django.db import connection, connections
+from django.utils import timezone
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+from .archive import archived_period_rows
+from .models import Transaction
+from .statements import Echo
+import csv
+import gzip
+import os
+import zlib
+
+EXPORT_COLUMNS = (
+    ('reference', 'reference'),
+    ('created_at', 'created_at'),
+    ('transaction_type', 'transaction_type'),
+    ('status', 'status'),
+    ('amount', 'amount'),
+    ('sender_username', 'sender_account__user__username'),
+    ('sender_phone', 'sender_account__user__phone_number'),
+    ('receiver_username', 'receiver_account__user__username'),
+    ('receiver_phone', 'receiver_account__user__phone_number'),
+    ('description', 'description'),
+)
+
+EXPORT_HEADER = tuple(name for name, _ in EXPORT_COLUMNS)
+
+
+def day_bounds(start_date, end_date):
+    """Bornes [début, fin[ d'une période de jours inclusifs, dans le fuseau local"""
+    return (
+        timezone.make_aware(datetime.combine(start_date, time.min)),
+        timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min)),
+    )
+
+
+def export_queryset(start_date, end_date):
+    """Transactions de la période, avec les identités des deux comptes"""
+    start, end = day_bounds(start_date, end_date)
+    return Transaction.objects.filter(
+        created_at__gte=start, created_at__lt=end
+    ).order_by('created_at', 'id').values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+
+
+def iter_archived_rows(start_date, end_date):
+    """Lignes d'export des transactions archivées de la période"""
+    for record in archived_period_rows(start_date, end_date):
+        yield tuple(record[name] for name in EXPORT_HEADER)
+
+
+def iter_csv(start_date, end_date):
+    """Produit l'export CSV de la période, en-tête compris, ligne par ligne"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    
+    for row in iter_archived_rows(start_date, end_date):
+        yield writer.writerow(row)
+    
+    rows = export_queryset(start_date, end_date).iterator(chunk_size=settings.REGULATOR_EXPORT_CHUNK_SIZE)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_gzip(chunks):
+    """
+    Compresse un flux de texte en gzip à la volée
+    
+    Les lignes sont regroupées jusqu'à environ 64 Ko avant compression pour
+    ne pas produire un bloc gzip par ligne.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 : en-tête gzip
+    buffer = []
+    size = 0
+    
+    for chunk in chunks:
+        data = chunk.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= 65536:
+            yield compressor.compress(b''.join(buffer))
+            buffer = []
+            size = 0
+    
+    yield compressor.compress(b''.join(buffer)) + compressor.flush()
+
+
+def copy_to(fileobj, start_date, end_date):
+    """
+    Écrit l'export CSV de la période dans un fichier binaire
+    
+    Sous PostgreSQL, la requête est passée à COPY TO STDOUT et le serveur
+    produit lui-même le CSV (après les lignes archivées) ; sinon, les lignes
+    sont lues par le curseur.
+    """
+    if connection.vendor == 'postgresql':
+        sql, params = export_queryset(start_date, end_date).query.sql_with_params()
+        with connection.cursor() as cursor:
+            query = cursor.mogrify(sql, params)
+            if isinstance(query, bytes):
+                query = query.decode()
+            fileobj.write((','.join(EXPORT_HEADER) + '\n').encode())
+            writer = csv.writer(Echo())
+            for row in iter_archived_rows(start_date, end_date):
+                fileobj.write(writer.writerow(row).encode())
+            cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH (FORMAT csv)', fileobj)
+        return
+    
+    for chunk in iter_csv(start_date, end_date):
+        fileobj.write(chunk.encode())
+
+
+def export_day(day, directory):
+    """
+    Exporte une journée dans un fichier transactions_AAAA-MM-JJ.csv.gz
+    
+    Returns:
+        str: Chemin du fichier écrit
+    """
+    path = os.path.join(directory, f'transactions_{day.isoformat()}.csv.gz')
+    tmp_path = f'{path}.part'
+    
+    with gzip.open(tmp_path, 'wb') as fileobj:
+        copy_to(fileobj, day, day)
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_range(start_date, end_date, directory, workers=1, progress=None):
+    """
+    Exporte une période, un fichier gzip par jour
+    
+    Args:
+        start_date: Premier jour inclus
+        end_date: Dernier jour inclus
+        directory: Dossier de destination
+        workers: Nombre de processus (1 pour exporter dans le processus courant)
+        progress: Callback optionnel appelé avec le chemin de chaque fichier terminé
+    
+    Returns:
+        list: Chemins des fichiers écrits, dans l'ordre des jours
+    """
+    os.makedirs(directory, exist_ok=True)
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    
+    if workers <= 1:
+        paths = []
+        for day in days:
+            paths.append(export_day(day, directory))
+            if progress:
+                progress(paths[-1])
+        return paths
+    
+    # Fermer les connexions avant le fork : chaque processus fils ouvre la sienne
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        paths = []
+        for path in pool.map(export_day, days, [directory] * len(days)):
+            paths.append(path)
+            if progress:
+                progress(path)
+        return paths
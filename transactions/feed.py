@@ -0,0 +1,144 @@
+"""
+Fil d'activité par compte (modèle de lecture de l'historique)
+
+Chaque transaction écrit une ligne par compte concerné, avec la contrepartie
+déjà résolue. L'historique d'un compte se lit alors par un parcours d'index
+sur (account, created_at, id), sans jointure ni OR entre émetteur et
+destinataire : le coût d'une page ne dépend plus de la taille de la table
+des transactions.
+"""
+from django.conf import settings
+from django.db import transaction
+from .models import Transaction, ActivityFeedEntry
+from .history import paginate
+
+FEED_FIELDS = (
+    'id', 'direction', 'transaction_type', 'amount', 'status',
+    'counterparty_username', 'counterparty_phone', 'reference', 'created_at',
+)
+
+
+def build_feed_entries(txn, entry_model=ActivityFeedEntry):
+    """
+    Construit les lignes du fil d'activité d'une transaction
+    
+    Les dépôts (émetteur = destinataire) et les retraits (sans destinataire)
+    ne concernent qu'un compte ; les transferts et commissions en concernent deux.
+    
+    Args:
+        txn: La transaction, avec sender_account.user et receiver_account.user chargés
+        entry_model: Le modèle de ligne à instancier
+    
+    Returns:
+        list: Les lignes du fil
+    """
+    def entry(account_id, direction, counterparty=None):
+        return entry_model(
+            account_id=account_id,
+            transaction_id=txn.pk,
+            direction=direction,
+            transaction_type=txn.transaction_type,
+            amount=txn.amount,
+            status=txn.status,
+            counterparty_username=counterparty.username if counterparty else '',
+            counterparty_phone=counterparty.phone_number if counterparty else '',
+            reference=txn.reference,
+            created_at=txn.created_at
+        )
+    
+    if txn.transaction_type == Transaction.DEPOSIT:
+        return [entry(txn.receiver_account_id, ActivityFeedEntry.IN)]
+    
+    if txn.receiver_account_id is None:
+        return [entry(txn.sender_account_id, ActivityFeedEntry.OUT)]
+    
+    sender = txn.sender_account.user
+    receiver = txn.receiver_account.user
+    return [
+        entry(txn.sender_account_id, ActivityFeedEntry.OUT, receiver),
+        entry(txn.receiver_account_id, ActivityFeedEntry.IN, sender),
+    ]
+
+
+def rebuild_feed(transaction_model, entry_model, chunk_size=1000, progress=None):
+    """
+    Régénère le fil d'activité à partir des transactions, par blocs
+    parcourus par clé primaire
+    
+    Chaque bloc remplace ses propres lignes dans une transaction : la
+    reconstruction peut tourner pendant que de nouvelles transactions
+    écrivent leurs lignes.
+    
+    Args:
+        progress: Callback optionnel appelé après chaque bloc avec
+            (dernière clé traitée, total repris)
+    
+    Returns:
+        int: Nombre de transactions reprises
+    """
+    last_pk = 0
+    total = 0
+    
+    while True:
+        transactions = list(
+            transaction_model.objects.filter(pk__gt=last_pk).order_by('pk').select_related(
+                'sender_account__user', 'receiver_account__user'
+            )[:chunk_size]
+        )
+        if not transactions:
+            return total
+        
+        entries = []
+        for txn in transactions:
+            entries.extend(build_feed_entries(txn, entry_model))
+        
+        with transaction.atomic():
+            entry_model.objects.filter(transaction_id__in=[txn.pk for txn in transactions]).delete()
+            entry_model.objects.bulk_create(entries)
+        
+        total += len(transactions)
+        last_pk = transactions[-1].pk
+        if progress:
+            progress(last_pk, total)
+
+
+class ActivityFeedService:
+    """
+    Service d'écriture et de lecture du fil d'activité
+    """
+    
+    @staticmethod
+    def record(*transactions):
+        """
+        Écrit les lignes du fil des transactions données (une seule requête)
+        Doit être appelé dans la transaction qui crée les Transaction.
+        
+        Args:
+            transactions: Les transactions créées
+        """
+        entries = []
+        for txn in transactions:
+            entries.extend(build_feed_entries(txn))
+        ActivityFeedEntry.objects.bulk_create(entries)
+    
+    @staticmethod
+    def get_page(account, cursor=None, page_size=None):
+        """
+        Retourne une page du fil d'un compte, de la plus récente à la plus ancienne
+        
+        Args:
+            account: Le compte virtuel
+            cursor: Curseur renvoyé par la page précédente (None pour la première page)
+            page_size: Nombre de lignes par page
+                (par défaut settings.TRANSACTION_HISTORY_PAGE_SIZE)
+        
+        Returns:
+            tuple: (entries: list, next_cursor: str or None)
+        """
+        page_size = page_size or settings.TRANSACTION_HISTORY_PAGE_SIZE
+        
+        entries = ActivityFeedEntry.objects.filter(
+            account=account
+        ).only(*FEED_FIELDS).order_by('-created_at', '-id')
+        
+        return paginate(entries, cursor, page_size)
@@ -2,7 +2,10 @@
 Formulaires pour les transactions
 """
 from django import forms
+from django.core.exceptions import ValidationError
+from core.phone import normalize_phone_number
 from decimal import Decimal
+import uuid
 
 
 class DepositForm(forms.Form):
@@ -31,6 +34,14 @@ class DepositForm(forms.Form):
         }),
         label='Description'
     )
+    
+    # Clé d'idempotence : une double soumission du formulaire n'exécute l'opération qu'une fois
+    idempotency_key = forms.CharField(
+        required=False,
+        max_length=64,
+        initial=lambda: uuid.uuid4().hex,
+        widget=forms.HiddenInput()
+    )
 
 
 class TransferForm(forms.Form):
@@ -69,6 +80,20 @@ class TransferForm(forms.Form):
         }),
         label='Description'
     )
+    
+    # Clé d'idempotence : une double soumission du formulaire n'exécute l'opération qu'une fois
+    idempotency_key = forms.CharField(
+        required=False,
+        max_length=64,
+        initial=lambda: uuid.uuid4().hex,
+        widget=forms.HiddenInput()
+    )
+    
+    def clean_receiver_phone(self):
+        receiver_phone = normalize_phone_number(self.cleaned_data.get('receiver_phone'))
+        if receiver_phone is None:
+            raise ValidationError('Numéro de téléphone invalide.')
+        return receiver_phone
 
 
 class WithdrawalForm(forms.Form):
@@ -97,6 +122,95 @@ class WithdrawalForm(forms.Form):
         }),
         label='Description'
     )
+    
+    # Clé d'idempotence : une double soumission du formulaire n'exécute l'opération qu'une fois
+    idempotency_key = forms.CharField(
+        required=False,
+        max_length=64,
+        initial=lambda: uuid.uuid4().hex,
+        widget=forms.HiddenInput()
+    )
+
+
+class StatementForm(forms.Form):
+    """
+    Formulaire de téléchargement du relevé (paramètres GET)
+    """
+    CSV = 'csv'
+    JSONL = 'jsonl'
+    
+    FORMATS = [
+        (CSV, 'CSV'),
+        (JSONL, 'JSON Lines'),
+    ]
+    
+    start_date = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': 'px-3 py-2 border border-gray-300 rounded-lg text-sm focus:ring-2 focus:ring-blue-500 focus:border-transparent'
+        }),
+        label='Du'
+    )
+    
+    end_date = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': 'px-3 py-2 border border-gray-300 rounded-lg text-sm focus:ring-2 focus:ring-blue-500 focus:border-transparent'
+        }),
+        label='Au'
+    )
+    
+    format = forms.ChoiceField(
+        choices=FORMATS,
+        required=False,
+        initial=CSV,
+        widget=forms.Select(attrs={
+            'class': 'px-3 py-2 border border-gray-300 rounded-lg text-sm focus:ring-2 focus:ring-blue-500 focus:border-transparent'
+        }),
+        label='Format'
+    )
+    
+    def clean_format(self):
+        return self.cleaned_data.get('format') or self.CSV
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise ValidationError('La date de début doit précéder la date de fin.')
+        return cleaned_data
+
+
+class RegulatorExportForm(forms.Form):
+    """
+    Formulaire d'export réglementaire des transactions (administrateurs)
+    """
+    start_date = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': 'px-3 py-2 border border-gray-300 rounded-lg text-sm focus:ring-2 focus:ring-purple-500 focus:border-transparent'
+        }),
+        label='Du'
+    )
+    
+    end_date = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': 'px-3 py-2 border border-gray-300 rounded-lg text-sm focus:ring-2 focus:ring-purple-500 focus:border-transparent'
+        }),
+        label='Au'
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise ValidationError('La date de début doit précéder la date de fin.')
+        return cleaned_data
 
 
 class WithdrawalOTPForm(forms.Form):
@@ -0,0 +1,122 @@
+"""
+Historique des transactions d'un compte, paginé par curseur
+
+Une seule requête couvre les transactions émises et reçues, avec les
+utilisateurs des deux comptes chargés par jointure. La pagination par clé
+(created_at, id) garde un coût constant quelle que soit la page, là où un
+OFFSET relirait toutes les lignes précédentes.
+
+La page est d'abord cherchée dans une fenêtre récente
+(TRANSACTION_RECENT_WINDOW_DAYS) : sur la table partitionnée par mois, la
+requête ne lit que les dernières partitions. Si la fenêtre ne suffit pas à
+remplir la page, la requête est relancée sans borne.
+"""
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
+from .models import Transaction
+import base64
+import binascii
+
+HISTORY_FIELDS = (
+    'id', 'transaction_type', 'amount', 'status', 'reference', 'description', 'created_at',
+    'sender_account', 'sender_account__user__username',
+    'receiver_account', 'receiver_account__user__username',
+)
+
+
+def encode_cursor(txn):
+    """Encode la position d'une transaction en curseur opaque pour l'URL"""
+    raw = f"{txn.created_at.isoformat()}|{txn.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Décode un curseur
+    
+    Returns:
+        tuple or None: (created_at, id), ou None si le curseur est invalide
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+def get_account_history(account, cursor=None, page_size=None):
+    """
+    Retourne une page de l'historique d'un compte, de la plus récente à la plus ancienne
+    
+    Args:
+        account: Le compte virtuel
+        cursor: Curseur renvoyé par la page précédente (None pour la première page)
+        page_size: Nombre de transactions par page
+            (par défaut settings.TRANSACTION_HISTORY_PAGE_SIZE)
+    
+    Returns:
+        tuple: (transactions: list, next_cursor: str or None)
+    """
+    page_size = page_size or settings.TRANSACTION_HISTORY_PAGE_SIZE
+    
+    transactions = Transaction.objects.filter(
+        Q(sender_account=account) | Q(receiver_account=account)
+    ).select_related(
+        'sender_account__user',
+        'receiver_account__user'
+    ).only(*HISTORY_FIELDS).order_by('-created_at', '-id')
+    
+    return paginate(transactions, cursor, page_size, window=timedelta(days=settings.TRANSACTION_RECENT_WINDOW_DAYS))
+
+
+def latest(queryset, limit, window, before=None):
+    """
+    Les limit premières lignes d'un queryset trié par date décroissante,
+    cherchées d'abord dans la fenêtre [before - window, before]
+    
+    Une requête si la fenêtre contient assez de lignes, deux sinon.
+    """
+    if window:
+        since = (before or timezone.now()) - window
+        rows = list(queryset.filter(created_at__gte=since)[:limit])
+        if len(rows) == limit:
+            return rows
+    return list(queryset[:limit])
+
+
+def paginate(queryset, cursor, page_size, window=None):
+    """
+    Découpe une page d'un queryset trié par (-created_at, -id)
+    
+    Args:
+        window: Si fourni, la page est d'abord cherchée dans cette durée
+            avant la position du curseur
+    
+    Returns:
+        tuple: (lignes: list, next_cursor: str or None)
+    """
+    before = None
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, pk = position
+        before = created_at
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    page = latest(queryset, page_size + 1, window, before)
+    if len(page) > page_size:
+        page = page[:page_size]
+        return page, encode_cursor(page[-1])
+    return page, None
@@ -0,0 +1,175 @@
+"""
+Clés d'idempotence des dépôts, transferts et retraits
+
+Une requête rejouée (réseau instable, double soumission) avec la même clé
+renvoie le résultat d'origine sans refaire aucune écriture de solde.
+Seules les opérations réussies sont enregistrées : après un échec, rien n'a
+été écrit et le client peut réessayer avec la même clé.
+"""
+from django.db import transaction, IntegrityError
+from django.conf import settings
+from collections import OrderedDict
+from .models import Transaction, IdempotencyKey
+from .executor import TransactionExecutor
+import threading
+import logging
+
+logger = logging.getLogger('transactions')
+
+
+class IdempotencyConflict(Exception):
+    """Une requête concurrente a enregistré la même clé"""
+
+
+class IdempotencyService:
+    """
+    Magasin des clés d'idempotence : table avec contrainte d'unicité
+    (compte, clé) et cache LRU en mémoire pour les rejeux fréquents.
+    Le cache n'est alimenté qu'après la validation de la transaction.
+    """
+    
+    _entries = OrderedDict()  # (id du compte, clé) -> (opération, résultat)
+    _lock = threading.Lock()
+    
+    @classmethod
+    def lookup(cls, account, key, operation):
+        """
+        Retourne le résultat d'origine d'une requête déjà traitée
+        
+        Args:
+            account: Le compte à l'origine de la requête
+            key: La clé d'idempotence (None si absente)
+            operation: Le type d'opération (Transaction.DEPOSIT, ...)
+        
+        Returns:
+            tuple or None: (success, message, résultat) d'origine, ou None
+        """
+        if not key:
+            return None
+        
+        cache_key = (account.pk, key)
+        with cls._lock:
+            entry = cls._entries.get(cache_key)
+            if entry is not None:
+                cls._entries.move_to_end(cache_key)
+        
+        if entry is None:
+            record = IdempotencyKey.objects.select_related(
+                'transaction', 'fee_transaction'
+            ).filter(account=account, key=key).first()
+            if record is None:
+                return None
+            entry = (record.operation, cls._to_result(record))
+            cls._store(cache_key, entry)
+        
+        stored_operation, result = entry
+        if stored_operation != operation:
+            return False, "Cette clé d'idempotence a déjà été utilisée pour une autre opération", None
+        
+        logger.info(f"Requête rejouée (clé {key}) pour le compte #{account.pk}: résultat d'origine renvoyé")
+        return cls._copy_result(result)
+    
+    @classmethod
+    def run(cls, account, key, operation, execute, accounts=()):
+        """
+        Exécute une opération via TransactionExecutor en enregistrant sa clé
+        dans la même transaction
+        
+        Args:
+            account: Le compte à l'origine de la requête
+            key: La clé d'idempotence (None pour une exécution simple)
+            operation: Le type d'opération
+            execute: Fonction sans argument retournant (success, message, résultat)
+            accounts: Les comptes à verrouiller
+        
+        Returns:
+            tuple: (success, message, résultat)
+        """
+        if not key:
+            return TransactionExecutor.run(execute, accounts=accounts)
+        
+        def execute_and_record():
+            result = execute()
+            if result[0]:
+                cls._record(account, key, operation, result)
+            return result
+        
+        try:
+            return TransactionExecutor.run(execute_and_record, accounts=accounts)
+        except IdempotencyConflict:
+            # La requête concurrente a validé en premier : renvoyer son résultat
+            return cls.lookup(account, key, operation)
+    
+    @classmethod
+    def purge(cls, older_than):
+        """
+        Supprime les clés enregistrées avant la date donnée
+        
+        Returns:
+            int: Nombre de clés supprimées
+        """
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=older_than).delete()
+        cls.clear()
+        return deleted
+    
+    @classmethod
+    def clear(cls):
+        """Vide le cache"""
+        with cls._lock:
+            cls._entries.clear()
+    
+    @classmethod
+    def _record(cls, account, key, operation, result):
+        """Enregistre la clé dans la transaction courante"""
+        success, message, payload = result
+        if operation == Transaction.WITHDRAWAL:
+            txn, fee_txn = payload['withdrawal'], payload['fee']
+        else:
+            txn, fee_txn = payload, None
+        
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    account=account,
+                    key=key,
+                    operation=operation,
+                    transaction=txn,
+                    fee_transaction=fee_txn,
+                    message=message[:255]
+                )
+        except IntegrityError:
+            raise IdempotencyConflict(key)
+        
+        cache_key = (account.pk, key)
+        transaction.on_commit(lambda: cls._store(cache_key, (operation, result)))
+    
+    @classmethod
+    def _store(cls, cache_key, entry):
+        with cls._lock:
+            cls._entries[cache_key] = entry
+            cls._entries.move_to_end(cache_key)
+            while len(cls._entries) > settings.IDEMPOTENCY_CACHE_SIZE:
+                cls._entries.popitem(last=False)
+    
+    @staticmethod
+    def _to_result(record):
+        """Reconstruit le résultat d'origine à partir de la clé enregistrée"""
+        if record.operation != Transaction.WITHDRAWAL:
+            return True, record.message, record.transaction
+        
+        withdrawal_txn, fee_txn = record.transaction, record.fee_transaction
+        return True, record.message, {
+            'withdrawal': withdrawal_txn,
+            'fee': fee_txn,
+            'withdrawal_amount': withdrawal_txn.amount,
+            'fee_amount': fee_txn.amount,
+            'total_amount': withdrawal_txn.amount + fee_txn.amount
+        }
+    
+    @staticmethod
+    def _copy_result(result):
+        """Évite que l'appelant modifie le dictionnaire partagé du cache"""
+        success, message, payload = result
+        if isinstance(payload, dict):
+            payload = dict(payload)
+        return success, message, payload
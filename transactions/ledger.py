@@ -0,0 +1,203 @@
+"""
+Grand livre en partie double et points de solde
+
+Chaque transaction produit une écriture au débit et une au crédit.
+Le solde d'un compte à une date donnée se calcule à partir du point de solde
+le plus proche et des écritures qui le suivent, sans parcourir tout l'historique.
+"""
+from django.db import transaction
+from django.db.models import Sum, Count, Case, When, F, Q, Exists, OuterRef, Subquery, DecimalField
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from core.models import VirtualAccount
+from .models import Transaction, LedgerEntry, BalanceCheckpoint
+import logging
+
+logger = logging.getLogger('transactions')
+
+# Montant signé du point de vue du compte : crédit positif, débit négatif
+SIGNED_AMOUNT = Case(
+    When(direction=LedgerEntry.CREDIT, then=F('amount')),
+    default=-F('amount'),
+    output_field=DecimalField(max_digits=14, decimal_places=2)
+)
+
+
+def build_entries(txn, entry_model=LedgerEntry):
+    """
+    Construit les deux écritures (débit, crédit) d'une transaction
+    
+    Args:
+        txn: La transaction (éventuellement un modèle historique, en migration)
+        entry_model: Le modèle d'écriture à instancier
+    
+    Returns:
+        list: [écriture au débit, écriture au crédit]
+    """
+    if txn.transaction_type == Transaction.DEPOSIT:
+        # Les fonds viennent de l'extérieur de la plateforme
+        debit_account_id = None
+    else:
+        debit_account_id = txn.sender_account_id
+    
+    # receiver_account est NULL pour les retraits : les fonds sortent de la plateforme
+    credit_account_id = txn.receiver_account_id
+    
+    return [
+        entry_model(
+            transaction_id=txn.pk,
+            account_id=debit_account_id,
+            direction=LedgerEntry.DEBIT,
+            amount=txn.amount,
+            created_at=txn.created_at
+        ),
+        entry_model(
+            transaction_id=txn.pk,
+            account_id=credit_account_id,
+            direction=LedgerEntry.CREDIT,
+            amount=txn.amount,
+            created_at=txn.created_at
+        ),
+    ]
+
+
+def backfill_ledger(transaction_model, entry_model, chunk_size=1000):
+    """
+    Génère les écritures des transactions existantes par blocs,
+    en parcourant la table par clé primaire
+    
+    Returns:
+        int: Nombre de transactions reprises
+    """
+    last_pk = 0
+    total = 0
+    
+    while True:
+        transactions = list(
+            transaction_model.objects.filter(
+                pk__gt=last_pk, status=Transaction.COMPLETED
+            ).order_by('pk').only(
+                'pk', 'transaction_type', 'amount', 'sender_account_id', 'receiver_account_id', 'created_at'
+            )[:chunk_size]
+        )
+        if not transactions:
+            return total
+        
+        entries = []
+        for txn in transactions:
+            entries.extend(build_entries(txn, entry_model))
+        entry_model.objects.bulk_create(entries)
+        
+        total += len(transactions)
+        last_pk = transactions[-1].pk
+
+
+class LedgerService:
+    """
+    Service d'écriture et de lecture du grand livre
+    """
+    
+    @staticmethod
+    def record(*transactions):
+        """
+        Écrit les écritures des transactions données (une seule requête)
+        Doit être appelé dans la transaction qui crée les Transaction.
+        
+        Args:
+            transactions: Les transactions complétées
+        """
+        entries = []
+        for txn in transactions:
+            for entry in build_entries(txn):
+                entry.transaction_reference = txn.reference
+                entries.append(entry)
+        LedgerEntry.objects.bulk_create(entries)
+    
+    @staticmethod
+    def balance_at(account, at=None):
+        """
+        Calcule le solde d'un compte à une date donnée
+        
+        Args:
+            account: Le compte virtuel
+            at: La date (par défaut maintenant)
+        
+        Returns:
+            Decimal: Le solde, toutes écritures jusqu'à la date incluse
+        """
+        at = at or timezone.now()
+        
+        checkpoint = BalanceCheckpoint.objects.filter(
+            account=account, as_of__lte=at
+        ).order_by('-as_of').only('as_of', 'balance').first()
+        
+        entries = LedgerEntry.objects.filter(account=account, created_at__lte=at)
+        if checkpoint is not None:
+            entries = entries.filter(created_at__gt=checkpoint.as_of)
+        tail = entries.aggregate(total=Sum(SIGNED_AMOUNT))['total'] or Decimal('0')
+        
+        opening = checkpoint.balance if checkpoint is not None else Decimal('0')
+        return opening + tail
+    
+    @staticmethod
+    def create_checkpoints(as_of=None):
+        """
+        Crée un point de solde pour chaque compte ayant des écritures depuis
+        son dernier point
+        
+        Args:
+            as_of: Date d'arrêté (par défaut maintenant moins
+                settings.LEDGER_CHECKPOINT_LAG, pour laisser les transactions
+                en cours se terminer)
+        
+        Returns:
+            int: Nombre de points créés
+        """
+        as_of = as_of or timezone.now() - timedelta(seconds=settings.LEDGER_CHECKPOINT_LAG)
+        
+        latest = BalanceCheckpoint.objects.filter(account=OuterRef('pk')).order_by('-as_of')
+        new_entries = LedgerEntry.objects.filter(account=OuterRef('pk'), created_at__lte=as_of)
+        
+        accounts = VirtualAccount.objects.annotate(
+            last_as_of=Subquery(latest.values('as_of')[:1]),
+            last_balance=Subquery(latest.values('balance')[:1]),
+            has_entries=Exists(new_entries),
+            has_new_entries=Exists(new_entries.filter(created_at__gt=OuterRef('last_as_of'))),
+        ).filter(
+            Q(last_as_of__isnull=True, has_entries=True) |
+            Q(last_as_of__lt=as_of, has_new_entries=True)
+        ).only('pk')
+        
+        checkpoints = []
+        for account in accounts.iterator():
+            entries = LedgerEntry.objects.filter(account_id=account.pk, created_at__lte=as_of)
+            if account.last_as_of is not None:
+                entries = entries.filter(created_at__gt=account.last_as_of)
+            tail = entries.aggregate(total=Sum(SIGNED_AMOUNT), count=Count('id'))
+            
+            checkpoints.append(BalanceCheckpoint(
+                account_id=account.pk,
+                as_of=as_of,
+                balance=(account.last_balance or Decimal('0')) + (tail['total'] or Decimal('0')),
+                entry_count=tail['count']
+            ))
+        
+        with transaction.atomic():
+            BalanceCheckpoint.objects.bulk_create(checkpoints, batch_size=1000)
+        
+        logger.info(f"{len(checkpoints)} point(s) de solde créé(s) au {as_of}")
+        return len(checkpoints)
+    
+    @staticmethod
+    def verify(account):
+        """
+        Compare le solde du compte au solde calculé par le grand livre
+        
+        Returns:
+            tuple: (is_consistent: bool, ledger_balance: Decimal, account_balance: Decimal)
+        """
+        ledger_balance = LedgerService.balance_at(account)
+        account_balance = account.logical_balance
+        return ledger_balance == account_balance, ledger_balance, account_balance
@@ -0,0 +1,40 @@
+"""
+Commande d'agrégation quotidienne des transactions (à planifier, ex. toutes les heures)
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from transactions.rollups import run_rollup
+
+
+class Command(BaseCommand):
+    help = 'Agrège les transactions par jour, type et statut depuis le dernier passage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Recalcule à partir de ce jour (AAAA-MM-JJ) au lieu du dernier jour agrégé'
+        )
+        parser.add_argument(
+            '--late-days',
+            type=int,
+            default=None,
+            help='Jours recalculés avant le dernier jour agrégé (transactions tardives)'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError('Date invalide, format attendu: AAAA-MM-JJ')
+
+        result = run_rollup(since=since, late_days=options['late_days'])
+
+        if result is None:
+            self.stdout.write(self.style.WARNING('→ Aucune transaction à agréger'))
+            return
+
+        start_day, end_day, written = result
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Agrégats du {start_day} au {end_day} recalculés ({written} ligne(s))'
+        ))
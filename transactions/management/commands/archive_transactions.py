@@ -0,0 +1,34 @@
+"""
+Commande d'archivage des transactions anciennes (à planifier, ex. chaque mois)
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from transactions.archive import archive_old_transactions
+
+
+class Command(BaseCommand):
+    help = 'Archive les mois de transactions antérieurs à l\'horizon dans des fichiers compressés'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days',
+            type=int,
+            default=settings.TRANSACTION_ARCHIVE_HORIZON_DAYS,
+            help='Âge (en jours) au-delà duquel un mois complet est archivé'
+        )
+        parser.add_argument(
+            '--output',
+            default=settings.TRANSACTION_ARCHIVE_DIR,
+            help='Dossier des segments d\'archive'
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING(
+            f'Archivage des transactions de plus de {options["horizon_days"]} jours...'
+        ))
+        
+        def progress(segment):
+            self.stdout.write(f'  {segment.month:%Y-%m}: {segment.row_count} transaction(s) → {segment.path}')
+        
+        segments = archive_old_transactions(options['horizon_days'], options['output'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(segments)} mois archivé(s)'))
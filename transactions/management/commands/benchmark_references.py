@@ -0,0 +1,96 @@
+"""
+Commande de mesure : débit d'insertion et taille de l'index unique selon
+le format des références de transaction (fragment d'UUID aléatoire ou ULID)
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from transactions.references import generate_reference
+import time
+import uuid
+
+
+def legacy_reference():
+    """Ancien format : 12 caractères hexadécimaux d'un UUID4"""
+    return f"TXN-{uuid.uuid4().hex[:12].upper()}"
+
+
+class Command(BaseCommand):
+    help = 'Compare le débit d\'insertion et la taille d\'index des références UUID et ULID'
+    
+    GENERATORS = [
+        ('uuid4', legacy_reference),
+        ('ulid', generate_reference),
+    ]
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10_000_000,
+            help='Nombre de références insérées par format'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10_000,
+            help='Nombre de lignes insérées par transaction'
+        )
+    
+    def handle(self, *args, **options):
+        rows = options['rows']
+        batch_size = options['batch_size']
+        
+        self.stdout.write(self.style.WARNING(
+            f'Mesure sur {rows} références par format ({connection.vendor})...'
+        ))
+        
+        for name, generator in self.GENERATORS:
+            inserted, elapsed, index_size = self._run(name, generator, rows, batch_size)
+            size_display = f'{index_size / (1024 * 1024):.1f} Mo' if index_size is not None else 'n/d'
+            self.stdout.write(
+                f'{name:>6}: {inserted / elapsed:,.0f} insertions/s | '
+                f'index: {size_display} | collisions: {rows - inserted}'
+            )
+        
+        self.stdout.write(self.style.SUCCESS('✓ Mesure terminée'))
+    
+    def _run(self, name, generator, rows, batch_size):
+        """Insère les références dans une table jetable et mesure le résultat"""
+        table = f'benchmark_reference_{name}'
+        
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+            cursor.execute(f'CREATE TABLE {table} (reference varchar(100) NOT NULL UNIQUE)')
+            
+            try:
+                started_at = time.perf_counter()
+                remaining = rows
+                while remaining:
+                    count = min(batch_size, remaining)
+                    with transaction.atomic():
+                        cursor.executemany(
+                            f'INSERT INTO {table} (reference) VALUES (%s) ON CONFLICT DO NOTHING',
+                            [(generator(),) for _ in range(count)]
+                        )
+                    remaining -= count
+                    
+                    done = rows - remaining
+                    if done % (batch_size * 100) == 0:
+                        self.stdout.write(f'  → {name}: {done} lignes')
+                elapsed = time.perf_counter() - started_at
+                
+                cursor.execute(f'SELECT COUNT(*) FROM {table}')
+                inserted = cursor.fetchone()[0]
+                index_size = self._index_size(cursor, table)
+            finally:
+                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        
+        return inserted, elapsed, index_size
+    
+    @staticmethod
+    def _index_size(cursor, table):
+        """Taille de l'index unique en octets (PostgreSQL uniquement)"""
+        if connection.vendor != 'postgresql':
+            return None
+        cursor.execute('SELECT pg_indexes_size(%s::regclass)', [table])
+        return cursor.fetchone()[0]
@@ -0,0 +1,27 @@
+"""
+Commande pour reverser les sous-soldes des comptes très sollicités dans leur solde principal
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from core.models import VirtualAccount
+from transactions.services import BalanceService
+from transactions.stats import AccountStatsService
+
+
+class Command(BaseCommand):
+    help = 'Consolide les sous-soldes (plateforme, gros marchands) dans le solde principal des comptes, ainsi que leurs statistiques'
+    
+    def handle(self, *args, **options):
+        accounts = VirtualAccount.objects.select_related('user').filter(
+            Q(stripe_count__gt=0) | Q(stripes__balance__gt=0) | Q(stripes__balance__lt=0)
+        ).distinct()
+        
+        total_accounts = 0
+        for account in accounts:
+            amount = BalanceService.consolidate_stripes(account)
+            if account.stripe_count:
+                AccountStatsService.consolidate(account)
+            total_accounts += 1
+            self.stdout.write(f'{account.user.username}: {amount} FCFA consolidés | Solde: {account.balance} FCFA')
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ {total_accounts} compte(s) consolidé(s)'))
@@ -0,0 +1,39 @@
+"""
+Commande pour arrêter périodiquement les soldes des comptes à partir du grand livre
+"""
+from django.core.management.base import BaseCommand
+from core.models import VirtualAccount
+from transactions.ledger import LedgerService
+
+
+class Command(BaseCommand):
+    help = 'Crée un point de solde pour chaque compte ayant de nouvelles écritures'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Compare ensuite le solde de chaque compte au solde du grand livre'
+        )
+    
+    def handle(self, *args, **options):
+        created = LedgerService.create_checkpoints()
+        self.stdout.write(self.style.SUCCESS(f'✓ {created} point(s) de solde créé(s)'))
+        
+        if not options['verify']:
+            return
+        
+        mismatches = 0
+        for account in VirtualAccount.objects.select_related('user').iterator():
+            is_consistent, ledger_balance, account_balance = LedgerService.verify(account)
+            if not is_consistent:
+                mismatches += 1
+                self.stdout.write(self.style.WARNING(
+                    f'→ {account.user.username}: solde {account_balance} FCFA, '
+                    f'grand livre {ledger_balance} FCFA'
+                ))
+        
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f'→ {mismatches} compte(s) en écart avec le grand livre'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ Tous les soldes correspondent au grand livre'))
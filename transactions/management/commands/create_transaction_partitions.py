@@ -0,0 +1,30 @@
+"""
+Commande pour créer à l'avance les partitions mensuelles des transactions
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from transactions.partitions import ensure_partitions
+
+
+class Command(BaseCommand):
+    help = 'Crée les partitions mensuelles des transactions pour les mois à venir'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=settings.TRANSACTION_PARTITION_MONTHS_AHEAD,
+            help='Nombre de mois à couvrir après le mois courant'
+        )
+    
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING('→ Partitionnement disponible uniquement sous PostgreSQL'))
+            return
+        
+        created = ensure_partitions(options['months'])
+        
+        for name in created:
+            self.stdout.write(f'  + {name}')
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(created)} partition(s) créée(s)'))
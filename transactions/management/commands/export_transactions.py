@@ -0,0 +1,45 @@
+"""
+Commande d'export réglementaire des transactions, un fichier gzip par jour
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from transactions.exports import export_range
+
+
+class Command(BaseCommand):
+    help = 'Exporte les transactions d\'une période (identités incluses) en CSV gzip, un fichier par jour'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('start', help='Premier jour inclus (AAAA-MM-JJ)')
+        parser.add_argument('end', help='Dernier jour inclus (AAAA-MM-JJ)')
+        parser.add_argument(
+            '--output',
+            default=settings.REGULATOR_EXPORT_DIR,
+            help='Dossier de destination des fichiers'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.REGULATOR_EXPORT_WORKERS,
+            help='Nombre de jours exportés en parallèle'
+        )
+    
+    def handle(self, *args, **options):
+        start_date = parse_date(options['start'])
+        end_date = parse_date(options['end'])
+        if start_date is None or end_date is None:
+            raise CommandError('Dates invalides, format attendu: AAAA-MM-JJ')
+        if start_date > end_date:
+            raise CommandError('La date de début doit précéder la date de fin')
+        
+        self.stdout.write(self.style.WARNING(
+            f'Export des transactions du {start_date} au {end_date} ({options["workers"]} processus)...'
+        ))
+        
+        def progress(path):
+            self.stdout.write(f'  → {path}')
+        
+        paths = export_range(start_date, end_date, options['output'], workers=options['workers'], progress=progress)
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(paths)} fichier(s) écrit(s) dans {options["output"]}'))
@@ -0,0 +1,129 @@
+"""
+Commande pour importer un fichier de décaissements (CSV ou JSONL)
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from transactions.models import DisbursementBatch
+from transactions.disbursements import DisbursementProcessor, DisbursementBatchBusy
+import os
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Importe un fichier de décaissements par blocs avec reprise automatique après incident'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('file', nargs='?', help='Chemin du fichier CSV (phone,amount,description) ou JSONL')
+        parser.add_argument('--sender', help="Nom d'utilisateur ou numéro de téléphone du compte émetteur")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Format du fichier (déduit de l\'extension par défaut)')
+        parser.add_argument('--description', default='Décaissement', help='Description par défaut des transferts')
+        parser.add_argument('--chunk-size', type=int, help='Nombre de lignes par bloc')
+        parser.add_argument('--batch', type=int, help='Identifiant d\'un lot existant à reprendre')
+        parser.add_argument('--pending', action='store_true', help='Traite les lots en attente (mis en file depuis l\'admin)')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Reprend un lot en cours dont le bail n\'a pas expiré (traitement précédent arrêté avec certitude)'
+        )
+    
+    def handle(self, *args, **options):
+        if options['pending']:
+            pending = DisbursementBatch.objects.select_related('sender_account__user').filter(
+                status=DisbursementBatch.PENDING
+            ).order_by('created_at')
+            for batch in pending:
+                self._process(batch, options)
+            return
+        
+        self._process(self._get_batch(options), options)
+    
+    def _process(self, batch, options):
+        """Traite un lot en affichant sa progression"""
+        if batch.status == DisbursementBatch.COMPLETED:
+            self.stdout.write(self.style.WARNING(f'→ Le lot #{batch.pk} est déjà terminé'))
+            return
+        
+        if batch.records_processed:
+            self.stdout.write(self.style.WARNING(
+                f'Reprise du lot #{batch.pk} après {batch.records_processed} lignes...'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(f'Traitement du lot #{batch.pk}...'))
+        
+        try:
+            batch = DisbursementProcessor.process(
+                batch,
+                chunk_size=options['chunk_size'],
+                progress=self._report_progress,
+                force=options['force']
+            )
+        except DisbursementBatchBusy as e:
+            raise CommandError(
+                f'{str(e)}. Attendez la fin du bail ou, si le traitement précédent est arrêté, '
+                f'relancez avec --batch {batch.pk} --force.'
+            )
+        except Exception as e:
+            raise CommandError(
+                f'Le lot #{batch.pk} a échoué après {batch.records_processed} lignes: {str(e)}. '
+                f'Relancez la commande avec --batch {batch.pk} pour reprendre.'
+            )
+        
+        self.stdout.write(self.style.SUCCESS('\n' + '='*50))
+        self.stdout.write(self.style.SUCCESS(f'LOT #{batch.pk} TERMINÉ'))
+        self.stdout.write(self.style.SUCCESS('='*50))
+        self.stdout.write(f'Lignes traitées: {batch.records_processed}')
+        self.stdout.write(f'Transferts réussis: {batch.succeeded_count}')
+        self.stdout.write(f'Transferts rejetés: {batch.failed_count}')
+        self.stdout.write(f'Montant transféré: {batch.total_amount} FCFA')
+    
+    def _get_batch(self, options):
+        """Récupère le lot à reprendre ou en crée un nouveau"""
+        if options['batch']:
+            try:
+                return DisbursementBatch.objects.select_related('sender_account__user').get(pk=options['batch'])
+            except DisbursementBatch.DoesNotExist:
+                raise CommandError(f"Lot #{options['batch']} introuvable")
+        
+        if not options['file'] or not options['sender']:
+            raise CommandError('Indiquez un fichier et --sender, ou --batch pour reprendre un lot')
+        
+        source_path = os.path.abspath(options['file'])
+        if not os.path.isfile(source_path):
+            raise CommandError(f'Fichier introuvable: {source_path}')
+        
+        sender = User.objects.select_related('virtual_account').filter(
+            username=options['sender']
+        ).first() or User.objects.select_related('virtual_account').filter(
+            phone_number=options['sender']
+        ).first()
+        if sender is None or not hasattr(sender, 'virtual_account'):
+            raise CommandError(f"Compte émetteur introuvable: {options['sender']}")
+        
+        # Reprendre automatiquement un lot interrompu sur le même fichier
+        batch = DisbursementBatch.objects.filter(
+            sender_account=sender.virtual_account,
+            source_path=source_path,
+        ).exclude(status=DisbursementBatch.COMPLETED).first()
+        if batch is not None:
+            return batch
+        
+        file_format = options['format']
+        if file_format is None:
+            file_format = DisbursementBatch.JSONL if source_path.endswith(('.jsonl', '.ndjson')) else DisbursementBatch.CSV
+        
+        return DisbursementBatch.objects.create(
+            sender_account=sender.virtual_account,
+            source_path=source_path,
+            file_format=file_format,
+            description=options['description'],
+        )
+    
+    def _report_progress(self, progress):
+        """Affiche la progression après chaque bloc"""
+        self.stdout.write(
+            f"Bloc {progress['chunk']}: {progress['chunk_size']} lignes "
+            f"({progress['chunk_rate']:.0f} lignes/s) | "
+            f"Total: {progress['records_processed']} lignes, "
+            f"{progress['succeeded']} réussis, {progress['failed']} rejetés | "
+            f"Débit moyen: {progress['rate']:.0f} lignes/s"
+        )
@@ -0,0 +1,25 @@
+"""
+Commande pour supprimer les clés d'idempotence expirées
+"""
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+from transactions.idempotency import IdempotencyService
+
+
+class Command(BaseCommand):
+    help = 'Supprime les clés d\'idempotence plus anciennes que la durée de conservation'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.IDEMPOTENCY_KEY_RETENTION_DAYS,
+            help='Durée de conservation des clés, en jours'
+        )
+    
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(days=options['days'])
+        deleted = IdempotencyService.purge(older_than)
+        self.stdout.write(self.style.SUCCESS(f'✓ {deleted} clé(s) d\'idempotence supprimée(s)'))
@@ -0,0 +1,28 @@
+"""
+Commande pour régénérer le fil d'activité des comptes à partir des transactions
+"""
+from django.core.management.base import BaseCommand
+from transactions.models import Transaction, ActivityFeedEntry
+from transactions.feed import rebuild_feed
+
+
+class Command(BaseCommand):
+    help = 'Régénère le fil d\'activité (historique dénormalisé) à partir de la table des transactions, par blocs'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Nombre de transactions traitées par bloc'
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Reconstruction du fil d\'activité...'))
+        
+        def progress(last_pk, total):
+            self.stdout.write(f'  → Jusqu\'à la transaction #{last_pk}: {total} reprise(s)')
+        
+        total = rebuild_feed(Transaction, ActivityFeedEntry, chunk_size=options['chunk_size'], progress=progress)
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ {total} transaction(s) reprise(s) dans le fil d\'activité'))
@@ -0,0 +1,34 @@
+"""
+Commande pour vérifier (et corriger) les statistiques tenues à jour des comptes
+"""
+from django.core.management.base import BaseCommand
+from transactions.stats import AccountStatsService
+
+
+class Command(BaseCommand):
+    help = 'Recalcule en bloc les statistiques des comptes et signale (ou corrige) les écarts'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Remplace les statistiques en écart par les valeurs recalculées'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Nombre de comptes recalculés par bloc'
+        )
+    
+    def handle(self, *args, **options):
+        mismatched = AccountStatsService.verify(fix=options['fix'], chunk_size=options['chunk_size'])
+        
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS('✓ Toutes les statistiques correspondent aux transactions'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'✓ {len(mismatched)} compte(s) corrigé(s)'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'→ {len(mismatched)} compte(s) en écart, relancez avec --fix pour corriger'
+            ))
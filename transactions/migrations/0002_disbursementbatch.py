@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_user_managers'),
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DisbursementBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upload', models.FileField(blank=True, help_text='Fichier CSV (phone,amount,description) ou JSONL', upload_to='disbursements/', verbose_name='Fichier')),
+                ('source_path', models.CharField(blank=True, help_text="Chemin local du fichier lorsqu'il est importé en ligne de commande", max_length=500, verbose_name='Chemin du fichier')),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')], default='csv', max_length=10, verbose_name='Format')),
+                ('description', models.CharField(blank=True, default='Décaissement', max_length=200, verbose_name='Description par défaut')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('completed', 'Terminé'), ('failed', 'Échoué')], default='pending', max_length=20, verbose_name='Statut')),
+                ('records_processed', models.PositiveIntegerField(default=0, help_text='Point de reprise : nombre de lignes déjà traitées', verbose_name='Lignes traitées')),
+                ('succeeded_count', models.PositiveIntegerField(default=0, verbose_name='Transferts réussis')),
+                ('failed_count', models.PositiveIntegerField(default=0, verbose_name='Transferts rejetés')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Montant transféré')),
+                ('last_error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+                ('sender_account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='disbursement_batches', to='core.virtualaccount', verbose_name='Compte émetteur')),
+            ],
+            options={
+                'verbose_name': 'Lot de décaissements',
+                'verbose_name_plural': 'Lots de décaissements',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
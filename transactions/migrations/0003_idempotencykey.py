@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_phone_e164'),
+        ('transactions', '0002_disbursementbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Identifiant unique de la requête, généré par le client', max_length=64, verbose_name='Clé')),
+                ('operation', models.CharField(choices=[('deposit', 'Dépôt'), ('transfer', 'Transfert'), ('withdrawal', 'Retrait'), ('fee', 'Commission')], max_length=20, verbose_name='Opération')),
+                ('message', models.CharField(max_length=255, verbose_name='Message de résultat')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to='core.virtualaccount', verbose_name='Compte')),
+                ('fee_transaction', models.ForeignKey(blank=True, help_text='Uniquement pour les retraits', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='transactions.transaction', verbose_name='Transaction de commission')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='transactions.transaction', verbose_name='Transaction')),
+            ],
+            options={
+                'verbose_name': "Clé d'idempotence",
+                'verbose_name_plural': "Clés d'idempotence",
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='transaction_created_7cff80_idx')],
+                'constraints': [models.UniqueConstraint(fields=('account', 'key'), name='unique_idempotency_key')],
+            },
+        ),
+    ]
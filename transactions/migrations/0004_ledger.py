@@ -0,0 +1,56 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_ledger(apps, schema_editor):
+    from transactions.ledger import backfill_ledger as backfill
+    backfill(apps.get_model('transactions', 'Transaction'), apps.get_model('transactions', 'LedgerEntry'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_phone_e164'),
+        ('transactions', '0003_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField(help_text="Le solde inclut toutes les écritures jusqu'à cette date incluse", verbose_name='Arrêté au')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Solde')),
+                ('entry_count', models.PositiveIntegerField(default=0, verbose_name='Écritures depuis le point précédent')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to='core.virtualaccount', verbose_name='Compte')),
+            ],
+            options={
+                'verbose_name': 'Point de solde',
+                'verbose_name_plural': 'Points de solde',
+                'ordering': ['-as_of'],
+                'indexes': [models.Index(fields=['account', '-as_of'], name='transaction_account_d257a5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('account', 'as_of'), name='unique_balance_checkpoint')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('direction', models.CharField(choices=[('debit', 'Débit'), ('credit', 'Crédit')], max_length=6, verbose_name='Sens')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Montant')),
+                ('created_at', models.DateTimeField(verbose_name="Date de l'écriture")),
+                ('account', models.ForeignKey(blank=True, help_text='NULL pour la contrepartie externe (dépôts et retraits)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='core.virtualaccount', verbose_name='Compte')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='transactions.transaction', verbose_name='Transaction')),
+            ],
+            options={
+                'verbose_name': 'Écriture comptable',
+                'verbose_name_plural': 'Écritures comptables',
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['account', 'created_at'], name='transaction_account_f1758b_idx'), models.Index(fields=['created_at'], name='transaction_created_db5828_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_ledger'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_referen_923a88_idx',
+        ),
+    ]
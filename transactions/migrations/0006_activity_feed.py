@@ -0,0 +1,44 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def rebuild_feed(apps, schema_editor):
+    from transactions.feed import rebuild_feed as rebuild
+    rebuild(apps.get_model('transactions', 'Transaction'), apps.get_model('transactions', 'ActivityFeedEntry'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_phone_e164'),
+        ('transactions', '0005_remove_redundant_reference_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('direction', models.CharField(choices=[('in', 'Entrant'), ('out', 'Sortant')], max_length=3, verbose_name='Sens')),
+                ('transaction_type', models.CharField(choices=[('deposit', 'Dépôt'), ('transfer', 'Transfert'), ('withdrawal', 'Retrait'), ('fee', 'Commission')], max_length=20, verbose_name='Type de transaction')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Montant')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('completed', 'Complétée'), ('failed', 'Échouée')], max_length=20, verbose_name='Statut')),
+                ('counterparty_username', models.CharField(blank=True, help_text='Vide pour les dépôts et les retraits', max_length=150, verbose_name='Contrepartie')),
+                ('counterparty_phone', models.CharField(blank=True, max_length=20, verbose_name='Téléphone de la contrepartie')),
+                ('reference', models.CharField(max_length=100, verbose_name='Référence')),
+                ('created_at', models.DateTimeField(verbose_name='Date de la transaction')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='core.virtualaccount', verbose_name='Compte')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='transactions.transaction', verbose_name='Transaction')),
+            ],
+            options={
+                'verbose_name': "Entrée du fil d'activité",
+                'verbose_name_plural': "Fil d'activité",
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['account', '-created_at', '-id'], name='transaction_account_8d8ef0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('transaction', 'account'), name='unique_feed_entry')],
+            },
+        ),
+        migrations.RunPython(rebuild_feed, migrations.RunPython.noop),
+    ]
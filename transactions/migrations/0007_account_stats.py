@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_stats(apps, schema_editor):
+    from transactions.stats import backfill_stats as backfill
+    backfill(
+        apps.get_model('core', 'VirtualAccount'),
+        apps.get_model('transactions', 'Transaction'),
+        apps.get_model('transactions', 'AccountStats')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_phone_e164'),
+        ('transactions', '0006_activity_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountStats',
+            fields=[
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.virtualaccount', verbose_name='Compte')),
+                ('deposits_count', models.PositiveIntegerField(default=0, verbose_name='Dépôts')),
+                ('deposits_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Montant déposé')),
+                ('transfers_sent_count', models.PositiveIntegerField(default=0, verbose_name='Transferts émis')),
+                ('transfers_sent_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Montant transféré')),
+                ('transfers_received_count', models.PositiveIntegerField(default=0, verbose_name='Transferts reçus')),
+                ('transfers_received_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Montant reçu')),
+                ('withdrawals_count', models.PositiveIntegerField(default=0, verbose_name='Retraits')),
+                ('withdrawals_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Montant retiré')),
+                ('fees_paid_count', models.PositiveIntegerField(default=0, verbose_name='Commissions payées')),
+                ('fees_paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Montant des commissions payées')),
+                ('fees_received_count', models.PositiveIntegerField(default=0, verbose_name='Commissions perçues')),
+                ('fees_received_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Montant des commissions perçues')),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True, verbose_name='Dernière activité')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+            ],
+            options={
+                'verbose_name': 'Statistiques de compte',
+                'verbose_name_plural': 'Statistiques de comptes',
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_account_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Jour')),
+                ('transaction_type', models.CharField(choices=[('deposit', 'Dépôt'), ('transfer', 'Transfert'), ('withdrawal', 'Retrait'), ('fee', 'Commission')], max_length=20, verbose_name='Type de transaction')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('completed', 'Complétée'), ('failed', 'Échouée')], max_length=20, verbose_name='Statut')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Nombre de transactions')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Montant total')),
+                ('active_accounts', models.PositiveIntegerField(default=0, help_text='Nombre de comptes émetteurs distincts', verbose_name='Comptes actifs')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Date de calcul')),
+            ],
+            options={
+                'verbose_name': 'Statistiques quotidiennes',
+                'verbose_name_plural': 'Statistiques quotidiennes',
+                'ordering': ['-day', 'transaction_type'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'transaction_type', 'status'), name='unique_daily_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def partition_transactions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from transactions.partitions import partition_table
+    with schema_editor.connection.cursor() as cursor:
+        partition_table(cursor)
+
+
+class Migration(migrations.Migration):
+
+    # partition_table valide la borne de la partition d'origine hors du
+    # verrou exclusif, dans ses propres transactions
+    atomic = False
+
+    dependencies = [
+        ('transactions', '0008_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activityfeedentry',
+            name='transaction',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='transactions.transaction', verbose_name='Transaction'),
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='fee_transaction',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Uniquement pour les retraits', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='transactions.transaction', verbose_name='Transaction de commission'),
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='transaction',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='transactions.transaction', verbose_name='Transaction'),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='transaction',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='transactions.transaction', verbose_name='Transaction'),
+        ),
+        migrations.RunPython(partition_transactions),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_partition_transactions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Premier jour du mois archivé', unique=True, verbose_name='Mois')),
+                ('path', models.CharField(max_length=500, verbose_name='Fichier du segment')),
+                ('index_path', models.CharField(max_length=500, verbose_name="Fichier d'index")),
+                ('row_count', models.PositiveIntegerField(default=0, verbose_name='Nombre de transactions')),
+                ('checksum', models.CharField(max_length=64, verbose_name='Empreinte SHA-256')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name="Date d'archivage")),
+            ],
+            options={
+                'verbose_name': "Segment d'archive",
+                'verbose_name_plural': "Segments d'archive",
+                'ordering': ['-month'],
+            },
+        ),
+    ]
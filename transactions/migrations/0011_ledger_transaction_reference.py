@@ -0,0 +1,61 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_references(apps, schema_editor):
+    """
+    Recopie la référence des transactions dans leurs écritures, et détache
+    les écritures des mois déjà archivés (référence relue dans les segments)
+    """
+    import gzip
+    import json
+    import os
+    from django.db.models import OuterRef, Subquery
+    Transaction = apps.get_model('transactions', 'Transaction')
+    LedgerEntry = apps.get_model('transactions', 'LedgerEntry')
+    ArchiveSegment = apps.get_model('transactions', 'ArchiveSegment')
+    
+    live = Transaction.objects.filter(pk=OuterRef('transaction_id'))
+    LedgerEntry.objects.filter(transaction_id__in=Transaction.objects.values('pk')).update(
+        transaction_reference=Subquery(live.values('reference')[:1])
+    )
+    
+    orphans = LedgerEntry.objects.exclude(transaction_id__in=Transaction.objects.values('pk'))
+    if not orphans.exists():
+        return
+    
+    orphan_ids = set(orphans.values_list('transaction_id', flat=True))
+    for segment in ArchiveSegment.objects.all():
+        if not os.path.exists(segment.path):
+            continue
+        with gzip.open(segment.path, 'rt') as fileobj:
+            for line in fileobj:
+                record = json.loads(line)
+                if record['id'] in orphan_ids:
+                    orphans.filter(transaction_id=record['id']).update(
+                        transaction_reference=record['reference']
+                    )
+    orphans.update(transaction=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_archive_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledgerentry',
+            name='transaction_reference',
+            field=models.CharField(blank=True, help_text="Conservée après l'archivage de la transaction", max_length=100, verbose_name='Référence de la transaction'),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='transaction',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='NULL une fois la transaction archivée', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='transactions.transaction', verbose_name='Transaction'),
+        ),
+        migrations.RunPython(fill_references, migrations.RunPython.noop),
+    ]
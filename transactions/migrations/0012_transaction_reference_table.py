@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:41
+
+from django.db import migrations
+
+
+def enforce_reference_uniqueness(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from transactions.partitions import is_partitioned, enforce_reference_uniqueness as enforce
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            enforce(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0011_ledger_transaction_reference'),
+    ]
+
+    operations = [
+        migrations.RunPython(enforce_reference_uniqueness, migrations.RunPython.noop),
+    ]
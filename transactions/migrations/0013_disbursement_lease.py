@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0012_transaction_reference_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='disbursementbatch',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text="Le lot est réservé par un traitement en cours jusqu'à cette date", null=True, verbose_name='Fin du bail'),
+        ),
+    ]
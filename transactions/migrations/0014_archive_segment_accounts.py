@@ -0,0 +1,47 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_segment_accounts(apps, schema_editor):
+    """Comptes des segments déjà archivés, relus dans leurs index"""
+    import json
+    import os
+    ArchiveSegment = apps.get_model('transactions', 'ArchiveSegment')
+    ArchiveSegmentAccount = apps.get_model('transactions', 'ArchiveSegmentAccount')
+    
+    for segment in ArchiveSegment.objects.all():
+        if not os.path.exists(segment.index_path):
+            continue
+        with open(segment.index_path) as fileobj:
+            account_ids = json.load(fileobj)['accounts']
+        ArchiveSegmentAccount.objects.bulk_create(
+            [ArchiveSegmentAccount(segment=segment, account_id=int(pk)) for pk in account_ids],
+            batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_account_suspension'),
+        ('transactions', '0013_disbursement_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveSegmentAccount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.virtualaccount', verbose_name='Compte')),
+                ('segment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accounts', to='transactions.archivesegment', verbose_name='Segment')),
+            ],
+            options={
+                'verbose_name': "Compte d'un segment d'archive",
+                'verbose_name_plural': "Comptes des segments d'archive",
+                'constraints': [models.UniqueConstraint(fields=('account', 'segment'), name='archive_segment_account_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_segment_accounts, migrations.RunPython.noop),
+    ]
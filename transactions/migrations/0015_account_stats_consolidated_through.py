@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0014_archive_segment_accounts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountstats',
+            name='consolidated_through',
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Consolidées jusqu'au"),
+        ),
+    ]
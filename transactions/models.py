@@ -12,6 +12,8 @@ class Transaction(models.Model):
     """
     Modèle représentant une transaction financière.
     Toute opération impactant un solde doit être tracée par une transaction.
+    Sous PostgreSQL, la table est partitionnée par mois sur created_at
+    (voir transactions.partitions).
     """
     
     # Types de transactions
@@ -102,7 +104,6 @@ class Transaction(models.Model):
             models.Index(fields=['sender_account', '-created_at']),
             models.Index(fields=['receiver_account', '-created_at']),
             models.Index(fields=['transaction_type']),
-            models.Index(fields=['reference']),
         ]
     
     def __str__(self):
@@ -128,23 +129,587 @@ class Transaction(models.Model):
     @classmethod
     def calculate_total_fees(cls):
         """Calcule le total des commissions perçues par la plateforme"""
-        total = cls.objects.filter(
-            transaction_type=cls.FEE,
-            status=cls.COMPLETED
-        ).aggregate(models.Sum('amount'))['amount__sum'] or 0
-        return total
+        from .rollups import get_totals
+        return get_totals([cls.FEE])[cls.FEE]['amount']
     
     @classmethod
     def get_transaction_volume(cls):
         """Retourne le volume total des transactions"""
-        return cls.objects.filter(status=cls.COMPLETED).count()
+        from .rollups import get_totals
+        return sum(totals['count'] for totals in get_totals().values())
     
     @classmethod
     def get_total_amount_transacted(cls):
         """Retourne le montant total transacté (hors fees)"""
-        total = cls.objects.filter(
-            status=cls.COMPLETED
-        ).exclude(
-            transaction_type=cls.FEE
-        ).aggregate(models.Sum('amount'))['amount__sum'] or 0
-        return total
\ No newline at end of file
+        from .rollups import get_totals
+        types = [t for t, _ in cls.TRANSACTION_TYPES if t != cls.FEE]
+        return sum(totals['amount'] for totals in get_totals(types).values())
+
+
+class DisbursementBatch(models.Model):
+    """
+    Lot de décaissements importé depuis un fichier CSV ou JSONL.
+    Le point de reprise (records_processed) est enregistré après chaque bloc
+    traité, dans la même transaction que les transferts du bloc.
+    Un lot en cours est réservé par un bail (lease_expires_at) renouvelé à
+    chaque bloc : un second traitement ne démarre qu'à son expiration.
+    """
+    
+    # Formats de fichier
+    CSV = 'csv'
+    JSONL = 'jsonl'
+    
+    FILE_FORMATS = [
+        (CSV, 'CSV'),
+        (JSONL, 'JSON Lines'),
+    ]
+    
+    # Statuts du lot
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    
+    BATCH_STATUS = [
+        (PENDING, 'En attente'),
+        (RUNNING, 'En cours'),
+        (COMPLETED, 'Terminé'),
+        (FAILED, 'Échoué'),
+    ]
+    
+    sender_account = models.ForeignKey(
+        VirtualAccount,
+        on_delete=models.PROTECT,
+        related_name='disbursement_batches',
+        verbose_name="Compte émetteur"
+    )
+    
+    upload = models.FileField(
+        upload_to='disbursements/',
+        blank=True,
+        verbose_name="Fichier",
+        help_text="Fichier CSV (phone,amount,description) ou JSONL"
+    )
+    
+    source_path = models.CharField(
+        max_length=500,
+        blank=True,
+        verbose_name="Chemin du fichier",
+        help_text="Chemin local du fichier lorsqu'il est importé en ligne de commande"
+    )
+    
+    file_format = models.CharField(
+        max_length=10,
+        choices=FILE_FORMATS,
+        default=CSV,
+        verbose_name="Format"
+    )
+    
+    description = models.CharField(
+        max_length=200,
+        blank=True,
+        default="Décaissement",
+        verbose_name="Description par défaut"
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=BATCH_STATUS,
+        default=PENDING,
+        verbose_name="Statut"
+    )
+    
+    records_processed = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Lignes traitées",
+        help_text="Point de reprise : nombre de lignes déjà traitées"
+    )
+    
+    succeeded_count = models.PositiveIntegerField(default=0, verbose_name="Transferts réussis")
+    failed_count = models.PositiveIntegerField(default=0, verbose_name="Transferts rejetés")
+    
+    total_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name="Montant transféré"
+    )
+    
+    last_error = models.TextField(blank=True, verbose_name="Dernière erreur")
+    
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Fin du bail",
+        help_text="Le lot est réservé par un traitement en cours jusqu'à cette date"
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
+    
+    class Meta:
+        verbose_name = "Lot de décaissements"
+        verbose_name_plural = "Lots de décaissements"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Lot #{self.pk} - {self.get_status_display()} ({self.records_processed} lignes traitées)"
+    
+    @property
+    def file_path(self):
+        """Chemin du fichier à traiter"""
+        if self.upload:
+            return self.upload.path
+        return self.source_path
+
+
+class IdempotencyKey(models.Model):
+    """
+    Clé d'idempotence fournie par le client pour une opération financière.
+    Enregistrée dans la même transaction que l'opération réussie : une requête
+    rejouée avec la même clé renvoie le résultat d'origine sans nouvelle écriture.
+    """
+    
+    account = models.ForeignKey(
+        VirtualAccount,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+        verbose_name="Compte"
+    )
+    
+    key = models.CharField(
+        max_length=64,
+        verbose_name="Clé",
+        help_text="Identifiant unique de la requête, généré par le client"
+    )
+    
+    operation = models.CharField(
+        max_length=20,
+        choices=Transaction.TRANSACTION_TYPES,
+        verbose_name="Opération"
+    )
+    
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_constraint=False,  # table partitionnée, voir transactions.partitions
+        verbose_name="Transaction"
+    )
+    
+    fee_transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_constraint=False,
+        null=True,
+        blank=True,
+        verbose_name="Transaction de commission",
+        help_text="Uniquement pour les retraits"
+    )
+    
+    message = models.CharField(max_length=255, verbose_name="Message de résultat")
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    
+    class Meta:
+        verbose_name = "Clé d'idempotence"
+        verbose_name_plural = "Clés d'idempotence"
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.key} ({self.get_operation_display()}) - {self.account.user.username}"
+
+
+class LedgerEntry(models.Model):
+    """
+    Écriture du grand livre en partie double, en ajout seul.
+    Chaque transaction produit une écriture au débit et une au crédit du même
+    montant ; un compte NULL représente l'extérieur de la plateforme
+    (espèces déposées ou retirées).
+    
+    Quand sa transaction est archivée (transactions.archive), l'écriture
+    est détachée : transaction passe à NULL et transaction_reference
+    permet de la retrouver dans le segment. C'est la seule modification
+    admise, faite par un UPDATE ensembliste dans la transaction d'archivage.
+    """
+    
+    DEBIT = 'debit'
+    CREDIT = 'credit'
+    
+    DIRECTIONS = [
+        (DEBIT, 'Débit'),
+        (CREDIT, 'Crédit'),
+    ]
+    
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.PROTECT,
+        related_name='ledger_entries',
+        null=True,
+        blank=True,
+        db_constraint=False,  # table partitionnée, voir transactions.partitions
+        verbose_name="Transaction",
+        help_text="NULL une fois la transaction archivée"
+    )
+    
+    transaction_reference = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Référence de la transaction",
+        help_text="Conservée après l'archivage de la transaction"
+    )
+    
+    account = models.ForeignKey(
+        VirtualAccount,
+        on_delete=models.PROTECT,
+        related_name='ledger_entries',
+        null=True,
+        blank=True,
+        verbose_name="Compte",
+        help_text="NULL pour la contrepartie externe (dépôts et retraits)"
+    )
+    
+    direction = models.CharField(
+        max_length=6,
+        choices=DIRECTIONS,
+        verbose_name="Sens"
+    )
+    
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Montant"
+    )
+    
+    created_at = models.DateTimeField(verbose_name="Date de l'écriture")
+    
+    class Meta:
+        verbose_name = "Écriture comptable"
+        verbose_name_plural = "Écritures comptables"
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['account', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        account_name = self.account.user.username if self.account else "Externe"
+        return f"{self.get_direction_display()} {self.amount} FCFA - {account_name}"
+    
+    def save(self, *args, **kwargs):
+        """Le grand livre est en ajout seul : une écriture ne se modifie pas"""
+        if self.pk is not None:
+            raise ValueError("Les écritures du grand livre ne peuvent pas être modifiées")
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError("Les écritures du grand livre ne peuvent pas être supprimées")
+
+
+class BalanceCheckpoint(models.Model):
+    """
+    Solde d'un compte arrêté à une date, calculé à partir du point précédent
+    et des écritures intermédiaires.
+    Le solde à une date quelconque s'obtient depuis le point le plus proche
+    plus les quelques écritures qui le suivent.
+    """
+    
+    account = models.ForeignKey(
+        VirtualAccount,
+        on_delete=models.CASCADE,
+        related_name='balance_checkpoints',
+        verbose_name="Compte"
+    )
+    
+    as_of = models.DateTimeField(
+        verbose_name="Arrêté au",
+        help_text="Le solde inclut toutes les écritures jusqu'à cette date incluse"
+    )
+    
+    balance = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        verbose_name="Solde"
+    )
+    
+    entry_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Écritures depuis le point précédent"
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    
+    class Meta:
+        verbose_name = "Point de solde"
+        verbose_name_plural = "Points de solde"
+        ordering = ['-as_of']
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'as_of'], name='unique_balance_checkpoint'),
+        ]
+        indexes = [
+            models.Index(fields=['account', '-as_of']),
+        ]
+    
+    def __str__(self):
+        return f"{self.account.user.username}: {self.balance} FCFA au {self.as_of:%d/%m/%Y %H:%M}"
+
+
+class ActivityFeedEntry(models.Model):
+    """
+    Ligne du fil d'activité d'un compte (modèle de lecture dénormalisé).
+    Écrite avec chaque transaction, une ligne par compte concerné : l'historique
+    se lit par un simple parcours d'index sur (account, created_at), sans
+    jointure ni OR entre émetteur et destinataire.
+    """
+    
+    IN = 'in'
+    OUT = 'out'
+    
+    DIRECTIONS = [
+        (IN, 'Entrant'),
+        (OUT, 'Sortant'),
+    ]
+    
+    account = models.ForeignKey(
+        VirtualAccount,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name="Compte"
+    )
+    
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        db_constraint=False,  # table partitionnée, voir transactions.partitions
+        verbose_name="Transaction"
+    )
+    
+    direction = models.CharField(
+        max_length=3,
+        choices=DIRECTIONS,
+        verbose_name="Sens"
+    )
+    
+    transaction_type = models.CharField(
+        max_length=20,
+        choices=Transaction.TRANSACTION_TYPES,
+        verbose_name="Type de transaction"
+    )
+    
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Montant"
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Transaction.TRANSACTION_STATUS,
+        verbose_name="Statut"
+    )
+    
+    counterparty_username = models.CharField(
+        max_length=150,
+        blank=True,
+        verbose_name="Contrepartie",
+        help_text="Vide pour les dépôts et les retraits"
+    )
+    
+    counterparty_phone = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name="Téléphone de la contrepartie"
+    )
+    
+    reference = models.CharField(max_length=100, verbose_name="Référence")
+    
+    created_at = models.DateTimeField(verbose_name="Date de la transaction")
+    
+    class Meta:
+        verbose_name = "Entrée du fil d'activité"
+        verbose_name_plural = "Fil d'activité"
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['transaction', 'account'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['account', '-created_at', '-id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_direction_display()} {self.amount} FCFA - {self.reference}"
+
+
+class AccountStats(models.Model):
+    """
+    Statistiques d'un compte, tenues à jour dans la même transaction que
+    chaque opération : la fiche d'un compte se lit en une ligne, quel que
+    soit l'âge du compte.
+    """
+    
+    account = models.OneToOneField(
+        VirtualAccount,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name="Compte"
+    )
+    
+    deposits_count = models.PositiveIntegerField(default=0, verbose_name="Dépôts")
+    deposits_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Montant déposé")
+    
+    transfers_sent_count = models.PositiveIntegerField(default=0, verbose_name="Transferts émis")
+    transfers_sent_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Montant transféré")
+    
+    transfers_received_count = models.PositiveIntegerField(default=0, verbose_name="Transferts reçus")
+    transfers_received_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Montant reçu")
+    
+    withdrawals_count = models.PositiveIntegerField(default=0, verbose_name="Retraits")
+    withdrawals_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Montant retiré")
+    
+    fees_paid_count = models.PositiveIntegerField(default=0, verbose_name="Commissions payées")
+    fees_paid_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Montant des commissions payées")
+    
+    fees_received_count = models.PositiveIntegerField(default=0, verbose_name="Commissions perçues")
+    fees_received_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name="Montant des commissions perçues")
+    
+    last_activity_at = models.DateTimeField(null=True, blank=True, verbose_name="Dernière activité")
+    
+    # Comptes à sous-soldes uniquement : la ligne couvre les transactions
+    # jusqu'à cette date, la suite est agrégée à la lecture
+    consolidated_through = models.DateTimeField(null=True, blank=True, verbose_name="Consolidées jusqu'au")
+    
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
+    
+    class Meta:
+        verbose_name = "Statistiques de compte"
+        verbose_name_plural = "Statistiques de comptes"
+    
+    def __str__(self):
+        return f"Statistiques de {self.account.user.username}"
+    
+    @property
+    def total_sent(self):
+        """Total des transactions émises hors commissions (un dépôt est émis et reçu par le compte)"""
+        return self.deposits_amount + self.transfers_sent_amount + self.withdrawals_amount
+    
+    @property
+    def total_received(self):
+        """Total des transactions reçues"""
+        return self.deposits_amount + self.transfers_received_amount + self.fees_received_amount
+
+
+class TransactionDailyStats(models.Model):
+    """
+    Agrégat quotidien des transactions par type et statut.
+    Alimenté par la commande aggregate_daily_stats, qui ne recalcule que les
+    jours postérieurs à son dernier passage (plus quelques jours de marge
+    pour les transactions validées tardivement).
+    """
+    
+    day = models.DateField(verbose_name="Jour")
+    
+    transaction_type = models.CharField(
+        max_length=20,
+        choices=Transaction.TRANSACTION_TYPES,
+        verbose_name="Type de transaction"
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Transaction.TRANSACTION_STATUS,
+        verbose_name="Statut"
+    )
+    
+    count = models.PositiveIntegerField(default=0, verbose_name="Nombre de transactions")
+    
+    amount = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        verbose_name="Montant total"
+    )
+    
+    active_accounts = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Comptes actifs",
+        help_text="Nombre de comptes émetteurs distincts"
+    )
+    
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de calcul")
+    
+    class Meta:
+        verbose_name = "Statistiques quotidiennes"
+        verbose_name_plural = "Statistiques quotidiennes"
+        ordering = ['-day', 'transaction_type']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'transaction_type', 'status'], name='unique_daily_stats'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day:%d/%m/%Y} - {self.get_transaction_type_display()} ({self.get_status_display()}): {self.count}"
+
+
+class ArchiveSegment(models.Model):
+    """
+    Mois de transactions archivé hors de la table, dans un fichier JSON Lines
+    compressé (voir transactions.archive).
+    Un index à côté du fichier donne, pour chaque compte, les blocs qui le
+    concernent.
+    """
+    
+    month = models.DateField(unique=True, verbose_name="Mois", help_text="Premier jour du mois archivé")
+    
+    path = models.CharField(max_length=500, verbose_name="Fichier du segment")
+    
+    index_path = models.CharField(max_length=500, verbose_name="Fichier d'index")
+    
+    row_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de transactions")
+    
+    checksum = models.CharField(max_length=64, verbose_name="Empreinte SHA-256")
+    
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Date d'archivage")
+    
+    class Meta:
+        verbose_name = "Segment d'archive"
+        verbose_name_plural = "Segments d'archive"
+        ordering = ['-month']
+    
+    def __str__(self):
+        return f"{self.month:%m/%Y}: {self.row_count} transaction(s)"
+
+
+class ArchiveSegmentAccount(models.Model):
+    """
+    Compte présent dans un segment d'archive : répond à « quels mois
+    archivés concernent ce compte ? » sans lire les index des segments.
+    """
+    
+    segment = models.ForeignKey(
+        ArchiveSegment,
+        on_delete=models.CASCADE,
+        related_name='accounts',
+        verbose_name="Segment"
+    )
+    
+    account = models.ForeignKey(
+        VirtualAccount,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Compte"
+    )
+    
+    class Meta:
+        verbose_name = "Compte d'un segment d'archive"
+        verbose_name_plural = "Comptes des segments d'archive"
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'segment'], name='archive_segment_account_uniq'),
+        ]
@@ -0,0 +1,346 @@
+"""
+Partitionnement mensuel de la table des transactions (PostgreSQL)
+
+La table transactions_transaction est partitionnée par intervalle sur
+created_at, une partition par mois. Les requêtes bornées sur created_at
+(historique, dashboard, agrégats quotidiens, exports) ne lisent que les
+partitions concernées, et VACUUM comme l'entretien des index se font
+partition par partition.
+
+La conversion garde la table existante comme première partition (toutes
+les transactions antérieures au mois suivant la migration) : aucune ligne
+n'est recopiée. La commande create_transaction_partitions crée ensuite les
+partitions des mois à venir ; une partition par défaut recueille les
+transactions d'un mois oublié et elles sont déplacées à la création de
+sa partition.
+
+Une clé primaire ou une contrainte d'unicité de table partitionnée doit
+contenir la clé de partition : la clé primaire devient (id, created_at) et
+les tables qui pointent vers les transactions n'ont plus de contrainte de
+clé étrangère en base. L'unicité globale de la référence (unique=True sur
+Transaction.reference) est tenue par la table REFERENCE_TABLE, clé
+primaire reference, qu'un déclencheur alimente dans la transaction de
+chaque insertion ; les références des mois archivés y restent réservées.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import date
+from .rollups import day_start
+import logging
+import re
+
+logger = logging.getLogger('transactions')
+
+TABLE = 'transactions_transaction'
+LEGACY_PARTITION = f'{TABLE}_legacy'
+DEFAULT_PARTITION = f'{TABLE}_default'
+SEQUENCE = f'{TABLE}_id_seq'
+REFERENCE_TABLE = f'{TABLE}_reference'
+LEGACY_BOUND = f'{LEGACY_PARTITION}_bound'
+
+INDEX_DEFINITION = re.compile(r'^(CREATE (?:UNIQUE )?INDEX) \S+ ON (?:ONLY )?\S+ (USING .*)$')
+UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(day):
+    """Premier jour du mois"""
+    return day.replace(day=1)
+
+
+def add_months(month, months):
+    """Premier jour du mois décalé de months mois"""
+    index = month.month - 1 + months
+    return date(month.year + index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    """Nom de la partition d'un mois (ex. transactions_transaction_p2026_10)"""
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def partition_bounds(month):
+    """Bornes [début, fin) d'un mois, en littéraux timestamptz"""
+    return day_start(month).isoformat(), day_start(add_months(month, 1)).isoformat()
+
+
+def is_partitioned(cursor):
+    """La table des transactions est-elle déjà partitionnée ?"""
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+        [TABLE]
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor):
+    """
+    Partitions de la table des transactions
+    
+    Returns:
+        list: Tuples (nom, expression des bornes)
+    """
+    cursor.execute(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s AND pg_table_is_visible(p.oid) "
+        "ORDER BY c.relname",
+        [TABLE]
+    )
+    return cursor.fetchall()
+
+
+def legacy_upper_bound(partitions):
+    """
+    Premier mois non couvert par la partition d'origine
+    
+    Args:
+        partitions: Résultat de list_partitions
+    
+    Returns:
+        date or None
+    """
+    for name, bound in partitions:
+        if name == LEGACY_PARTITION:
+            match = UPPER_BOUND.search(bound)
+            if match:
+                return timezone.localdate(parse_datetime(match.group(1)))
+    return None
+
+
+def create_partition(cursor, month):
+    """
+    Crée la partition d'un mois ; les lignes du mois tombées dans la
+    partition par défaut y sont déplacées
+    """
+    name = partition_name(month)
+    start, end = partition_bounds(month)
+    
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s)",
+        [start, end]
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)", [start, end])
+        return
+    
+    # La partition ne peut pas être créée tant que la partition par défaut
+    # contient des lignes de son intervalle
+    logger.warning(f"Transactions du mois {month:%Y-%m} trouvées dans la partition par défaut, déplacement")
+    cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+    cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)", [start, end])
+    cursor.execute(
+        f"WITH moved AS ("
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s RETURNING *"
+        f") INSERT INTO {name} SELECT * FROM moved",
+        [start, end]
+    )
+    cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+
+
+def create_future_partitions(cursor, months_ahead):
+    """
+    Crée les partitions manquantes jusqu'à months_ahead mois après le mois courant
+    
+    Returns:
+        list: Noms des partitions créées
+    """
+    partitions = list_partitions(cursor)
+    existing = {name for name, _ in partitions}
+    current = month_start(timezone.localdate())
+    
+    month = max(current, legacy_upper_bound(partitions) or current)
+    last = add_months(current, months_ahead)
+    
+    created = []
+    while month <= last:
+        name = partition_name(month)
+        if name not in existing:
+            create_partition(cursor, month)
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def lock_month(cursor, month):
+    """
+    Bloque les écritures sur les transactions d'un mois (verrou SHARE) jusqu'à
+    la fin de la transaction en cours ; les lectures restent possibles
+    
+    Le verrou porte sur la partition qui contient le mois, ou sur toute la
+    table si elle n'est pas partitionnée.
+    """
+    if not is_partitioned(cursor):
+        name = TABLE
+    else:
+        partitions = list_partitions(cursor)
+        legacy_bound = legacy_upper_bound(partitions)
+        if partition_name(month) in {partition for partition, _ in partitions}:
+            name = partition_name(month)
+        elif legacy_bound is not None and month < legacy_bound:
+            name = LEGACY_PARTITION
+        else:
+            name = DEFAULT_PARTITION
+    cursor.execute(f"LOCK TABLE {name} IN SHARE MODE")
+
+
+def drop_partition(cursor, month):
+    """
+    Détache et supprime la partition d'un mois (après archivage)
+    
+    Returns:
+        bool: False si le mois n'a pas sa propre partition
+    """
+    name = partition_name(month)
+    if name not in {partition for partition, _ in list_partitions(cursor)}:
+        return False
+    cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+    cursor.execute(f"DROP TABLE {name}")
+    return True
+
+
+def enforce_reference_uniqueness(cursor):
+    """
+    Installe la table des références et son déclencheur (idempotent)
+    
+    Une référence en double fait échouer l'insertion (ou la mise à jour) par
+    une violation d'unicité sur REFERENCE_TABLE, comme le faisait l'index
+    unique de la table non partitionnée.
+    """
+    # Aucune insertion entre la recopie des références et le déclencheur
+    cursor.execute(f"LOCK TABLE {TABLE} IN SHARE MODE")
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {REFERENCE_TABLE} (reference varchar(100) PRIMARY KEY)")
+    cursor.execute(
+        f"INSERT INTO {REFERENCE_TABLE} (reference) SELECT reference FROM {TABLE} ON CONFLICT DO NOTHING"
+    )
+    cursor.execute(
+        f"CREATE OR REPLACE FUNCTION {REFERENCE_TABLE}_reserve() RETURNS trigger AS $$ "
+        f"BEGIN "
+        f"INSERT INTO {REFERENCE_TABLE} (reference) VALUES (NEW.reference); "
+        f"RETURN NULL; "
+        f"END $$ LANGUAGE plpgsql"
+    )
+    cursor.execute(f"DROP TRIGGER IF EXISTS {REFERENCE_TABLE}_reserve ON {TABLE}")
+    cursor.execute(
+        f"CREATE TRIGGER {REFERENCE_TABLE}_reserve "
+        f"AFTER INSERT OR UPDATE OF reference ON {TABLE} "
+        f"FOR EACH ROW EXECUTE FUNCTION {REFERENCE_TABLE}_reserve()"
+    )
+
+
+def partition_table(cursor, months_ahead=None):
+    """
+    Convertit la table des transactions en table partitionnée par mois
+    
+    La table existante est renommée puis rattachée comme partition couvrant
+    tout ce qui précède le mois suivant. Ses index sont réutilisés ; seuls
+    ceux de la clé primaire et de l'unicité des références sont construits. La table reste
+    verrouillée pendant la conversion.
+    
+    Le rattachement vérifierait toutes les lignes sous ce verrou : une
+    contrainte CHECK de la borne est donc ajoutée NOT VALID puis validée
+    avant (VALIDATE ne bloque pas les écritures), et supprimée après. Pour
+    que ces deux étapes ne gardent pas le verrou, appeler hors transaction
+    (migration atomic = False).
+    """
+    if months_ahead is None:
+        months_ahead = settings.TRANSACTION_PARTITION_MONTHS_AHEAD
+    
+    if is_partitioned(cursor):
+        return
+    
+    boundary = day_start(add_months(month_start(timezone.localdate()), 1)).isoformat()
+    
+    cursor.execute(f"ALTER TABLE {TABLE} DROP CONSTRAINT IF EXISTS {LEGACY_BOUND}")
+    cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {LEGACY_BOUND} CHECK (created_at < %s) NOT VALID", [boundary])
+    cursor.execute(f"ALTER TABLE {TABLE} VALIDATE CONSTRAINT {LEGACY_BOUND}")
+    
+    with transaction.atomic(using=cursor.db.alias):
+        cursor.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {TABLE}")
+        next_id = cursor.fetchone()[0]
+        
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_PARTITION}")
+        
+        # Une partition ne peut avoir ni colonne d'identité ni sa propre clé primaire
+        cursor.execute(f"ALTER TABLE {LEGACY_PARTITION} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {LEGACY_PARTITION} ALTER COLUMN id DROP DEFAULT")
+        cursor.execute(f"DROP SEQUENCE IF EXISTS {SEQUENCE}")
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u')",
+            [LEGACY_PARTITION]
+        )
+        for (constraint,) in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT "{constraint}"')
+        
+        # Les index gardent leur nom sur la table partitionnée : ceux de la
+        # partition d'origine sont renommés puis lui sont rattachés
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND schemaname = current_schema()",
+            [LEGACY_PARTITION]
+        )
+        indexes = cursor.fetchall()
+        for index, _ in indexes:
+            cursor.execute(f'ALTER INDEX "{index}" RENAME TO "{index[:56]}_legacy"')
+        
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {LEGACY_PARTITION} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+        # La borne de la partition d'origine n'a pas à être recopiée sur la table partitionnée
+        cursor.execute(f"ALTER TABLE {TABLE} DROP CONSTRAINT {LEGACY_BOUND}")
+        cursor.execute(f"CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+        cursor.execute(f"SELECT setval('{SEQUENCE}', %s, false)", [next_id])
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+        
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, created_at)")
+        # Index de recherche par référence ; l'unicité globale est tenue par
+        # enforce_reference_uniqueness
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_reference_uniq UNIQUE (reference, created_at)")
+        for column in ('sender_account_id', 'receiver_account_id'):
+            cursor.execute(
+                f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_{column}_fk FOREIGN KEY ({column}) "
+                f"REFERENCES core_virtualaccount (id) DEFERRABLE INITIALLY DEFERRED"
+            )
+        for index, definition in indexes:
+            match = INDEX_DEFINITION.match(definition)
+            if match:
+                cursor.execute(f'{match.group(1)} "{index}" ON {TABLE} {match.group(2)}')
+        
+        # La contrainte validée prouve la borne : le rattachement ne relit pas la table
+        cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY_PARTITION} FOR VALUES FROM (MINVALUE) TO (%s)", [boundary])
+        cursor.execute(f"ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT {LEGACY_BOUND}")
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+        enforce_reference_uniqueness(cursor)
+        
+        created = create_future_partitions(cursor, months_ahead)
+        logger.info(f"Table {TABLE} partitionnée par mois, {len(created)} partition(s) créée(s)")
+
+
+def ensure_partitions(months_ahead=None):
+    """
+    Crée les partitions des mois à venir (à planifier, ex. chaque semaine)
+    Sans effet hors PostgreSQL ou si la table n'est pas partitionnée.
+    
+    Returns:
+        list: Noms des partitions créées
+    """
+    if months_ahead is None:
+        months_ahead = settings.TRANSACTION_PARTITION_MONTHS_AHEAD
+    
+    if connection.vendor != 'postgresql':
+        return []
+    
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            logger.warning(f"La table {TABLE} n'est pas partitionnée, aucune partition créée")
+            return []
+        created = create_future_partitions(cursor, months_ahead)
+    
+    for name in created:
+        logger.info(f"Partition {name} créée")
+    return created
@@ -0,0 +1,111 @@
+"""
+Références de transactions ordonnées dans le temps (format ULID)
+
+Une référence est composée de 48 bits d'horodatage en millisecondes suivis de
+80 bits aléatoires, encodés en base 32 de Crockford (26 caractères).
+Les références générées successivement sont croissantes : les insertions dans
+l'index unique se font en fin d'arbre et la référence peut servir de curseur.
+"""
+from datetime import datetime, timezone as dt_timezone
+import base64
+import os
+import threading
+import time
+
+REFERENCE_PREFIX = 'TXN-'
+
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+CROCKFORD_VALUES = {char: value for value, char in enumerate(CROCKFORD_ALPHABET)}
+_B32_TO_CROCKFORD = bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567', CROCKFORD_ALPHABET.encode('ascii'))
+
+ULID_LENGTH = 26
+RANDOM_BITS = 80
+MAX_RANDOM = (1 << RANDOM_BITS) - 1
+
+
+class ReferenceGenerator:
+    """
+    Générateur de ULID monotone pour le processus courant.
+    Dans une même milliseconde, la partie aléatoire est incrémentée plutôt que
+    retirée : les références restent strictement croissantes. Chaque processus
+    part de 80 bits aléatoires, ce qui rend les collisions entre workers
+    négligeables.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Réinitialise l'état (appelé dans le processus enfant après un fork)"""
+        self._last_ms = -1
+        self._last_random = 0
+    
+    def generate(self):
+        """
+        Génère une nouvelle référence
+        
+        Returns:
+            str: La référence, par exemple "TXN-01JA8Z3X7K4M2N9Q5R6S8T0V1W"
+        """
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._last_random = int.from_bytes(os.urandom(RANDOM_BITS // 8), 'big')
+            else:
+                # Même milliseconde (ou horloge reculée) : rester croissant
+                self._last_random += 1
+                if self._last_random > MAX_RANDOM:
+                    self._last_ms += 1
+                    self._last_random = int.from_bytes(os.urandom(RANDOM_BITS // 8), 'big')
+            value = (self._last_ms << RANDOM_BITS) | self._last_random
+        
+        return REFERENCE_PREFIX + encode_ulid(value)
+
+
+def encode_ulid(value):
+    """Encode un entier de 128 bits en 26 caractères Crockford"""
+    # 20 octets = 32 caractères base 32 exacts ; les 6 premiers sont toujours nuls
+    encoded = base64.b32encode(value.to_bytes(20, 'big')).translate(_B32_TO_CROCKFORD)
+    return encoded[-ULID_LENGTH:].decode('ascii')
+
+
+def reference_timestamp(reference):
+    """
+    Retourne la date de génération d'une référence
+    
+    Args:
+        reference: La référence de transaction
+    
+    Returns:
+        datetime or None: La date (UTC), ou None pour une référence
+            d'ancien format (fragment d'UUID)
+    """
+    if not reference or not reference.startswith(REFERENCE_PREFIX):
+        return None
+    
+    ulid = reference[len(REFERENCE_PREFIX):]
+    if len(ulid) != ULID_LENGTH:
+        return None
+    
+    value = 0
+    for char in ulid:
+        char_value = CROCKFORD_VALUES.get(char)
+        if char_value is None:
+            return None
+        value = (value << 5) | char_value
+    
+    return datetime.fromtimestamp((value >> RANDOM_BITS) / 1000, tz=dt_timezone.utc)
+
+
+_generator = ReferenceGenerator()
+
+# Un processus enfant (workers gunicorn) ne doit pas reprendre l'état du parent
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_generator.reset)
+
+
+def generate_reference():
+    """Génère une référence de transaction unique et ordonnée dans le temps"""
+    return _generator.generate()
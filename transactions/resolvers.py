@@ -0,0 +1,211 @@
+"""
+Résolution des destinataires de transferts à partir de leur numéro de téléphone
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from collections import OrderedDict
+from core.models import VirtualAccount
+from core.phone import normalize_phone_number
+import threading
+import time
+import logging
+
+logger = logging.getLogger('transactions')
+
+User = get_user_model()
+
+
+class RecipientResolver:
+    """
+    Résout un numéro de téléphone en compte virtuel destinataire.
+    Les comptes sont chargés avec leur utilisateur en une requête jointe,
+    puis gardés dans un cache LRU borné avec durée de vie : les bénéficiaires
+    habituels ne coûtent plus aucune requête.
+    Le cache est invalidé par les signals de suspension/activation, mais
+    seulement dans le processus qui fait le changement : les autres workers
+    peuvent servir une entrée périmée (ex. compte suspendu vu actif) jusqu'à
+    son expiration, d'où une durée de vie courte (RECIPIENT_CACHE_TTL).
+    Le crédit d'un transfert reste conditionné en base (is_suspended=False) :
+    un compte suspendu n'est jamais crédité, le transfert est alors refusé.
+    """
+    
+    _entries = OrderedDict()  # téléphone -> (expire_at, données du compte)
+    _phones_by_account = {}  # id du compte -> téléphone
+    _phones_by_user = {}  # id de l'utilisateur -> téléphone
+    _lock = threading.Lock()
+    _metrics = {
+        'hits': 0,
+        'misses': 0,
+    }
+    
+    @staticmethod
+    def normalize(phone_number):
+        """Forme canonique (E.164) utilisée comme clé du cache, '' si invalide"""
+        return normalize_phone_number(phone_number) or ''
+    
+    @classmethod
+    def resolve(cls, phone_number):
+        """
+        Retourne le compte virtuel actif associé à un numéro
+        
+        Args:
+            phone_number: Le numéro de téléphone du destinataire
+        
+        Returns:
+            VirtualAccount or None: Le compte (avec son utilisateur chargé) ou None
+        """
+        return cls.resolve_many([phone_number]).get(cls.normalize(phone_number))
+    
+    @classmethod
+    def resolve_many(cls, phone_numbers):
+        """
+        Résout plusieurs numéros ; seuls les numéros absents du cache sont
+        recherchés, en une seule requête
+        
+        Args:
+            phone_numbers: Les numéros de téléphone
+        
+        Returns:
+            dict: {numéro normalisé: VirtualAccount} ; un numéro associé à
+                plusieurs comptes n'est pas résolu
+        """
+        phones = {cls.normalize(phone) for phone in phone_numbers}
+        phones.discard('')
+        found = {}
+        now = time.monotonic()
+        
+        with cls._lock:
+            for phone in phones:
+                entry = cls._entries.get(phone)
+                if entry is not None and entry[0] > now:
+                    cls._entries.move_to_end(phone)
+                    found[phone] = entry[1]
+                    cls._metrics['hits'] += 1
+                else:
+                    cls._metrics['misses'] += 1
+        
+        missing = phones - found.keys()
+        if missing:
+            accounts = VirtualAccount.objects.select_related('user').filter(
+                user__phone_e164__in=missing,
+                user__is_active=True
+            ).only(
+                'id', 'balance', 'is_suspended', 'is_platform_account', 'stripe_count',
+                'user', 'user__username', 'user__phone_number', 'user__phone_e164',
+                'user__email', 'user__is_active'
+            )
+            matches = {}
+            for account in accounts:
+                matches.setdefault(account.user.phone_e164, []).append(account)
+            for phone, phone_accounts in matches.items():
+                if len(phone_accounts) > 1:
+                    # Destinataire ambigu : ne jamais choisir un compte au hasard
+                    logger.error(f"Numéro {phone} associé à {len(phone_accounts)} comptes actifs: destinataire refusé")
+                    continue
+                data = cls._to_cache_data(phone_accounts[0])
+                found[phone] = data
+                cls._store(phone, data)
+        
+        return {phone: cls._to_account(data) for phone, data in found.items()}
+    
+    @classmethod
+    def invalidate_account(cls, account_id):
+        """Retire du cache le compte donné"""
+        with cls._lock:
+            phone = cls._phones_by_account.get(account_id)
+            if phone is not None:
+                cls._evict(phone)
+    
+    @classmethod
+    def invalidate_user(cls, user_id, phone_number=None):
+        """Retire du cache le compte de l'utilisateur donné et l'entrée de son numéro"""
+        with cls._lock:
+            phone = cls._phones_by_user.get(user_id)
+            if phone is not None:
+                cls._evict(phone)
+            if phone_number:
+                cls._evict(cls.normalize(phone_number))
+    
+    @classmethod
+    def clear(cls):
+        """Vide le cache"""
+        with cls._lock:
+            cls._entries.clear()
+            cls._phones_by_account.clear()
+            cls._phones_by_user.clear()
+    
+    @classmethod
+    def get_metrics(cls):
+        """Retourne les compteurs de succès/échecs du cache"""
+        with cls._lock:
+            metrics = dict(cls._metrics)
+            metrics['size'] = len(cls._entries)
+        return metrics
+    
+    @classmethod
+    def reset_metrics(cls):
+        """Remet les compteurs à zéro"""
+        with cls._lock:
+            for key in cls._metrics:
+                cls._metrics[key] = 0
+    
+    @classmethod
+    def _store(cls, phone, data):
+        with cls._lock:
+            cls._evict(phone)
+            cls._entries[phone] = (time.monotonic() + settings.RECIPIENT_CACHE_TTL, data)
+            cls._phones_by_account[data['id']] = phone
+            cls._phones_by_user[data['user_id']] = phone
+            
+            while len(cls._entries) > settings.RECIPIENT_CACHE_SIZE:
+                oldest_phone = next(iter(cls._entries))
+                cls._evict(oldest_phone)
+    
+    @classmethod
+    def _evict(cls, phone):
+        """Retire une entrée (le verrou doit être détenu)"""
+        entry = cls._entries.pop(phone, None)
+        if entry is not None:
+            cls._phones_by_account.pop(entry[1]['id'], None)
+            cls._phones_by_user.pop(entry[1]['user_id'], None)
+    
+    @staticmethod
+    def _to_cache_data(account):
+        """Données minimales nécessaires pour reconstruire le compte"""
+        return {
+            'id': account.pk,
+            'is_suspended': account.is_suspended,
+            'is_platform_account': account.is_platform_account,
+            'stripe_count': account.stripe_count,
+            'user_id': account.user.pk,
+            'username': account.user.username,
+            'phone_number': account.user.phone_number,
+            'phone_e164': account.user.phone_e164,
+            'email': account.user.email,
+        }
+    
+    @staticmethod
+    def _to_account(data):
+        """
+        Reconstruit un compte (et son utilisateur) sans requête
+        Les instances ne portent que les champs utiles aux transferts :
+        elles ne doivent jamais être sauvegardées.
+        """
+        user = User(
+            pk=data['user_id'],
+            username=data['username'],
+            phone_number=data['phone_number'],
+            phone_e164=data['phone_e164'],
+            email=data['email'],
+            is_active=True,
+        )
+        user._state.adding = False
+        account = VirtualAccount(
+            pk=data['id'],
+            user=user,
+            is_suspended=data['is_suspended'],
+            is_platform_account=data['is_platform_account'],
+            stripe_count=data['stripe_count'],
+        )
+        account._state.adding = False
+        return account
@@ -0,0 +1,171 @@
+"""
+Agrégats quotidiens des transactions
+
+La commande aggregate_daily_stats recalcule, jour par jour, les agrégats
+postérieurs au dernier jour déjà calculé (le filigrane), en repartant
+quelques jours en arrière pour intégrer les transactions validées
+tardivement. Les totaux combinent ces agrégats pour les jours clos et une
+lecture directe de la table pour les jours qui suivent le filigrane : ils
+restent exacts sans parcourir toute la table des transactions.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum, Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from .models import Transaction, TransactionDailyStats, ArchiveSegment
+import logging
+
+logger = logging.getLogger('transactions')
+
+
+def day_start(day):
+    """Début d'un jour dans le fuseau local"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def aggregate_days(start_day, end_day):
+    """
+    Recalcule les agrégats des jours [start_day, end_day] (une requête groupée)
+    Les lignes de chaque jour sont remplacées dans une seule transaction.
+
+    Returns:
+        int: Nombre de lignes d'agrégat écrites
+    """
+    rows = Transaction.objects.filter(
+        created_at__gte=day_start(start_day),
+        created_at__lt=day_start(end_day + timedelta(days=1))
+    ).annotate(
+        day=TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+    ).values('day', 'transaction_type', 'status').annotate(
+        count=Count('id'),
+        amount=Sum('amount'),
+        active_accounts=Count('sender_account', distinct=True)
+    ).order_by()
+
+    stats = [TransactionDailyStats(**row) for row in rows]
+
+    with transaction.atomic():
+        TransactionDailyStats.objects.filter(day__gte=start_day, day__lte=end_day).delete()
+        TransactionDailyStats.objects.bulk_create(stats)
+
+    return len(stats)
+
+
+def get_watermark():
+    """Dernier jour agrégé, ou None si aucun agrégat n'a encore été calculé"""
+    return TransactionDailyStats.objects.aggregate(last_day=Max('day'))['last_day']
+
+
+def run_rollup(since=None, late_days=None):
+    """
+    Agrège les jours depuis le filigrane (ou depuis since) jusqu'à aujourd'hui
+
+    Args:
+        since: Premier jour à recalculer, pour forcer une reprise
+        late_days: Jours recalculés avant le filigrane pour les transactions
+            tardives (par défaut settings.DAILY_STATS_LATE_DAYS)
+
+    Returns:
+        tuple: (premier jour, dernier jour, lignes écrites), ou None si
+            aucune transaction n'existe
+    """
+    if late_days is None:
+        late_days = settings.DAILY_STATS_LATE_DAYS
+
+    today = timezone.localdate()
+
+    if since is None:
+        watermark = get_watermark()
+        if watermark is not None:
+            since = min(watermark, today) - timedelta(days=late_days)
+        else:
+            first = Transaction.objects.aggregate(first=Min('created_at'))['first']
+            if first is None:
+                return None
+            since = timezone.localdate(first)
+
+    # Les mois archivés ne sont plus dans la table : leurs agrégats sont définitifs
+    last_archived = ArchiveSegment.objects.aggregate(month=Max('month'))['month']
+    if last_archived is not None:
+        since = max(since, (last_archived + timedelta(days=32)).replace(day=1))
+
+    # Un jour à la fois : les transactions d'une journée tiennent en mémoire
+    written = 0
+    day = since
+    while day <= today:
+        written += aggregate_days(day, day)
+        day += timedelta(days=1)
+
+    logger.info(f"Agrégats quotidiens recalculés du {since} au {today}: {written} ligne(s)")
+    return since, today, written
+
+
+def get_totals(transaction_types=None, status=Transaction.COMPLETED):
+    """
+    Totaux (nombre et montant) par type de transaction
+
+    Les jours antérieurs au filigrane sont lus dans les agrégats, le reste
+    directement dans la table des transactions (index sur created_at).
+
+    Args:
+        transaction_types: Types à inclure (tous par défaut)
+        status: Statut des transactions comptées
+
+    Returns:
+        dict: {type: {'count': int, 'amount': Decimal}}
+    """
+    types = transaction_types or [choice[0] for choice in Transaction.TRANSACTION_TYPES]
+    totals = {t: {'count': 0, 'amount': Decimal('0')} for t in types}
+
+    live = Transaction.objects.filter(status=status, transaction_type__in=types)
+
+    watermark = get_watermark()
+    if watermark is not None:
+        cutoff = min(watermark, timezone.localdate())
+        rolled_up = TransactionDailyStats.objects.filter(
+            day__lt=cutoff, status=status, transaction_type__in=types
+        ).values('transaction_type').annotate(count=Sum('count'), amount=Sum('amount')).order_by()
+        for row in rolled_up:
+            totals[row['transaction_type']]['count'] += row['count']
+            totals[row['transaction_type']]['amount'] += row['amount']
+        live = live.filter(created_at__gte=day_start(cutoff))
+
+    for row in live.values('transaction_type').annotate(count=Count('id'), amount=Sum('amount')).order_by():
+        totals[row['transaction_type']]['count'] += row['count']
+        totals[row['transaction_type']]['amount'] += row['amount']
+
+    return totals
+
+
+def get_daily_series(start_day, end_day, status=Transaction.COMPLETED):
+    """
+    Série quotidienne des volumes, commissions et comptes actifs, lue dans
+    les agrégats (à jour au dernier passage de la commande)
+    
+    Un même compte peut émettre plusieurs types d'opérations dans la journée :
+    le nombre de comptes actifs retenu est le maximum par type, soit une
+    borne basse du nombre de comptes distincts.
+
+    Returns:
+        list: Un dict par jour de la période, du plus ancien au plus récent
+    """
+    series = {}
+    day = start_day
+    while day <= end_day:
+        series[day] = {'day': day, 'count': 0, 'volume': Decimal('0'), 'fees': Decimal('0'), 'active_accounts': 0}
+        day += timedelta(days=1)
+
+    rows = TransactionDailyStats.objects.filter(day__gte=start_day, day__lte=end_day, status=status)
+    for row in rows:
+        point = series[row.day]
+        point['count'] += row.count
+        if row.transaction_type == Transaction.FEE:
+            point['fees'] += row.amount
+        else:
+            point['volume'] += row.amount
+            point['active_accounts'] = max(point['active_accounts'], row.active_accounts)
+
+    return list(series.values())
@@ -1,16 +1,33 @@
 """
 Services pour la gestion des transactions financières
 """
-from django.db import transaction
+from django.db import transaction, connection, DatabaseError
+from django.db.models import F, Case, When, Value, DecimalField
 from django.conf import settings
-from decimal import Decimal
-from core.models import VirtualAccount
+from django.utils import timezone
+from decimal import Decimal, InvalidOperation
+from core.models import VirtualAccount, AccountStripe
 from .models import Transaction
-import uuid
+from .executor import TransactionExecutor
+from .idempotency import IdempotencyService
+from .ledger import LedgerService
+from .feed import ActivityFeedService
+from .stats import AccountStatsService
+from .references import generate_reference as generate_ulid_reference
+from .resolvers import RecipientResolver
+import copy
+import random
+import threading
+import time
 import logging
 
 logger = logging.getLogger('transactions')
 
+# Compte plateforme résolu par processus, pour PLATFORM_ACCOUNT_CACHE_TTL
+# secondes (voir get_platform_account) : (expire_at, compte)
+_platform_account = None
+_platform_account_lock = threading.Lock()
+
 
 class TransactionService:
     """
@@ -19,22 +36,61 @@ class TransactionService:
     
     @staticmethod
     def generate_reference():
-        """Génère une référence unique pour une transaction"""
-        return f"TXN-{uuid.uuid4().hex[:12].upper()}"
+        """
+        Génère une référence unique pour une transaction
+        Les références sont des ULID : croissantes dans le temps, elles
+        s'insèrent en fin d'index et leur date de génération est décodable.
+        """
+        return generate_ulid_reference()
     
     @staticmethod
     def get_platform_account():
-        """Récupère le compte virtuel de la plateforme"""
-        try:
-            platform_account = VirtualAccount.objects.get(is_platform_account=True)
-            return platform_account
-        except VirtualAccount.DoesNotExist:
-            logger.error("Le compte plateforme n'existe pas!")
-            raise Exception("Erreur système: compte plateforme introuvable")
+        """
+        Récupère le compte virtuel de la plateforme
+        L'identité du compte est résolue par processus puis servie depuis le
+        cache ; elle est invalidée dès que le compte plateforme est modifié
+        dans ce processus (init_platform, admin). Les signaux ne traversent
+        pas les processus : l'entrée expire après PLATFORM_ACCOUNT_CACHE_TTL
+        secondes, ce qui borne le délai avant qu'un autre processus voie un
+        changement. Les écritures ne touchent ensuite la ligne que par clé
+        primaire.
+        """
+        global _platform_account
+        
+        with _platform_account_lock:
+            if _platform_account is None or _platform_account[0] <= time.monotonic():
+                try:
+                    account = VirtualAccount.objects.select_related('user').get(
+                        is_platform_account=True
+                    )
+                except VirtualAccount.DoesNotExist:
+                    logger.error("Le compte plateforme n'existe pas!")
+                    raise Exception("Erreur système: compte plateforme introuvable")
+                _platform_account = (time.monotonic() + settings.PLATFORM_ACCOUNT_CACHE_TTL, account)
+            
+            # Copie : le solde en mémoire est modifié par les opérations
+            return copy.copy(_platform_account[1])
+    
+    @staticmethod
+    def invalidate_platform_account():
+        """Oublie l'identité du compte plateforme mise en cache"""
+        global _platform_account
+        
+        with _platform_account_lock:
+            _platform_account = None
+    
+    @staticmethod
+    def get_cached_platform_account_id():
+        """Retourne l'id du compte plateforme en cache, ou None"""
+        cached = _platform_account
+        return cached[1].pk if cached is not None else None
     
     @staticmethod
     def validate_amount(amount):
-        """Valide qu'un montant est positif"""
+        """Valide qu'un montant est fini et positif"""
+        # NaN et Infinity : NaN ne se compare même pas à zéro
+        if not amount.is_finite():
+            return False, "Montant invalide"
         if amount <= 0:
             return False, "Le montant doit être supérieur à zéro"
         return True, ""
@@ -49,14 +105,185 @@ class TransactionService:
         return True, ""
 
 
+class BalanceService:
+    """
+    Primitives de mouvement de solde.
+    Chaque opération est un unique UPDATE conditionnel exécuté par la base,
+    ce qui évite les mises à jour perdues entre workers concurrents.
+    """
+    
+    @staticmethod
+    def debit(virtual_account, amount):
+        """
+        Débite un compte si son solde est suffisant et qu'il n'est pas suspendu
+        Pour un compte à sous-soldes, seul le solde principal est débité : s'il
+        ne suffit pas, les sous-soldes sont consolidés dans une transaction
+        courte (une seule nouvelle tentative), ou juste après la transaction
+        en cours pour ne pas garder tous les sous-soldes verrouillés pendant
+        le paiement.
+        
+        Args:
+            virtual_account: Le compte à débiter
+            amount: Le montant à débiter
+        
+        Returns:
+            bool: True si le débit a été appliqué
+        """
+        updated = BalanceService._debit_balance(virtual_account, amount)
+        
+        if not updated and virtual_account.stripe_count:
+            if connection.in_atomic_block:
+                transaction.on_commit(lambda: BalanceService.consolidate_stripes(virtual_account))
+                logger.warning(
+                    f"Solde principal insuffisant pour {virtual_account.user.username}: "
+                    f"sous-soldes consolidés après la transaction"
+                )
+            elif BalanceService.consolidate_stripes(virtual_account):
+                updated = BalanceService._debit_balance(virtual_account, amount)
+        
+        if updated:
+            # Garder l'instance en mémoire cohérente sans relire la ligne
+            virtual_account.balance -= amount
+        return bool(updated)
+    
+    @staticmethod
+    def _debit_balance(virtual_account, amount):
+        """UPDATE conditionnel du solde principal"""
+        return VirtualAccount.objects.filter(
+            pk=virtual_account.pk,
+            balance__gte=amount,
+            is_suspended=False
+        ).update(
+            balance=F('balance') - amount,
+            updated_at=timezone.now()
+        )
+    
+    @staticmethod
+    def credit(virtual_account, amount, source=None, allow_suspended=True):
+        """
+        Crédite un compte
+        Pour un compte à sous-soldes, le crédit est appliqué sur un sous-solde
+        choisi par hachage de la source, sans toucher la ligne du compte.
+        
+        Args:
+            virtual_account: Le compte à créditer
+            amount: Le montant à créditer
+            source: Le compte à l'origine du mouvement (répartition des sous-soldes)
+            allow_suspended: Si False, le crédit n'est pas appliqué à un compte suspendu
+        
+        Returns:
+            bool: True si le crédit a été appliqué
+        """
+        accounts = VirtualAccount.objects.filter(pk=virtual_account.pk)
+        if not allow_suspended:
+            accounts = accounts.filter(is_suspended=False)
+        
+        if virtual_account.stripe_count:
+            if not allow_suspended and not accounts.exists():
+                return False
+            return BalanceService._credit_stripe(virtual_account, amount, source)
+        
+        updated = accounts.update(
+            balance=F('balance') + amount,
+            updated_at=timezone.now()
+        )
+        
+        if updated:
+            virtual_account.balance += amount
+        return bool(updated)
+    
+    @staticmethod
+    def credit_many(amounts_by_account, allow_suspended=True):
+        """
+        Crédite plusieurs comptes en un seul UPDATE
+        
+        Args:
+            amounts_by_account: dict {compte virtuel: montant à créditer}
+            allow_suspended: Si False, les comptes suspendus ne sont pas crédités
+        
+        Returns:
+            int: Nombre de comptes crédités
+        """
+        if not amounts_by_account:
+            return 0
+        
+        amounts_by_id = {account.pk: amount for account, amount in amounts_by_account.items()}
+        increment = Case(
+            *[When(pk=pk, then=Value(amount)) for pk, amount in amounts_by_id.items()],
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+        accounts = VirtualAccount.objects.filter(pk__in=amounts_by_id.keys())
+        if not allow_suspended:
+            accounts = accounts.filter(is_suspended=False)
+        updated = accounts.update(
+            balance=F('balance') + increment,
+            updated_at=timezone.now()
+        )
+        
+        if updated == len(amounts_by_id):
+            for account, amount in amounts_by_account.items():
+                account.balance += amount
+        return updated
+    
+    @staticmethod
+    def _credit_stripe(virtual_account, amount, source=None):
+        """Crédite un sous-solde du compte"""
+        key = source.pk if source is not None else random.getrandbits(32)
+        index = hash(key) % virtual_account.stripe_count
+        
+        stripe = AccountStripe.objects.filter(account_id=virtual_account.pk, index=index)
+        updated = stripe.update(balance=F('balance') + amount, updated_at=timezone.now())
+        if not updated:
+            # Sous-solde pas encore créé (nombre de sous-soldes augmenté récemment)
+            AccountStripe.objects.get_or_create(account_id=virtual_account.pk, index=index)
+            updated = stripe.update(balance=F('balance') + amount, updated_at=timezone.now())
+        return bool(updated)
+    
+    @staticmethod
+    def consolidate_stripes(virtual_account):
+        """
+        Reverse les sous-soldes d'un compte dans son solde principal
+        
+        Args:
+            virtual_account: Le compte à consolider
+        
+        Returns:
+            Decimal: Le montant consolidé
+        """
+        with transaction.atomic():
+            stripes = list(
+                AccountStripe.objects.select_for_update().filter(
+                    account_id=virtual_account.pk
+                ).exclude(balance=0).order_by('index')
+            )
+            total = sum((stripe.balance for stripe in stripes), Decimal('0.00'))
+            if not stripes:
+                return total
+            
+            AccountStripe.objects.filter(
+                pk__in=[stripe.pk for stripe in stripes]
+            ).update(balance=0, updated_at=timezone.now())
+            
+            VirtualAccount.objects.filter(pk=virtual_account.pk).update(
+                balance=F('balance') + total,
+                updated_at=timezone.now()
+            )
+        
+        virtual_account.balance += total
+        logger.info(
+            f"Consolidation des sous-soldes de {virtual_account.user.username}: "
+            f"{total} FCFA reversés sur {len(stripes)} sous-soldes"
+        )
+        return total
+
+
 class DepositService:
     """
     Service pour gérer les dépôts d'argent
     """
     
     @staticmethod
-    @transaction.atomic
-    def deposit(virtual_account, amount, description="Dépôt d'argent"):
+    def deposit(virtual_account, amount, description="Dépôt d'argent", idempotency_key=None):
         """
         Effectue un dépôt sur un compte virtuel
         
@@ -64,11 +291,18 @@ class DepositService:
             virtual_account: Le compte à créditer
             amount: Le montant à déposer
             description: Description du dépôt
+            idempotency_key: Clé fournie par le client ; une requête rejouée
+                renvoie le résultat d'origine sans nouveau dépôt
         
         Returns:
             tuple: (success: bool, message: str, transaction: Transaction or None)
         """
         try:
+            # Requête déjà traitée : renvoyer le résultat d'origine
+            replay = IdempotencyService.lookup(virtual_account, idempotency_key, Transaction.DEPOSIT)
+            if replay is not None:
+                return replay
+            
             # Vérifier le statut du compte
             is_valid, error_msg = TransactionService.check_account_status(virtual_account)
             if not is_valid:
@@ -80,31 +314,43 @@ class DepositService:
             if not is_valid:
                 return False, error_msg, None
             
-            # Créer la transaction
-            txn = Transaction.objects.create(
-                transaction_type=Transaction.DEPOSIT,
-                amount=amount,
-                sender_account=virtual_account,
-                receiver_account=virtual_account,
-                reference=TransactionService.generate_reference(),
-                description=description,
-                status=Transaction.COMPLETED
-            )
-            
-            # Mettre à jour le solde
-            virtual_account.balance += amount
-            virtual_account.save()
-            
-            logger.info(
-                f"Dépôt réussi: {amount} FCFA sur le compte de {virtual_account.user.username} | "
-                f"Nouveau solde: {virtual_account.balance} FCFA | Ref: {txn.reference}"
+            return IdempotencyService.run(
+                virtual_account, idempotency_key, Transaction.DEPOSIT,
+                lambda: DepositService._execute_deposit(virtual_account, amount, description),
+                accounts=[virtual_account]
             )
-            
-            return True, f"Dépôt de {amount} FCFA effectué avec succès", txn
-            
+        
         except Exception as e:
             logger.error(f"Erreur lors du dépôt: {str(e)}")
             return False, "Une erreur est survenue lors du dépôt", None
+    
+    @staticmethod
+    def _execute_deposit(virtual_account, amount, description):
+        """Écritures du dépôt, exécutées par TransactionExecutor"""
+        # Mettre à jour le solde
+        if not BalanceService.credit(virtual_account, amount):
+            return False, "Compte introuvable", None
+        
+        # Créer la transaction
+        txn = Transaction.objects.create(
+            transaction_type=Transaction.DEPOSIT,
+            amount=amount,
+            sender_account=virtual_account,
+            receiver_account=virtual_account,
+            reference=TransactionService.generate_reference(),
+            description=description,
+            status=Transaction.COMPLETED
+        )
+        LedgerService.record(txn)
+        ActivityFeedService.record(txn)
+        AccountStatsService.record(txn)
+        
+        logger.info(
+            f"Dépôt réussi: {amount} FCFA sur le compte de {virtual_account.user.username} | "
+            f"Nouveau solde: {virtual_account.balance} FCFA | Ref: {txn.reference}"
+        )
+        
+        return True, f"Dépôt de {amount} FCFA effectué avec succès", txn
 
 
 class TransferService:
@@ -113,8 +359,8 @@ class TransferService:
     """
     
     @staticmethod
-    @transaction.atomic
-    def transfer(sender_account, receiver_phone, amount, description="Transfert d'argent"):
+    def transfer(sender_account, receiver_phone, amount, description="Transfert d'argent",
+                 idempotency_key=None):
         """
         Effectue un transfert d'argent entre deux comptes
         
@@ -123,11 +369,18 @@ class TransferService:
             receiver_phone: Le numéro de téléphone du destinataire
             amount: Le montant à transférer
             description: Description du transfert
+            idempotency_key: Clé fournie par le client ; une requête rejouée
+                renvoie le résultat d'origine sans nouveau transfert
         
         Returns:
             tuple: (success: bool, message: str, transaction: Transaction or None)
         """
         try:
+            # Requête déjà traitée : renvoyer le résultat d'origine
+            replay = IdempotencyService.lookup(sender_account, idempotency_key, Transaction.TRANSFER)
+            if replay is not None:
+                return replay
+            
             # Vérifier le statut du compte émetteur
             is_valid, error_msg = TransactionService.check_account_status(sender_account)
             if not is_valid:
@@ -143,15 +396,10 @@ class TransferService:
             if sender_account.balance < amount:
                 return False, "Solde insuffisant pour effectuer ce transfert", None
             
-            # Trouver le compte destinataire
-            try:
-                from core.models import User
-                receiver_user = User.objects.get(phone_number=receiver_phone, is_active=True)
-                receiver_account = receiver_user.virtual_account
-            except User.DoesNotExist:
+            # Trouver le compte destinataire (requête jointe, puis cache)
+            receiver_account = RecipientResolver.resolve(receiver_phone)
+            if receiver_account is None:
                 return False, "Aucun utilisateur actif trouvé avec ce numéro de téléphone", None
-            except Exception:
-                return False, "Le destinataire n'a pas de compte virtuel", None
             
             # Vérifier qu'on ne transfère pas à soi-même
             if sender_account.id == receiver_account.id:
@@ -161,34 +409,207 @@ class TransferService:
             if receiver_account.is_suspended:
                 return False, "Le compte du destinataire est suspendu", None
             
-            # Créer la transaction
-            txn = Transaction.objects.create(
+            return IdempotencyService.run(
+                sender_account, idempotency_key, Transaction.TRANSFER,
+                lambda: TransferService._execute_transfer(
+                    sender_account, receiver_account, amount, description
+                ),
+                accounts=[sender_account, receiver_account]
+            )
+        
+        except Exception as e:
+            logger.error(f"Erreur lors du transfert: {str(e)}")
+            return False, "Une erreur est survenue lors du transfert", None
+    
+    @staticmethod
+    def _execute_transfer(sender_account, receiver_account, amount, description):
+        """Écritures du transfert, exécutées par TransactionExecutor"""
+        # Débiter l'émetteur : le solde est revérifié par la base
+        if not BalanceService.debit(sender_account, amount):
+            return False, "Solde insuffisant pour effectuer ce transfert", None
+        
+        # Le statut du destinataire est revérifié par la base (cache éventuellement périmé)
+        if not BalanceService.credit(receiver_account, amount, allow_suspended=False):
+            transaction.set_rollback(True)
+            RecipientResolver.invalidate_account(receiver_account.pk)
+            return False, "Le compte du destinataire est suspendu", None
+        
+        # Créer la transaction
+        txn = Transaction.objects.create(
+            transaction_type=Transaction.TRANSFER,
+            amount=amount,
+            sender_account=sender_account,
+            receiver_account=receiver_account,
+            reference=TransactionService.generate_reference(),
+            description=description,
+            status=Transaction.COMPLETED
+        )
+        LedgerService.record(txn)
+        ActivityFeedService.record(txn)
+        AccountStatsService.record(txn)
+        
+        logger.info(
+            f"Transfert réussi: {amount} FCFA de {sender_account.user.username} "
+            f"vers {receiver_account.user.username} | Ref: {txn.reference}"
+        )
+        
+        return True, f"Transfert de {amount} FCFA effectué avec succès vers {receiver_account.user.username}", txn
+    
+    
+    @staticmethod
+    def transfer_many(sender_account, payments, description="Transfert d'argent"):
+        """
+        Effectue un lot de transferts depuis un même compte émetteur
+        Les destinataires sont résolus en une requête, l'émetteur est débité
+        une seule fois et les crédits sont appliqués par un UPDATE groupé.
+        Seuls les paiements fautifs échouent : destinataire suspendu entre-temps,
+        ou paiements qui suivent le premier que le solde ne couvre plus (les
+        paiements sont servis dans l'ordre du lot).
+        
+        Args:
+            sender_account: Le compte émetteur
+            payments: Liste de tuples (receiver_phone, amount) ou
+                (receiver_phone, amount, description)
+            description: Description par défaut des transferts
+        
+        Returns:
+            list: Un tuple (success: bool, message: str, transaction: Transaction or None)
+                par paiement, dans l'ordre du lot
+        """
+        payments = list(payments)
+        results = [None] * len(payments)
+        
+        # Vérifier le statut du compte émetteur
+        is_valid, error_msg = TransactionService.check_account_status(sender_account)
+        if not is_valid:
+            return [(False, error_msg, None)] * len(payments)
+        
+        # Résoudre tous les destinataires (cache, puis une seule requête pour le reste)
+        receivers_by_phone = RecipientResolver.resolve_many(payment[0] for payment in payments)
+        
+        # Valider chaque paiement
+        valid_items = []
+        for index, payment in enumerate(payments):
+            receiver_phone, amount = payment[0], payment[1]
+            item_description = payment[2] if len(payment) > 2 and payment[2] else description
+            
+            # Un montant illisible ne rejette que son paiement, pas le lot
+            try:
+                amount = Decimal(str(amount))
+                is_valid, error_msg = TransactionService.validate_amount(amount)
+            except (InvalidOperation, TypeError, ValueError):
+                results[index] = (False, "Montant invalide", None)
+                continue
+            if not is_valid:
+                results[index] = (False, error_msg, None)
+                continue
+            
+            receiver_account = receivers_by_phone.get(RecipientResolver.normalize(receiver_phone))
+            if receiver_account is None:
+                results[index] = (False, "Aucun utilisateur actif trouvé avec ce numéro de téléphone", None)
+            elif receiver_account.pk == sender_account.pk:
+                results[index] = (False, "Vous ne pouvez pas transférer de l'argent à vous-même", None)
+            elif receiver_account.is_suspended:
+                results[index] = (False, "Le compte du destinataire est suspendu", None)
+            else:
+                valid_items.append((index, receiver_account, amount, item_description))
+        
+        if valid_items:
+            try:
+                executed = TransactionExecutor.run(
+                    lambda: TransferService._execute_transfer_many(sender_account, valid_items),
+                    accounts=[sender_account] + [item[1] for item in valid_items]
+                )
+                for index, result in executed:
+                    results[index] = result
+            except Exception as e:
+                # Dans une transaction englobante l'exécuteur ne rejoue pas : un
+                # interblocage remonte pour que l'appelant annule et rejoue le lot
+                # (sinon les paiements seraient rejetés à tort, définitivement)
+                if connection.in_atomic_block and isinstance(e, DatabaseError) and TransactionExecutor.is_retryable(e):
+                    raise
+                logger.error(f"Erreur lors du transfert groupé: {str(e)}")
+                for item in valid_items:
+                    results[item[0]] = (False, "Une erreur est survenue lors du transfert", None)
+        
+        return results
+    
+    @staticmethod
+    def _execute_transfer_many(sender_account, valid_items):
+        """Écritures du lot de transferts, exécutées par TransactionExecutor"""
+        results = []
+        
+        # Destinataires suspendus depuis leur résolution (comptes verrouillés)
+        suspended = set(VirtualAccount.objects.filter(
+            pk__in={item[1].pk for item in valid_items}, is_suspended=True
+        ).values_list('pk', flat=True))
+        for account_id in suspended:
+            RecipientResolver.invalidate_account(account_id)
+        
+        if sender_account.stripe_count:
+            # Compte non verrouillé par l'exécuteur : solde principal relu
+            sender_account.balance = VirtualAccount.objects.values_list('balance', flat=True).get(pk=sender_account.pk)
+        
+        # Paiements servis dans l'ordre tant que le solde les couvre
+        available = sender_account.balance
+        covered = []
+        exhausted = False
+        for item in valid_items:
+            if item[1].pk in suspended:
+                results.append((item[0], (False, "Le compte du destinataire est suspendu", None)))
+                continue
+            # Le premier paiement non couvert arrête le lot : les suivants échouent aussi
+            exhausted = exhausted or item[2] > available
+            if exhausted:
+                results.append((item[0], (False, "Solde insuffisant pour effectuer ce transfert", None)))
+            else:
+                available -= item[2]
+                covered.append(item)
+        
+        total_amount = sum(item[2] for item in covered)
+        if not covered or not BalanceService.debit(sender_account, total_amount):
+            return results + [
+                (item[0], (False, "Solde insuffisant pour effectuer ce transfert", None))
+                for item in covered
+            ]
+        valid_items = covered
+        
+        # Créditer tous les destinataires en un seul UPDATE
+        amounts_by_account = {}
+        for _, receiver_account, amount, _ in valid_items:
+            amounts_by_account[receiver_account] = amounts_by_account.get(receiver_account, Decimal('0')) + amount
+        
+        if BalanceService.credit_many(amounts_by_account, allow_suspended=False) != len(amounts_by_account):
+            for receiver_account in amounts_by_account:
+                RecipientResolver.invalidate_account(receiver_account.pk)
+            raise Exception("Compte destinataire introuvable ou suspendu lors du crédit groupé")
+        
+        # Créer les transactions en une seule requête
+        transactions = Transaction.objects.bulk_create([
+            Transaction(
                 transaction_type=Transaction.TRANSFER,
                 amount=amount,
                 sender_account=sender_account,
                 receiver_account=receiver_account,
                 reference=TransactionService.generate_reference(),
-                description=description,
+                description=item_description,
                 status=Transaction.COMPLETED
             )
-            
-            # Mettre à jour les soldes
-            sender_account.balance -= amount
-            sender_account.save()
-            
-            receiver_account.balance += amount
-            receiver_account.save()
-            
-            logger.info(
-                f"Transfert réussi: {amount} FCFA de {sender_account.user.username} "
-                f"vers {receiver_account.user.username} | Ref: {txn.reference}"
-            )
-            
-            return True, f"Transfert de {amount} FCFA effectué avec succès vers {receiver_user.username}", txn
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du transfert: {str(e)}")
-            return False, "Une erreur est survenue lors du transfert", None
+            for _, receiver_account, amount, item_description in valid_items
+        ])
+        LedgerService.record(*transactions)
+        ActivityFeedService.record(*transactions)
+        AccountStatsService.record(*transactions)
+        
+        logger.info(
+            f"Transfert groupé réussi: {len(transactions)} transferts pour {total_amount} FCFA "
+            f"depuis {sender_account.user.username} | Nouveau solde: {sender_account.balance} FCFA"
+        )
+        
+        return results + [
+            (index, (True, f"Transfert de {amount} FCFA effectué avec succès vers {receiver_account.user.username}", txn))
+            for (index, receiver_account, amount, _), txn in zip(valid_items, transactions)
+        ]
 
 
 class WithdrawalService:
@@ -215,8 +636,7 @@ class WithdrawalService:
         return withdrawal_amount, fee_amount
     
     @staticmethod
-    @transaction.atomic
-    def withdraw(virtual_account, requested_amount, description="Retrait d'argent"):
+    def withdraw(virtual_account, requested_amount, description="Retrait d'argent", idempotency_key=None):
         """
         Effectue un retrait avec calcul automatique des frais
         Génère 2 transactions : withdrawal + fee
@@ -225,11 +645,18 @@ class WithdrawalService:
             virtual_account: Le compte à débiter
             requested_amount: Le montant demandé par l'utilisateur
             description: Description du retrait
+            idempotency_key: Clé fournie par le client ; une requête rejouée
+                renvoie le résultat d'origine sans nouveau retrait
         
         Returns:
             tuple: (success: bool, message: str, transactions: dict or None)
         """
         try:
+            # Requête déjà traitée : renvoyer le résultat d'origine
+            replay = IdempotencyService.lookup(virtual_account, idempotency_key, Transaction.WITHDRAWAL)
+            if replay is not None:
+                return replay
+            
             # Vérifier le statut du compte
             is_valid, error_msg = TransactionService.check_account_status(virtual_account)
             if not is_valid:
@@ -251,52 +678,68 @@ class WithdrawalService:
             # Récupérer le compte plateforme
             platform_account = TransactionService.get_platform_account()
             
-            # Créer la transaction de retrait
-            withdrawal_txn = Transaction.objects.create(
-                transaction_type=Transaction.WITHDRAWAL,
-                amount=withdrawal_amount,
-                sender_account=virtual_account,
-                receiver_account=None,  # NULL pour les retraits
-                reference=TransactionService.generate_reference(),
-                description=f"{description} - Montant retiré",
-                status=Transaction.COMPLETED
-            )
-            
-            # Créer la transaction de commission
-            fee_txn = Transaction.objects.create(
-                transaction_type=Transaction.FEE,
-                amount=fee_amount,
-                sender_account=virtual_account,
-                receiver_account=platform_account,
-                reference=TransactionService.generate_reference(),
-                description=f"{description} - Commission plateforme ({settings.WITHDRAWAL_FEE_PERCENTAGE}%)",
-                status=Transaction.COMPLETED
-            )
-            
-            # Mettre à jour les soldes
-            virtual_account.balance -= requested_amount
-            virtual_account.save()
-            
-            platform_account.balance += fee_amount
-            platform_account.save()
-            
-            logger.info(
-                f"Retrait réussi: Montant demandé: {requested_amount} FCFA | "
-                f"Montant retiré: {withdrawal_amount} FCFA | Commission: {fee_amount} FCFA | "
-                f"Utilisateur: {virtual_account.user.username} | "
-                f"Nouveau solde: {virtual_account.balance} FCFA"
+            return IdempotencyService.run(
+                virtual_account, idempotency_key, Transaction.WITHDRAWAL,
+                lambda: WithdrawalService._execute_withdrawal(
+                    virtual_account, platform_account, requested_amount,
+                    withdrawal_amount, fee_amount, description
+                ),
+                accounts=[virtual_account, platform_account]
             )
-            
-            transactions_data = {
-                'withdrawal': withdrawal_txn,
-                'fee': fee_txn,
-                'withdrawal_amount': withdrawal_amount,
-                'fee_amount': fee_amount,
-                'total_amount': requested_amount
-            }
-            
-            return True, f"Retrait de {withdrawal_amount} FCFA effectué avec succès (frais: {fee_amount} FCFA)", transactions_data
-            
+        
         except Exception as e:
             logger.error(f"Erreur lors du retrait: {str(e)}")
-            return False, "Une erreur est survenue lors du retrait", None
\ No newline at end of file
+            return False, "Une erreur est survenue lors du retrait", None
+    
+    @staticmethod
+    def _execute_withdrawal(virtual_account, platform_account, requested_amount,
+                            withdrawal_amount, fee_amount, description):
+        """Écritures du retrait, exécutées par TransactionExecutor"""
+        # Mettre à jour les soldes
+        if not BalanceService.debit(virtual_account, requested_amount):
+            return False, "Solde insuffisant pour effectuer ce retrait", None
+        
+        if not BalanceService.credit(platform_account, fee_amount, source=virtual_account):
+            raise Exception("Compte plateforme introuvable lors du crédit")
+        
+        # Créer la transaction de retrait
+        withdrawal_txn = Transaction.objects.create(
+            transaction_type=Transaction.WITHDRAWAL,
+            amount=withdrawal_amount,
+            sender_account=virtual_account,
+            receiver_account=None,  # NULL pour les retraits
+            reference=TransactionService.generate_reference(),
+            description=f"{description} - Montant retiré",
+            status=Transaction.COMPLETED
+        )
+        
+        # Créer la transaction de commission
+        fee_txn = Transaction.objects.create(
+            transaction_type=Transaction.FEE,
+            amount=fee_amount,
+            sender_account=virtual_account,
+            receiver_account=platform_account,
+            reference=TransactionService.generate_reference(),
+            description=f"{description} - Commission plateforme ({settings.WITHDRAWAL_FEE_PERCENTAGE}%)",
+            status=Transaction.COMPLETED
+        )
+        LedgerService.record(withdrawal_txn, fee_txn)
+        ActivityFeedService.record(withdrawal_txn, fee_txn)
+        AccountStatsService.record(withdrawal_txn, fee_txn)
+        
+        logger.info(
+            f"Retrait réussi: Montant demandé: {requested_amount} FCFA | "
+            f"Montant retiré: {withdrawal_amount} FCFA | Commission: {fee_amount} FCFA | "
+            f"Utilisateur: {virtual_account.user.username} | "
+            f"Nouveau solde: {virtual_account.balance} FCFA"
+        )
+        
+        transactions_data = {
+            'withdrawal': withdrawal_txn,
+            'fee': fee_txn,
+            'withdrawal_amount': withdrawal_amount,
+            'fee_amount': fee_amount,
+            'total_amount': requested_amount
+        }
+        
+        return True, f"Retrait de {withdrawal_amount} FCFA effectué avec succès (frais: {fee_amount} FCFA)", transactions_data
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+Signals de l'application transactions
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.models import User, VirtualAccount
+from core.suspension import accounts_status_changed
+from .services import TransactionService
+from .resolvers import RecipientResolver
+
+
+@receiver(post_save, sender=VirtualAccount)
+@receiver(post_delete, sender=VirtualAccount)
+def invalidate_platform_account(sender, instance, **kwargs):
+    """
+    Invalide le cache du compte plateforme lorsqu'il est modifié
+    (init_platform, admin) ou qu'un autre compte devient compte plateforme
+    """
+    if instance.is_platform_account or instance.pk == TransactionService.get_cached_platform_account_id():
+        TransactionService.invalidate_platform_account()
+
+
+@receiver(post_save, sender=VirtualAccount)
+@receiver(post_delete, sender=VirtualAccount)
+def invalidate_recipient_account(sender, instance, **kwargs):
+    """Retire le compte du cache des destinataires (suspension, réactivation...)"""
+    RecipientResolver.invalidate_account(instance.pk)
+
+
+@receiver(accounts_status_changed)
+def invalidate_changed_accounts(sender, account_ids, **kwargs):
+    """Suspension ou réactivation en masse : mêmes invalidations qu'à la sauvegarde"""
+    if TransactionService.get_cached_platform_account_id() in account_ids:
+        TransactionService.invalidate_platform_account()
+    for account_id in account_ids:
+        RecipientResolver.invalidate_account(account_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_recipient_user(sender, instance, **kwargs):
+    """Retire l'utilisateur du cache des destinataires (activation, changement de numéro...)"""
+    RecipientResolver.invalidate_user(instance.pk, instance.phone_number)
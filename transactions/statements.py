@@ -0,0 +1,95 @@
+"""
+Relevés de compte téléchargeables (CSV ou JSON Lines)
+
+Le relevé est lu depuis le fil d'activité par un curseur côté serveur
+(iterator) et envoyé ligne par ligne : la mémoire du worker reste constante
+quelle que soit la période, et le premier octet part dès la première ligne.
+Les mois archivés (voir transactions.archive) sont lus en premier depuis
+leurs segments.
+"""
+from django.conf import settings
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from .models import Transaction, ActivityFeedEntry
+from .archive import archived_rows
+import csv
+import json
+
+STATEMENT_COLUMNS = (
+    'created_at', 'reference', 'transaction_type', 'direction', 'amount',
+    'counterparty_username', 'counterparty_phone', 'status',
+)
+
+
+class Echo:
+    """Pseudo-fichier dont write() renvoie la ligne au lieu de la stocker"""
+    
+    def write(self, value):
+        return value
+
+
+def statement_rows(account, start_date=None, end_date=None):
+    """
+    Parcourt les lignes du relevé d'un compte, de la plus ancienne à la plus récente
+    
+    Args:
+        account: Le compte virtuel
+        start_date: Premier jour inclus (None pour le début de l'historique)
+        end_date: Dernier jour inclus (None pour aujourd'hui)
+    
+    Returns:
+        iterator: Tuples dans l'ordre de STATEMENT_COLUMNS
+    """
+    yield from archived_statement_rows(account, start_date, end_date)
+    
+    entries = ActivityFeedEntry.objects.filter(account=account)
+    if start_date:
+        entries = entries.filter(
+            created_at__gte=timezone.make_aware(datetime.combine(start_date, time.min))
+        )
+    if end_date:
+        entries = entries.filter(
+            created_at__lt=timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+        )
+    
+    rows = entries.order_by('created_at', 'id').values_list(*STATEMENT_COLUMNS).iterator(
+        chunk_size=settings.STATEMENT_EXPORT_CHUNK_SIZE
+    )
+    for row in rows:
+        yield (timezone.localtime(row[0]).isoformat(),) + row[1:4] + (str(row[4]),) + row[5:]
+
+
+def archived_statement_rows(account, start_date=None, end_date=None):
+    """Lignes du relevé lues dans les segments archivés, au format de statement_rows"""
+    for record in archived_rows(account.pk, start_date, end_date):
+        if record['transaction_type'] == Transaction.DEPOSIT:
+            direction, counterparty = ActivityFeedEntry.IN, None
+        elif record['sender_account_id'] == account.pk:
+            direction, counterparty = ActivityFeedEntry.OUT, 'receiver'
+        else:
+            direction, counterparty = ActivityFeedEntry.IN, 'sender'
+        
+        yield (
+            timezone.localtime(record['created_at']).isoformat(),
+            record['reference'],
+            record['transaction_type'],
+            direction,
+            record['amount'],
+            (counterparty and record[f'{counterparty}_username']) or '',
+            (counterparty and record[f'{counterparty}_phone']) or '',
+            record['status'],
+        )
+
+
+def stream_csv(rows):
+    """Produit le relevé en CSV, en-tête compris, une ligne à la fois"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(STATEMENT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_jsonl(rows):
+    """Produit le relevé en JSON Lines, un objet par ligne"""
+    for row in rows:
+        yield json.dumps(dict(zip(STATEMENT_COLUMNS, row)), ensure_ascii=False) + '\n'
@@ -0,0 +1,327 @@
+"""
+Statistiques par compte tenues à jour au fil des transactions
+
+Chaque opération incrémente les compteurs des comptes concernés dans sa
+propre transaction, par un seul UPDATE. La fiche d'un compte n'a plus à
+agréger tout son historique ; la commande de vérification recalcule les
+statistiques en bloc et corrige les écarts.
+
+Les comptes à sous-soldes (plateforme) ne sont pas incrémentés : leur ligne
+est consolidée périodiquement et seules les transactions postérieures sont
+agrégées à la lecture.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Case, When, Value, Count, Sum, Max, DecimalField, IntegerField
+from django.utils import timezone
+from core.models import VirtualAccount
+from .models import Transaction, AccountStats
+import logging
+
+logger = logging.getLogger('transactions')
+
+# Compteurs alimentés par chaque côté d'une transaction ; un dépôt
+# (émetteur = destinataire) n'est compté qu'une fois, côté destinataire
+SENDER_COUNTERS = {
+    Transaction.TRANSFER: 'transfers_sent',
+    Transaction.WITHDRAWAL: 'withdrawals',
+    Transaction.FEE: 'fees_paid',
+}
+
+RECEIVER_COUNTERS = {
+    Transaction.DEPOSIT: 'deposits',
+    Transaction.TRANSFER: 'transfers_received',
+    Transaction.FEE: 'fees_received',
+}
+
+STATS_FIELDS = [
+    f'{counter}_{suffix}'
+    for counter in ('deposits', 'transfers_sent', 'transfers_received', 'withdrawals', 'fees_paid', 'fees_received')
+    for suffix in ('count', 'amount')
+] + ['last_activity_at']
+
+
+def transaction_counters(txn):
+    """
+    Compteurs touchés par une transaction
+    
+    Returns:
+        list: Tuples (id du compte, préfixe du compteur)
+    """
+    counters = []
+    if txn.transaction_type in SENDER_COUNTERS:
+        counters.append((txn.sender_account_id, SENDER_COUNTERS[txn.transaction_type]))
+    if txn.receiver_account_id is not None and txn.transaction_type in RECEIVER_COUNTERS:
+        counters.append((txn.receiver_account_id, RECEIVER_COUNTERS[txn.transaction_type]))
+    return counters
+
+
+def compute_stats(transaction_model, stats_model, account_ids, after=None, until=None):
+    """
+    Recalcule les statistiques d'un ensemble de comptes à partir des transactions
+    (deux agrégations groupées, une par côté)
+    
+    Args:
+        after: Si fourni, seules les transactions créées après cette date sont comptées
+        until: Si fourni, seules les transactions créées jusqu'à cette date sont comptées
+    
+    Returns:
+        dict: {id du compte: instance de stats_model non enregistrée}
+    """
+    stats = {pk: stats_model(account_id=pk) for pk in account_ids}
+    completed = transaction_model.objects.filter(status=Transaction.COMPLETED)
+    if after is not None:
+        completed = completed.filter(created_at__gt=after)
+    if until is not None:
+        completed = completed.filter(created_at__lte=until)
+    
+    sides = (
+        ('sender_account_id', SENDER_COUNTERS),
+        ('receiver_account_id', RECEIVER_COUNTERS),
+    )
+    for field, counters in sides:
+        rows = completed.filter(
+            **{f'{field}__in': account_ids, 'transaction_type__in': list(counters)}
+        ).values(field, 'transaction_type').annotate(
+            count=Count('id'), amount=Sum('amount'), last=Max('created_at')
+        ).order_by()
+        
+        for row in rows:
+            account_stats = stats[row[field]]
+            counter = counters[row['transaction_type']]
+            setattr(account_stats, f'{counter}_count', row['count'])
+            setattr(account_stats, f'{counter}_amount', row['amount'])
+            if account_stats.last_activity_at is None or row['last'] > account_stats.last_activity_at:
+                account_stats.last_activity_at = row['last']
+    
+    return stats
+
+
+def add_stats(account_stats, contributions):
+    """Ajoute des contributions {champ: valeur} à des statistiques"""
+    for field, value in contributions.items():
+        if field == 'last_activity_at':
+            if value is not None and (account_stats.last_activity_at is None or value > account_stats.last_activity_at):
+                account_stats.last_activity_at = value
+        else:
+            setattr(account_stats, field, getattr(account_stats, field) + value)
+
+
+def add_archived_stats(stats):
+    """Ajoute aux statistiques recalculées la contribution des mois archivés"""
+    from .archive import archived_stats
+    
+    for pk, contributions in archived_stats(list(stats)).items():
+        add_stats(stats[pk], contributions)
+
+
+def backfill_stats(account_model, transaction_model, stats_model, chunk_size=1000):
+    """
+    Crée les statistiques des comptes existants, par blocs de comptes
+    
+    Returns:
+        int: Nombre de comptes traités
+    """
+    last_pk = 0
+    total = 0
+    
+    while True:
+        account_ids = list(
+            account_model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if not account_ids:
+            return total
+        
+        stats = compute_stats(transaction_model, stats_model, account_ids)
+        stats_model.objects.bulk_create(stats.values(), ignore_conflicts=True)
+        
+        total += len(account_ids)
+        last_pk = account_ids[-1]
+
+
+class AccountStatsService:
+    """
+    Service de mise à jour et de vérification des statistiques de comptes
+    """
+    
+    @staticmethod
+    def record(*transactions):
+        """
+        Incrémente les statistiques des comptes concernés (un seul UPDATE)
+        Doit être appelé dans la transaction qui crée les Transaction.
+        Les comptes à sous-soldes (plateforme) sont ignorés pour ne pas
+        recréer une ligne très sollicitée : leur ligne est consolidée
+        périodiquement (voir consolidate et get).
+        
+        Args:
+            transactions: Les transactions complétées
+        """
+        striped = {
+            account.pk
+            for txn in transactions
+            for account in (txn.sender_account, txn.receiver_account)
+            if account is not None and account.stripe_count
+        }
+        
+        deltas = {}
+        for txn in transactions:
+            for account_id, counter in transaction_counters(txn):
+                if account_id in striped:
+                    continue
+                account_deltas = deltas.setdefault(account_id, {'last_activity_at': txn.created_at})
+                account_deltas[f'{counter}_count'] = account_deltas.get(f'{counter}_count', 0) + 1
+                account_deltas[f'{counter}_amount'] = account_deltas.get(f'{counter}_amount', 0) + txn.amount
+                account_deltas['last_activity_at'] = max(account_deltas['last_activity_at'], txn.created_at)
+        
+        if not deltas:
+            return
+        
+        if AccountStatsService._apply(deltas) != len(deltas):
+            # Première opération d'un compte : créer sa ligne puis y appliquer ses incréments
+            missing = set(deltas) - set(
+                AccountStats.objects.filter(pk__in=deltas.keys()).values_list('pk', flat=True)
+            )
+            AccountStats.objects.bulk_create(
+                [AccountStats(account_id=pk) for pk in missing], ignore_conflicts=True
+            )
+            AccountStatsService._apply({pk: deltas[pk] for pk in missing})
+    
+    @staticmethod
+    def _apply(deltas):
+        """Applique les incréments {id du compte: {champ: incrément}} en un UPDATE"""
+        if not deltas:
+            return 0
+        
+        updates = {}
+        fields = {field for account_deltas in deltas.values() for field in account_deltas}
+        for field in fields:
+            whens = [
+                When(pk=pk, then=Value(account_deltas[field]))
+                for pk, account_deltas in deltas.items() if field in account_deltas
+            ]
+            if field == 'last_activity_at':
+                updates[field] = Case(*whens, default=F(field))
+            elif field.endswith('_count'):
+                updates[field] = F(field) + Case(*whens, default=Value(0), output_field=IntegerField())
+            else:
+                updates[field] = F(field) + Case(
+                    *whens, default=Value(0), output_field=DecimalField(max_digits=16, decimal_places=2)
+                )
+        
+        return AccountStats.objects.filter(pk__in=deltas.keys()).update(**updates)
+    
+    @staticmethod
+    def get(account):
+        """
+        Statistiques d'un compte (non enregistrées et à zéro si le compte
+        n'a encore aucune opération)
+        
+        Pour un compte à sous-soldes, la ligne consolidée est complétée des
+        seules transactions postérieures à sa consolidation ; la première
+        lecture la consolide.
+        """
+        stats = AccountStats.objects.filter(account=account).first()
+        if not account.stripe_count:
+            return stats or AccountStats(account=account)
+        
+        if stats is None or stats.consolidated_through is None:
+            stats = AccountStatsService.consolidate(account)
+        
+        tail = compute_stats(Transaction, AccountStats, [account.pk], after=stats.consolidated_through)[account.pk]
+        add_stats(stats, {field: getattr(tail, field) for field in STATS_FIELDS})
+        return stats
+    
+    @staticmethod
+    def consolidate(account):
+        """
+        Consolide la ligne d'un compte à sous-soldes jusqu'à maintenant, moins
+        une marge pour les transactions encore en cours : seules les
+        transactions postérieures à la consolidation précédente sont agrégées
+        (recalcul complet, mois archivés compris, pour la première)
+        
+        Returns:
+            AccountStats: La ligne consolidée
+        """
+        until = timezone.now() - timedelta(seconds=settings.ACCOUNT_STATS_CONSOLIDATION_LAG)
+        
+        AccountStats.objects.bulk_create([AccountStats(account=account)], ignore_conflicts=True)
+        
+        with transaction.atomic():
+            stats = AccountStats.objects.select_for_update().get(account=account)
+            
+            if stats.consolidated_through is None:
+                computed = compute_stats(Transaction, AccountStats, [account.pk], until=until)
+                add_archived_stats(computed)
+                for field in STATS_FIELDS:
+                    setattr(stats, field, getattr(computed[account.pk], field))
+            elif until > stats.consolidated_through:
+                tail = compute_stats(
+                    Transaction, AccountStats, [account.pk], after=stats.consolidated_through, until=until
+                )[account.pk]
+                add_stats(stats, {field: getattr(tail, field) for field in STATS_FIELDS})
+            else:
+                return stats
+            
+            stats.consolidated_through = until
+            stats.save()
+        
+        return stats
+    
+    @staticmethod
+    def verify(fix=False, chunk_size=1000):
+        """
+        Recalcule en bloc les statistiques de tous les comptes et les compare
+        aux valeurs tenues à jour (les comptes à sous-soldes, consolidés
+        périodiquement, sont exclus)
+        
+        Args:
+            fix: Si True, les lignes en écart (ou manquantes) sont corrigées
+            chunk_size: Nombre de comptes recalculés par bloc
+        
+        Returns:
+            list: Ids des comptes en écart
+        """
+        mismatched = []
+        last_pk = 0
+        
+        while True:
+            account_ids = list(
+                VirtualAccount.objects.filter(pk__gt=last_pk, stripe_count=0).order_by('pk').values_list(
+                    'pk', flat=True
+                )[:chunk_size]
+            )
+            if not account_ids:
+                break
+            
+            with transaction.atomic():
+                if fix:
+                    # Bloquer les incréments concurrents le temps du recalcul
+                    list(AccountStats.objects.select_for_update().filter(
+                        pk__in=account_ids
+                    ).order_by('pk').values_list('pk', flat=True))
+                
+                expected = compute_stats(Transaction, AccountStats, account_ids)
+                add_archived_stats(expected)
+                current = AccountStats.objects.in_bulk(account_ids)
+                
+                to_create, to_update = [], []
+                for pk, stats in expected.items():
+                    existing = current.get(pk)
+                    if existing is None:
+                        if any(getattr(stats, field) for field in STATS_FIELDS):
+                            mismatched.append(pk)
+                        to_create.append(stats)
+                    elif any(getattr(existing, field) != getattr(stats, field) for field in STATS_FIELDS):
+                        mismatched.append(pk)
+                        to_update.append(stats)
+                
+                if fix:
+                    AccountStats.objects.bulk_create(to_create, ignore_conflicts=True)
+                    AccountStats.objects.bulk_update(to_update, STATS_FIELDS)
+            
+            last_pk = account_ids[-1]
+        
+        if mismatched:
+            logger.warning(f"{len(mismatched)} compte(s) avec des statistiques en écart")
+        return mismatched
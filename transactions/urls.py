@@ -13,4 +13,5 @@ urlpatterns = [
     path('withdrawal/verify/', views.WithdrawalVerifyView.as_view(), name='withdrawal_verify'),
     path('withdrawal/resend-otp/', views.ResendWithdrawalOTPView.as_view(), name='resend_withdrawal_otp'),
     path('history/', views.TransactionHistoryView.as_view(), name='history'),
+    path('history/statement/', views.StatementExportView.as_view(), name='statement'),
 ]
\ No newline at end of file
@@ -2,18 +2,33 @@
 Vues pour les transactions
 """
 from django.shortcuts import render, redirect
+from django.http import StreamingHttpResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.views import View
-from .forms import DepositForm, TransferForm, WithdrawalForm, WithdrawalOTPForm
+from .forms import DepositForm, TransferForm, WithdrawalForm, WithdrawalOTPForm, StatementForm
 from .services import DepositService, TransferService, WithdrawalService
+from .feed import ActivityFeedService
+from .statements import statement_rows, stream_csv, stream_jsonl
+from .archive import archived_months
+from .partitions import add_months
 from authentication.services import OTPService
 from authentication.models import OTPCode
+from datetime import timedelta
 import logging
 
 logger = logging.getLogger('transactions')
 
 
+def get_idempotency_key(request, form):
+    """
+    Clé d'idempotence de la requête : en-tête Idempotency-Key (clients mobiles)
+    ou champ caché du formulaire
+    """
+    key = request.headers.get('Idempotency-Key') or form.cleaned_data.get('idempotency_key')
+    return key[:64] if key else None
+
+
 class DepositView(LoginRequiredMixin, View):
     """
     Vue pour effectuer un dépôt
@@ -35,7 +50,8 @@ class DepositView(LoginRequiredMixin, View):
             success, message, transaction = DepositService.deposit(
                 request.user.virtual_account,
                 amount,
-                description
+                description,
+                idempotency_key=get_idempotency_key(request, form)
             )
             
             if success:
@@ -70,7 +86,8 @@ class TransferView(LoginRequiredMixin, View):
                 request.user.virtual_account,
                 receiver_phone,
                 amount,
-                description
+                description,
+                idempotency_key=get_idempotency_key(request, form)
             )
             
             if success:
@@ -119,7 +136,8 @@ class WithdrawalRequestView(LoginRequiredMixin, View):
                     'amount': str(amount),
                     'description': description,
                     'withdrawal_amount': str(withdrawal_amount),
-                    'fee_amount': str(fee_amount)
+                    'fee_amount': str(fee_amount),
+                    'idempotency_key': get_idempotency_key(request, form)
                 }
                 messages.success(request, message)
                 return redirect('transactions:withdrawal_verify')
@@ -175,7 +193,8 @@ class WithdrawalVerifyView(LoginRequiredMixin, View):
                 success, message, transaction_data = WithdrawalService.withdraw(
                     request.user.virtual_account,
                     amount,
-                    description
+                    description,
+                    idempotency_key=withdrawal_data.get('idempotency_key')
                 )
                 
                 if success:
@@ -225,18 +244,51 @@ class TransactionHistoryView(LoginRequiredMixin, View):
     template_name = 'transactions/history.html'
     
     def get(self, request):
-        # Récupérer toutes les transactions de l'utilisateur
-        sent_transactions = request.user.virtual_account.sent_transactions.all()[:20]
-        received_transactions = request.user.virtual_account.received_transactions.all()[:20]
+        # Une page du fil d'activité du compte, paginée par curseur
+        cursor = request.GET.get('cursor')
+        transactions, next_cursor = ActivityFeedService.get_page(request.user.virtual_account, cursor)
         
-        # Combiner et trier par date
-        all_transactions = sorted(
-            list(sent_transactions) + list(received_transactions),
-            key=lambda x: x.created_at,
-            reverse=True
-        )[:20]
+        # Fin du fil : proposer les mois archivés, téléchargeables en relevé
+        archives = []
+        if next_cursor is None:
+            archives = [
+                {'month': month, 'end': add_months(month, 1) - timedelta(days=1)}
+                for month in archived_months(request.user.virtual_account)
+            ]
         
         context = {
-            'transactions': all_transactions,
+            'transactions': transactions,
+            'next_cursor': next_cursor,
+            'is_first_page': not cursor,
+            'statement_form': StatementForm(),
+            'archives': archives,
         }
-        return render(request, self.template_name, context)
\ No newline at end of file
+        return render(request, self.template_name, context)
+
+
+class StatementExportView(LoginRequiredMixin, View):
+    """
+    Vue pour télécharger le relevé de compte sur une période (CSV ou JSON Lines)
+    """
+    
+    def get(self, request):
+        form = StatementForm(request.GET)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                messages.error(request, errors[0])
+            return redirect('transactions:history')
+        
+        start_date = form.cleaned_data['start_date']
+        end_date = form.cleaned_data['end_date']
+        rows = statement_rows(request.user.virtual_account, start_date, end_date)
+        
+        if form.cleaned_data['format'] == StatementForm.JSONL:
+            response = StreamingHttpResponse(stream_jsonl(rows), content_type='application/x-ndjson; charset=utf-8')
+            extension = 'jsonl'
+        else:
+            response = StreamingHttpResponse(stream_csv(rows), content_type='text/csv; charset=utf-8')
+            extension = 'csv'
+        
+        period = '_'.join(str(day) for day in (start_date, end_date) if day) or 'complet'
+        response['Content-Disposition'] = f'attachment; filename="releve_{request.user.username}_{period}.{extension}"'
+        return response
\ No newline at end of file